@@ -0,0 +1 @@
+"""Benchmarks for MCP-Kali Assistant (run from the project root with ``python -m benchmarks.<name>``)."""
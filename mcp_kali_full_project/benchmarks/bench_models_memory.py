@@ -0,0 +1,127 @@
+"""
+Memory benchmark: plain per-port dicts vs. the slotted Host/Port model.
+
+Usage (from the project root):
+    python -m benchmarks.bench_models_memory --hosts 256 --ports 200
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import random
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from mcp_kali_assistant.parsers.models import Host, NmapSummary, Port
+
+SERVICES = [
+    ("ssh", "OpenSSH", "8.9p1"),
+    ("http", "Apache httpd", "2.4.52"),
+    ("https", "nginx", "1.18.0"),
+    ("microsoft-ds", "Samba smbd", "4.6.2"),
+    ("mysql", "MySQL", "8.0.32"),
+    (None, None, None),
+]
+STATES = [("open", "syn-ack"), ("closed", "reset"), ("filtered", "no-response")]
+
+
+def _fresh(value: Any) -> Any:
+    # Simulate strings decoded from XML: equal values, distinct objects.
+    return "".join(list(value)) if isinstance(value, str) else value
+
+
+def _raw_records(hosts: int, ports: int, seed: int) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    records = []
+    for h in range(hosts):
+        host_ports = []
+        for p in range(ports):
+            state, reason = rng.choice(STATES)
+            name, product, version = rng.choice(SERVICES)
+            host_ports.append(
+                {
+                    "portid": str(1 + p),
+                    "protocol": "tcp",
+                    "state": state,
+                    "reason": reason,
+                    "service_name": name,
+                    "product": product,
+                    "version": version,
+                    "extrainfo": None,
+                }
+            )
+        records.append(
+            {"address": f"10.{h // 65536}.{h // 256 % 256}.{h % 256}", "addr_type": "ipv4", "os_guess": "Linux 5.x", "ports": host_ports}
+        )
+    return records
+
+
+def _as_dicts(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "hosts": [
+            {**{k: _fresh(v) for k, v in h.items() if k != "ports"}, "ports": [{k: _fresh(v) for k, v in p.items()} for p in h["ports"]]}
+            for h in records
+        ]
+    }
+
+
+def _as_model(records: List[Dict[str, Any]]) -> NmapSummary:
+    return NmapSummary(
+        Host(
+            address=_fresh(h["address"]),
+            addr_type=_fresh(h["addr_type"]),
+            os_guess=_fresh(h["os_guess"]),
+            ports=[Port(**{k: _fresh(v) for k, v in p.items()}) for p in h["ports"]],
+        )
+        for h in records
+    )
+
+
+def _measure(build: Callable[[], Any]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    obj = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del obj
+    return current
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hosts", type=int, default=256)
+    parser.add_argument("--ports", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1337)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    args = parser.parse_args()
+
+    records = _raw_records(args.hosts, args.ports, args.seed)
+    model = _as_model(records)
+    assert NmapSummary.from_dict(model.to_dict()) == model, "to_dict/from_dict round-trip is not lossless"
+
+    dict_bytes = _measure(lambda: _as_dicts(records))
+    model_bytes = _measure(lambda: _as_model(records))
+    port_count = args.hosts * args.ports
+    result = {
+        "hosts": args.hosts,
+        "ports_per_host": args.ports,
+        "port_records": port_count,
+        "dict_bytes": dict_bytes,
+        "model_bytes": model_bytes,
+        "dict_bytes_per_port": round(dict_bytes / port_count, 1),
+        "model_bytes_per_port": round(model_bytes / port_count, 1),
+        "reduction_pct": round(100.0 * (1 - model_bytes / dict_bytes), 1),
+    }
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    print(f"Port records:     {port_count:,}")
+    print(f"dict per port:    {result['dict_bytes_per_port']} B  (total {dict_bytes / 1e6:.1f} MB)")
+    print(f"model per port:   {result['model_bytes_per_port']} B  (total {model_bytes / 1e6:.1f} MB)")
+    print(f"reduction:        {result['reduction_pct']}%")
+
+
+if __name__ == "__main__":
+    main()
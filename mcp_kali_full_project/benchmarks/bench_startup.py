@@ -0,0 +1,171 @@
+"""
+Cold-start benchmark for the mcp_cli entry point.
+
+Each sample is a fresh interpreter: ``python -X importtime -c "import mcp_cli"`` for
+the import cost, and ``python mcp_cli.py <args>`` for the wall time of a few cheap
+subcommands. Medians are reported. The run fails (exit code 1) if ``import mcp_cli``
+loads any of HEAVY_MODULES, exceeds ``--max-import-ms``, or, with ``--compare``, is
+more than ``--threshold`` slower than a saved baseline on any measurement.
+
+Usage (from the project root):
+    python -m benchmarks.bench_startup --runs 10
+    python -m benchmarks.bench_startup --save startup-baseline.json
+    python -m benchmarks.bench_startup --compare startup-baseline.json --threshold 0.25
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+# Subsystems that `import mcp_cli` must not pull in (they belong to specific commands).
+HEAVY_MODULES = (
+    "requests",
+    "yaml",
+    "sqlite3",
+    "asyncio",
+    "multiprocessing",
+    "concurrent.futures",
+    "xml.etree.ElementTree",
+    "rich.console",
+    "rich.table",
+    "mcp_kali_assistant.ai_engine.client",
+    "mcp_kali_assistant.core.session",
+    "mcp_kali_assistant.scanners.nmap_scan",
+)
+
+SUBCOMMANDS: Dict[str, Sequence[str]] = {
+    "help": ("--help",),
+    "report_help": ("report", "--help"),
+    "report_list": ("report", "--list", "--limit", "1"),
+    "report_missing": ("report", "--session-id", "bench-startup-missing-session"),
+}
+
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$")
+
+
+def _python(args: Sequence[str]) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args], cwd=PROJECT_ROOT, capture_output=True, text=True, stdin=subprocess.DEVNULL
+    )
+
+
+def _import_sample() -> Tuple[float, List[Tuple[str, int]]]:
+    """One cold ``import mcp_cli``: (cumulative ms, [(module, self µs), ...])."""
+    proc = _python(["-X", "importtime", "-c", "import mcp_cli"])
+    if proc.returncode != 0:
+        raise SystemExit(f"import mcp_cli failed:\n{proc.stderr}")
+    total_us = 0
+    modules: List[Tuple[str, int]] = []
+    for line in proc.stderr.splitlines():
+        m = _IMPORTTIME_RE.match(line)
+        if not m:
+            continue
+        modules.append((m.group(4), int(m.group(1))))
+        if m.group(4) == "mcp_cli":
+            total_us = int(m.group(2))
+    return total_us / 1000.0, modules
+
+
+def _loaded_heavy_modules() -> List[str]:
+    proc = _python(["-c", "import json, sys, mcp_cli; print(json.dumps(sorted(sys.modules)))"])
+    if proc.returncode != 0:
+        raise SystemExit(f"import mcp_cli failed:\n{proc.stderr}")
+    loaded = set(json.loads(proc.stdout))
+    return [m for m in HEAVY_MODULES if m in loaded]
+
+
+def _wall_sample(args: Sequence[str]) -> float:
+    started = time.perf_counter()
+    _python(["mcp_cli.py", *args])
+    return (time.perf_counter() - started) * 1000.0
+
+
+def run(runs: int, top: int) -> Dict[str, Any]:
+    # Warm-up: compile bytecode so every measured run starts from the same state.
+    _python(["-c", "import mcp_cli"])
+
+    import_ms: List[float] = []
+    self_us: Dict[str, List[int]] = {}
+    for _ in range(runs):
+        total, modules = _import_sample()
+        import_ms.append(total)
+        for name, us in modules:
+            self_us.setdefault(name, []).append(us)
+
+    wall: Dict[str, List[float]] = {name: [] for name in SUBCOMMANDS}
+    for _ in range(runs):
+        for name, args in SUBCOMMANDS.items():
+            wall[name].append(_wall_sample(args))
+
+    slowest = sorted(((statistics.median(v), k) for k, v in self_us.items()), reverse=True)[:top]
+    return {
+        "python": sys.version.split()[0],
+        "runs": runs,
+        "import_mcp_cli_ms": round(statistics.median(import_ms), 1),
+        "wall_ms": {name: round(statistics.median(v), 1) for name, v in wall.items()},
+        "slowest_imports_self_ms": {name: round(us / 1000.0, 2) for us, name in slowest},
+        "heavy_modules_loaded": _loaded_heavy_modules(),
+    }
+
+
+def _timings(result: Dict[str, Any]) -> Dict[str, float]:
+    return {"import_mcp_cli_ms": result["import_mcp_cli_ms"], **{f"wall_ms.{k}": v for k, v in result["wall_ms"].items()}}
+
+
+def compare(result: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Measurements more than ``threshold`` (a fraction) slower than ``baseline``."""
+    current, before = _timings(result), _timings(baseline)
+    regressions = []
+    for key, value in current.items():
+        old = before.get(key)
+        if old and value > old * (1 + threshold):
+            regressions.append(f"{key}: {old:.1f} ms -> {value:.1f} ms (+{100 * (value / old - 1):.0f}%)")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10, help="Fresh interpreters per measurement (median is used).")
+    parser.add_argument("--top", type=int, default=10, help="Show this many slowest imports (self time).")
+    parser.add_argument("--max-import-ms", type=float, default=None, help="Fail if `import mcp_cli` takes longer.")
+    parser.add_argument("--save", type=Path, help="Write the result as a baseline JSON file.")
+    parser.add_argument("--compare", type=Path, help="Baseline JSON file to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown vs. the baseline (0.25 = 25%%).")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    args = parser.parse_args()
+
+    result = run(max(1, args.runs), args.top)
+    failures = [f"import mcp_cli loaded {m}" for m in result["heavy_modules_loaded"]]
+    if args.max_import_ms is not None and result["import_mcp_cli_ms"] > args.max_import_ms:
+        failures.append(f"import mcp_cli took {result['import_mcp_cli_ms']} ms (budget {args.max_import_ms} ms)")
+    if args.compare:
+        failures += compare(result, json.loads(args.compare.read_text(encoding="utf-8")), args.threshold)
+    if args.save:
+        args.save.write_text(json.dumps(result, indent=2) + "\n", encoding="utf-8")
+
+    if args.json:
+        print(json.dumps({**result, "failures": failures}, indent=2))
+    else:
+        print(f"import mcp_cli:   {result['import_mcp_cli_ms']} ms (median of {result['runs']})")
+        for name, ms in result["wall_ms"].items():
+            print(f"{name + ':':<17} {ms} ms wall")
+        print("slowest imports (self time):")
+        for name, ms in result["slowest_imports_self_ms"].items():
+            print(f"  {ms:7.2f} ms  {name}")
+        for failure in failures:
+            print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""
+Pipeline benchmark suite on synthetic data.
+
+Generates an Nmap XML file (see benchmarks/synthetic.py) plus a handful of command
+logs in a temp directory, then measures wall time (median of ``--repeat`` runs) and
+peak traced memory (one extra run under tracemalloc) for each step:
+
+    parse_nmap_xml          full XML -> {"hosts": [...]} dict
+    load_nmap_summary       full XML -> NmapSummary model
+    summarize_nmap          Rich table rendered to a null console
+    session_save            Session.save (manifest + unchanged parts + index upsert)
+    session_load            Session.load (manifest only; parts stay on disk)
+    session_load_full       Session.load plus reading every part
+    generate_markdown_report
+    build_context_json
+    call_ai_strategy        against a stub AIClient (no network, no cache)
+    call_ai_strategy_stream the same, streamed in small chunks
+
+With ``--compare`` the run fails (exit code 1) if any step is more than
+``--threshold`` slower, or uses more than ``--threshold`` more peak memory, than a
+saved baseline generated with the same data parameters.
+
+Usage (from the project root):
+    python -m benchmarks.bench_suite --hosts 256 --ports 100
+    python -m benchmarks.bench_suite --state-mix open=0.6,closed=0.2,filtered=0.2 --script-bytes 4096
+    python -m benchmarks.bench_suite --save suite-baseline.json
+    python -m benchmarks.bench_suite --compare suite-baseline.json --threshold 0.25
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from rich.console import Console
+
+from benchmarks.synthetic import DEFAULT_STATE_MIX, SyntheticScan, parse_state_mix
+from mcp_kali_assistant.ai_engine import strategy
+from mcp_kali_assistant.ai_engine.client import AIClient
+from mcp_kali_assistant.core.session import ExecutedCommand, Session
+from mcp_kali_assistant.io import summaries
+from mcp_kali_assistant.parsers.nmap_parser import load_nmap_summary, parse_nmap_xml
+from mcp_kali_assistant.reports.markdown_report import generate_markdown_report
+
+STUB_RECOMMENDATIONS = 8
+STUB_CHUNK_CHARS = 24
+
+
+class StubAIClient(AIClient):
+    """AIClient that answers every prompt with the same canned YAML, without any I/O."""
+
+    def __init__(self, recommendations: int = STUB_RECOMMENDATIONS):
+        super().__init__(base_url="http://stub.invalid", api_path="/api/generate", model_name="bench-stub")
+        items = []
+        for i in range(recommendations):
+            items.append(
+                f"  - name: Step {i + 1}\n"
+                f"    command: nmap -sV -p {80 + i} --script=banner 10.0.0.{i + 1}\n"
+                f"    category: {('web', 'smb', 'generic')[i % 3]}\n"
+                f"    priority: {1 + i % 5}\n"
+                f"    rationale: Synthetic recommendation {i + 1} for benchmarking.\n"
+            )
+        self.answer = "recommendations:\n" + "".join(items)
+
+    def generate(self, prompt: str, stats: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        return self.answer
+
+    def generate_stream(self, prompt: str, stats: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        for start in range(0, len(self.answer), STUB_CHUNK_CHARS):
+            yield self.answer[start : start + STUB_CHUNK_CHARS]
+
+
+def _build_session(nmap_summary: Any, xml_path: Path, logs_dir: Path, commands: int, log_bytes: int) -> Session:
+    session = Session(target="10.0.0.0/16", mode="balanced", hint="synthetic benchmark data", session_id="bench-suite")
+    session.reachability = {"target": session.target, "icmp_reachable": True, "tcp_checks": {"22": True, "80": True}}
+    session.nmap_xml_path = str(xml_path)
+    session.nmap_summary = nmap_summary
+    line = "enumeration output line " * 3 + "\n"
+    for i in range(1, commands + 1):
+        log_file = logs_dir / f"cmd_{i}.log"
+        log_file.write_text((line * (log_bytes // len(line) + 1))[:log_bytes], encoding="utf-8")
+        session.record_executed(
+            ExecutedCommand(
+                index=i,
+                name=f"Step {i}",
+                command=f"nmap -sV -p {80 + i} 10.0.0.{i}",
+                category="generic",
+                priority=1 + i % 5,
+                rationale="Synthetic recommendation.",
+                started_at="2026-01-01T00:00:00",
+                ended_at="2026-01-01T00:00:05",
+                exit_code=0,
+                log_file=str(log_file),
+            )
+        )
+    session.ai_recommendations = [
+        {"name": c.name, "command": c.command, "category": c.category, "priority": c.priority, "rationale": c.rationale}
+        for c in session.executed_commands
+    ]
+    return session
+
+
+def _measure(step: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    times: List[float] = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        step()
+        times.append((time.perf_counter() - started) * 1000.0)
+    # Peak memory from a separate run: tracemalloc slows allocation-heavy code a lot.
+    gc.collect()
+    tracemalloc.start()
+    step()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"ms": round(statistics.median(times), 2), "peak_kb": round(peak / 1024.0, 1)}
+
+
+def run(scan: SyntheticScan, repeat: int, commands: int, log_bytes: int) -> Dict[str, Any]:
+    null_console = Console(file=open(os.devnull, "w", encoding="utf-8"), width=120)
+    saved_consoles = (summaries.console, strategy.console)
+    summaries.console = strategy.console = null_console
+    try:
+        with tempfile.TemporaryDirectory(prefix="bench-suite-") as tmp:
+            root = Path(tmp)
+            sessions_root, reports_root, logs_dir = root / "sessions", root / "reports", root / "logs"
+            for d in (sessions_root, reports_root, logs_dir):
+                d.mkdir()
+            xml_path = root / "nmap.xml"
+            xml_bytes, open_ports = scan.write(xml_path)
+
+            nmap_summary = load_nmap_summary(xml_path)
+            session = _build_session(nmap_summary, xml_path, logs_dir, commands, log_bytes)
+            session.save(sessions_root)
+            client = StubAIClient()
+            ai_args = (session.target, session.mode, session.hint, session.reachability, nmap_summary)
+
+            steps: List[Tuple[str, Callable[[], Any]]] = [
+                ("parse_nmap_xml", lambda: parse_nmap_xml(xml_path)),
+                ("load_nmap_summary", lambda: load_nmap_summary(xml_path)),
+                ("summarize_nmap", lambda: summaries.summarize_nmap(nmap_summary)),
+                ("session_save", lambda: session.save(sessions_root)),
+                ("session_load", lambda: Session.load(sessions_root, session.session_id)),
+                ("session_load_full", lambda: Session.load(sessions_root, session.session_id).load_parts()),
+                ("generate_markdown_report", lambda: generate_markdown_report(session, reports_root)),
+                ("build_context_json", lambda: strategy.build_context_json(*ai_args)),
+                ("call_ai_strategy", lambda: strategy.call_ai_strategy(client, *ai_args)),
+                ("call_ai_strategy_stream", lambda: strategy.call_ai_strategy(client, *ai_args, stream=True)),
+            ]
+            results = {name: _measure(step, repeat) for name, step in steps}
+            client.close()
+    finally:
+        summaries.console, strategy.console = saved_consoles
+        null_console.file.close()
+
+    return {
+        "python": sys.version.split()[0],
+        "repeat": repeat,
+        "data": {
+            "hosts": scan.hosts,
+            "ports_per_host": scan.ports,
+            "state_mix": scan.state_mix,
+            "script_bytes": scan.script_bytes,
+            "seed": scan.seed,
+            "commands": commands,
+            "log_bytes": log_bytes,
+            "xml_bytes": xml_bytes,
+            "open_ports": open_ports,
+        },
+        "steps": results,
+    }
+
+
+def compare(result: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Steps more than ``threshold`` (a fraction) slower or larger than ``baseline``."""
+    failures: List[str] = []
+    if result["data"] != baseline.get("data"):
+        failures.append("baseline was generated with different data parameters; not comparable")
+        return failures
+    for name, now in result["steps"].items():
+        before = baseline.get("steps", {}).get(name)
+        if not before:
+            continue
+        for key, unit in (("ms", "ms"), ("peak_kb", "KB")):
+            old, new = before.get(key), now[key]
+            if old and new > old * (1 + threshold):
+                failures.append(f"{name} {key}: {old:.1f} {unit} -> {new:.1f} {unit} (+{100 * (new / old - 1):.0f}%)")
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hosts", type=int, default=256)
+    parser.add_argument("--ports", type=int, default=100, help="Ports per host.")
+    parser.add_argument(
+        "--state-mix",
+        default=",".join(f"{k}={v:g}" for k, v in DEFAULT_STATE_MIX.items()),
+        help="Port state weights, e.g. open=0.2,closed=0.5,filtered=0.3.",
+    )
+    parser.add_argument("--script-bytes", type=int, default=256, help="Script output size per open port.")
+    parser.add_argument("--commands", type=int, default=10, help="Executed commands (with logs) in the session.")
+    parser.add_argument("--log-bytes", type=int, default=65536, help="Size of each command log.")
+    parser.add_argument("--seed", type=int, default=1337)
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per step (median is used).")
+    parser.add_argument("--save", type=Path, help="Write the result as a baseline JSON file.")
+    parser.add_argument("--compare", type=Path, help="Baseline JSON file to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed regression vs. the baseline (0.25 = 25%%).")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    args = parser.parse_args()
+
+    try:
+        state_mix = parse_state_mix(args.state_mix)
+    except ValueError as e:
+        parser.error(str(e))
+    scan = SyntheticScan(
+        hosts=max(1, args.hosts), ports=max(1, args.ports), state_mix=state_mix, script_bytes=max(0, args.script_bytes), seed=args.seed
+    )
+
+    result = run(scan, max(1, args.repeat), max(0, args.commands), max(0, args.log_bytes))
+    failures: List[str] = []
+    if args.compare:
+        failures = compare(result, json.loads(args.compare.read_text(encoding="utf-8")), args.threshold)
+    if args.save:
+        args.save.write_text(json.dumps(result, indent=2) + "\n", encoding="utf-8")
+
+    if args.json:
+        print(json.dumps({**result, "failures": failures}, indent=2))
+    else:
+        data = result["data"]
+        print(f"data: {scan.describe()}")
+        print(f"      {data['xml_bytes'] / 1e6:.1f} MB XML, {data['open_ports']:,} open ports, {data['commands']} command logs")
+        print(f"{'step':<26} {'median ms':>10} {'peak KB':>10}")
+        for name, m in result["steps"].items():
+            print(f"{name:<26} {m['ms']:>10.2f} {m['peak_kb']:>10.1f}")
+        for failure in failures:
+            print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
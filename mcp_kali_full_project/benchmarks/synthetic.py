@@ -0,0 +1,106 @@
+"""
+Synthetic Nmap XML for benchmarks.
+
+Files are shaped like ``nmap -sV -sC -oX`` output: ``hosts`` hosts (every eighth one
+down), ``ports`` ports each with a state drawn from a weighted mix, a ``<service>``
+element and, on open ports, one ``<script>`` whose output is ``script_bytes`` long.
+The same seed always produces the same file.
+"""
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Tuple
+from xml.sax.saxutils import quoteattr
+
+SERVICES = [
+    ("ssh", "OpenSSH", "8.9p1", "Ubuntu Linux; protocol 2.0"),
+    ("http", "Apache httpd", "2.4.52", "(Ubuntu)"),
+    ("https", "nginx", "1.18.0", ""),
+    ("microsoft-ds", "Samba smbd", "4.6.2", "workgroup: WORKGROUP"),
+    ("mysql", "MySQL", "8.0.32", ""),
+    ("ftp", "vsftpd", "3.0.5", ""),
+    ("unknown", "", "", ""),
+]
+STATE_REASONS = {"open": "syn-ack", "closed": "reset", "filtered": "no-response"}
+DEFAULT_STATE_MIX = {"open": 0.2, "closed": 0.5, "filtered": 0.3}
+_SCRIPT_WORDS = ("banner", "title", "Server:", "ssl-cert", "Subject:", "commonName=lab.local", "|_", "200 OK")
+
+
+def parse_state_mix(spec: str) -> Dict[str, float]:
+    """``"open=0.2,closed=0.5,filtered=0.3"`` -> weights (need not sum to 1)."""
+    mix: Dict[str, float] = {}
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        state, _, weight = part.partition("=")
+        state = state.strip()
+        if state not in STATE_REASONS:
+            raise ValueError(f"unknown port state {state!r} (expected one of {', '.join(STATE_REASONS)})")
+        try:
+            mix[state] = float(weight)
+        except ValueError:
+            raise ValueError(f"invalid weight for {state!r}: {weight!r}") from None
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError(f"state mix {spec!r} has no positive weights")
+    return mix
+
+
+@dataclass
+class SyntheticScan:
+    hosts: int = 256
+    ports: int = 100
+    state_mix: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_STATE_MIX))
+    script_bytes: int = 256
+    seed: int = 1337
+
+    def describe(self) -> str:
+        mix = ",".join(f"{k}={v:g}" for k, v in self.state_mix.items())
+        return f"{self.hosts} hosts x {self.ports} ports, states {mix}, {self.script_bytes} B script output"
+
+    def _script_output(self, rng: random.Random) -> str:
+        words: List[str] = []
+        size = 0
+        while size < self.script_bytes:
+            word = rng.choice(_SCRIPT_WORDS)
+            words.append(word)
+            size += len(word) + 1
+        return " ".join(words)[: self.script_bytes]
+
+    def write(self, path: Path) -> Tuple[int, int]:
+        """Write the XML to ``path``; returns (file size in bytes, number of open ports)."""
+        rng = random.Random(self.seed)
+        states = list(self.state_mix)
+        weights = [self.state_mix[s] for s in states]
+        open_ports = 0
+        with path.open("w", encoding="utf-8") as f:
+            f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+            f.write('<nmaprun scanner="nmap" args="nmap -sV -sC -oX bench.xml" version="7.94" xmloutputversion="1.05">\n')
+            for h in range(self.hosts):
+                addr = f"10.{h // 65536 % 256}.{h // 256 % 256}.{h % 256}"
+                up = h % 8 != 7
+                f.write(f'<host><status state="{"up" if up else "down"}" reason="{"syn-ack" if up else "no-response"}"/>\n')
+                f.write(f'<address addr="{addr}" addrtype="ipv4"/>\n')
+                if not up:
+                    f.write("</host>\n")
+                    continue
+                f.write("<ports>\n")
+                for p in range(self.ports):
+                    state = rng.choices(states, weights)[0]
+                    name, product, version, extrainfo = rng.choice(SERVICES)
+                    f.write(f'<port protocol="tcp" portid="{1 + p}"><state state="{state}" reason="{STATE_REASONS[state]}"/>')
+                    f.write(
+                        f"<service name={quoteattr(name)} product={quoteattr(product)} "
+                        f"version={quoteattr(version)} extrainfo={quoteattr(extrainfo)} method=\"probed\" conf=\"10\"/>"
+                    )
+                    if state == "open":
+                        open_ports += 1
+                        if self.script_bytes > 0:
+                            f.write(f'<script id="banner" output={quoteattr(self._script_output(rng))}/>')
+                    f.write("</port>\n")
+                f.write("</ports>\n")
+                f.write('<os><osmatch name="Linux 5.0 - 5.14" accuracy="95"/></os>\n')
+                f.write("</host>\n")
+            f.write("</nmaprun>\n")
+        return path.stat().st_size, open_ports
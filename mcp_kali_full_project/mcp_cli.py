@@ -1,45 +1,55 @@
 from __future__ import annotations
 
-import shlex
-import shutil
 import subprocess
-from datetime import datetime
+import threading
+import time
+from contextlib import nullcontext
 from pathlib import Path
-from typing import List, Optional
+from typing import TYPE_CHECKING, Callable, List, Optional, Set, Tuple
 
 import typer
-from rich.console import Console
-from rich.panel import Panel
-from rich.prompt import Confirm, Prompt
-
-from mcp_kali_assistant.core.config import AppConfig
-from mcp_kali_assistant.core.session import ExecutedCommand, Session
-from mcp_kali_assistant.io.prompts import (
-    confirm_disclaimer,
-    prompt_target_and_context,
-    show_banner,
-)
-from mcp_kali_assistant.io.summaries import (
-    show_ai_command_table,
-    summarize_nmap,
-    summarize_reachability,
-)
-from mcp_kali_assistant.parsers.nmap_parser import parse_nmap_xml
-from mcp_kali_assistant.scanners.nmap_scan import run_nmap_scan
-from mcp_kali_assistant.scanners.ping_check import reachability_check
-from mcp_kali_assistant.ai_engine.client import AIClient
-from mcp_kali_assistant.ai_engine.strategy import call_ai_strategy
-from mcp_kali_assistant.reports.markdown_report import generate_markdown_report
+
+from mcp_kali_assistant.io.console import LazyConsole
+
+# Subsystems are imported inside the functions that use them, so `--help` and quick
+# commands such as `report` do not load requests, PyYAML, the scanners or Rich widgets.
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+    from mcp_kali_assistant.ai_engine.cache import StrategyCache
+    from mcp_kali_assistant.ai_engine.client import AIClient
+    from mcp_kali_assistant.ai_engine.pipeline import HostStrategyPipeline
+    from mcp_kali_assistant.core.batch import BatchOutcome, BatchScheduler, BatchTarget, SelectionPolicy
+    from mcp_kali_assistant.core.config import AppConfig
+    from mcp_kali_assistant.core.executor import CommandJob, RunningCommands
+    from mcp_kali_assistant.core.session import Session
+    from mcp_kali_assistant.parsers.models import Host
 
 app = typer.Typer(help="MCP-like auto-analysis assistant for Kali CTF / authorized enumeration.")
-console = Console()
+console = LazyConsole()
 
 
 def load_config() -> AppConfig:
-    return AppConfig.from_cwd()
+    from mcp_kali_assistant.core import session_store
+    from mcp_kali_assistant.core.config import AppConfig
+
+    cfg = AppConfig.from_cwd()
+    try:
+        session_store.set_default_codec(cfg.session_codec)
+    except ValueError as e:
+        console.print(f"[bold red]Invalid general.session_codec: {e}[/bold red]")
+        raise typer.Exit(code=2)
+    return cfg
 
 
 def build_ai_client(cfg: AppConfig) -> Optional[AIClient]:
+    from mcp_kali_assistant.ai_engine.client import (
+        DEFAULT_BACKOFF_BASE_SECONDS,
+        DEFAULT_MAX_RETRIES,
+        DEFAULT_POOL_SIZE,
+        AIClient,
+    )
+
     ai_cfg = cfg.ai_config
     base_url = ai_cfg.get("base_url")
     api_path = ai_cfg.get("api_path", "/api/generate")
@@ -51,12 +61,33 @@ def build_ai_client(cfg: AppConfig) -> Optional[AIClient]:
         console.print("[bold yellow]AI base_url not configured. Phase 3 (AI Strategy) will be skipped.[/bold yellow]")
         return None
 
+    connect_timeout = ai_cfg.get("connect_timeout_seconds")
+    read_timeout = ai_cfg.get("read_timeout_seconds")
+
     return AIClient(
         base_url=base_url,
         api_path=api_path,
         model_name=model_name,
         timeout_seconds=timeout_seconds,
         api_key=api_key,
+        connect_timeout_seconds=float(connect_timeout) if connect_timeout is not None else None,
+        read_timeout_seconds=float(read_timeout) if read_timeout is not None else None,
+        max_retries=int(ai_cfg.get("max_retries", DEFAULT_MAX_RETRIES)),
+        backoff_base_seconds=float(ai_cfg.get("backoff_base_seconds", DEFAULT_BACKOFF_BASE_SECONDS)),
+        pool_size=int(ai_cfg.get("pool_size", DEFAULT_POOL_SIZE)),
+    )
+
+
+def build_ai_cache(cfg: AppConfig) -> Optional[StrategyCache]:
+    from mcp_kali_assistant.ai_engine.cache import DEFAULT_MAX_BYTES, DEFAULT_TTL_SECONDS, StrategyCache
+
+    ai_cfg = cfg.ai_config
+    if not ai_cfg.get("cache_enabled", True):
+        return None
+    return StrategyCache(
+        cfg.sessions_dir / "ai_cache",
+        ttl_seconds=int(ai_cfg.get("cache_ttl_seconds", DEFAULT_TTL_SECONDS)),
+        max_bytes=int(ai_cfg.get("cache_max_bytes", DEFAULT_MAX_BYTES)),
     )
 
 
@@ -80,25 +111,103 @@ def parse_command_selection(max_index: int, selection: str) -> List[int]:
     return sorted(set(indices))
 
 
-def ensure_tool_installed(tool: str) -> bool:
-    """Check if a CLI tool is installed, and optionally ask to install it via apt-get."""
-    if shutil.which(tool):
-        return True
+def setup_output(cfg: AppConfig, verbosity: Optional[str]) -> None:
+    from mcp_kali_assistant.io.output import DEFAULT_MAX_REDRAWS_PER_SECOND, VERBOSITY_LEVELS, configure_output
+
+    out_cfg = cfg.output_config
+    verbosity = verbosity or str(out_cfg.get("verbosity", "summary"))
+    if verbosity not in VERBOSITY_LEVELS:
+        console.print(f"[bold red]Invalid verbosity: {verbosity} (expected one of {', '.join(VERBOSITY_LEVELS)})[/bold red]")
+        raise typer.Exit(code=2)
+    configure_output(
+        verbosity,
+        max_redraws_per_second=float(out_cfg.get("max_redraws_per_second", DEFAULT_MAX_REDRAWS_PER_SECOND)),
+    )
+
 
-    console.print(f"[bold yellow]Tool '{tool}' is not installed.[/bold yellow]")
-    if not Confirm.ask(f"Attempt to install '{tool}' via apt-get? (Requires sudo)", default=False):
-        console.print(f"[bold yellow]Skipping commands that require '{tool}'.[/bold yellow]")
-        return False
+def report_options(cfg: AppConfig, fmt: Optional[str]) -> Tuple[str, int]:
+    """The report format (default: reports.format) and log excerpt size to use."""
+    from mcp_kali_assistant.reports.sections import DEFAULT_LOG_EXCERPT_BYTES
+    from mcp_kali_assistant.reports.writer import REPORT_FORMATS
 
+    rep_cfg = cfg.report_config
+    fmt = fmt or str(rep_cfg.get("format", "markdown"))
+    if fmt not in REPORT_FORMATS:
+        console.print(f"[bold red]Invalid report format: {fmt} (expected one of {', '.join(REPORT_FORMATS)})[/bold red]")
+        raise typer.Exit(code=2)
+    return fmt, int(rep_cfg.get("log_excerpt_bytes", DEFAULT_LOG_EXCERPT_BYTES))
+
+
+def generate_report(session: Session, cfg: AppConfig, fmt: Optional[str] = None) -> Path:
+    """Write the session report and stamp it so `report --all` can skip it until the session changes."""
+    from mcp_kali_assistant.reports.bulk import ReportJob, session_content_hash, write_stamp
+    from mcp_kali_assistant.reports.writer import write_report
+
+    fmt, log_excerpt_bytes = report_options(cfg, fmt)
+    report_path = write_report(session, cfg.reports_dir, fmt=fmt, log_excerpt_bytes=log_excerpt_bytes)
+    job = ReportJob(session.session_id, cfg.sessions_dir, cfg.reports_dir, fmt, log_excerpt_bytes)
     try:
-        console.print(f"[bold cyan]Running: sudo apt-get update && sudo apt-get install -y {tool}[/bold cyan]")
-        subprocess.run(["sudo", "apt-get", "update"], check=True)
-        subprocess.run(["sudo", "apt-get", "install", "-y", tool], check=True)
-    except subprocess.CalledProcessError as e:
-        console.print(f"[bold red]Failed to install '{tool}': {e}[/bold red]")
-        return False
+        write_stamp(report_path, session_content_hash(job))
+    except OSError:
+        # Without a stamp the next `report --all` simply rebuilds this report.
+        pass
+    return report_path
+
+
+def check_reuse_mode(reuse: Optional[str]) -> None:
+    from mcp_kali_assistant.scanners.nmap_reuse import REUSE_MODES
 
-    return shutil.which(tool) is not None
+    if reuse is not None and reuse not in REUSE_MODES:
+        console.print(f"[bold red]Invalid --reuse-scan value: {reuse} (expected one of {', '.join(REUSE_MODES)})[/bold red]")
+        raise typer.Exit(code=2)
+
+
+def resolve_command_tools(jobs: List[CommandJob], interactive: bool = True) -> List[CommandJob]:
+    """
+    Check every tool the planned ``jobs`` need before any of them runs.
+
+    Missing tools are listed together; interactively the user may install all of them
+    with a single apt transaction. Jobs whose tools are still missing are dropped.
+    """
+    from rich.markup import escape
+    from rich.prompt import Confirm
+    from rich.table import Table
+
+    from mcp_kali_assistant.core.tools import (
+        apt_install_commands,
+        install_packages,
+        package_for,
+        plan_tools,
+        refresh_plan,
+    )
+
+    plan = plan_tools({job.index: job.command for job in jobs})
+    if not plan.missing:
+        return jobs
+
+    table = Table(title="Tools not installed", show_lines=False)
+    table.add_column("Tool", style="bold")
+    table.add_column("apt package")
+    table.add_column("Needed by")
+    for tool in plan.missing:
+        table.add_row(escape(tool), escape(package_for(tool)), ", ".join(f"#{i}" for i in plan.commands_needing(tool)))
+    console.print(table)
+
+    packages = plan.packages()
+    if interactive and Confirm.ask(
+        f"Install {len(packages)} package(s) via apt-get in one transaction? (Requires sudo)", default=False
+    ):
+        console.print(f"[bold cyan]Running: {escape(' && '.join(' '.join(c) for c in apt_install_commands(packages)))}[/bold cyan]")
+        try:
+            install_packages(packages)
+        except (subprocess.CalledProcessError, OSError) as e:
+            console.print(f"[bold red]Package installation failed: {escape(str(e))}[/bold red]")
+        refresh_plan(plan)
+
+    blocked = plan.blocked_commands()
+    for idx, tools in blocked.items():
+        console.print(f"[bold yellow]Skipping #{idx}: missing {escape(', '.join(tools))}.[/bold yellow]")
+    return [job for job in jobs if job.index not in blocked]
 
 
 def execute_commands(
@@ -106,15 +215,49 @@ def execute_commands(
     commands: List[dict],
     selected_indices: List[int],
     cfg: AppConfig,
-) -> None:
+    slots: Optional[threading.Semaphore] = None,
+    interactive: bool = True,
+    running: Optional[RunningCommands] = None,
+) -> int:
+    """
+    Run the selected commands and record them on the session; returns how many ran.
+
+    All needed tools are resolved before anything runs (see resolve_command_tools).
+    ``slots`` is an extra limit shared with other sessions (batch runs); without
+    ``interactive`` missing tools are skipped instead of offering to install them.
+    ``running`` replaces the executor's own process registry, for callers that stop
+    commands from another thread (batch runs).
+    """
+    from rich.markup import escape
+    from rich.panel import Panel
+
+    from mcp_kali_assistant.core.executor import (
+        DEFAULT_MAX_OUTPUT_BYTES,
+        DEFAULT_MAX_WORKERS,
+        DEFAULT_TIMEOUT_SECONDS,
+        CommandJob,
+        CommandResult,
+        ParallelExecutor,
+        job_host,
+        run_command,
+    )
+    from mcp_kali_assistant.core.timing import add_span
+    from mcp_kali_assistant.io.output import ERROR, output_sink
+
     if not selected_indices:
         console.print("[bold yellow]No commands selected for execution.[/bold yellow]")
-        return
+        return 0
 
     session_dir = cfg.sessions_dir / session.session_id
     logs_dir = session_dir / "logs"
     logs_dir.mkdir(parents=True, exist_ok=True)
 
+    exec_cfg = cfg.execution_config
+    timeout = int(exec_cfg.get("timeout_seconds", DEFAULT_TIMEOUT_SECONDS))
+    max_output_bytes = int(exec_cfg.get("max_output_bytes", DEFAULT_MAX_OUTPUT_BYTES))
+    known_hosts = [h.address for h in session.nmap_summary.hosts if h.address]
+
+    jobs: List[CommandJob] = []
     for idx in selected_indices:
         if idx < 1 or idx > len(commands):
             continue
@@ -122,150 +265,936 @@ def execute_commands(
         raw_cmd = cmd_info.get("command", "").strip()
         if not raw_cmd:
             continue
+        jobs.append(
+            CommandJob(
+                index=idx,
+                command=raw_cmd,
+                category=cmd_info.get("category", "generic"),
+                host=job_host(raw_cmd, known_hosts, session.target),
+                info=cmd_info,
+            )
+        )
 
-        parts = shlex.split(raw_cmd)
-        if not parts:
-            continue
-        tool = parts[0]
+    jobs = resolve_command_tools(jobs, interactive=interactive)
+    if not jobs:
+        return 0
 
-        if not ensure_tool_installed(tool):
-            continue
+    executor = ParallelExecutor(
+        max_workers=int(exec_cfg.get("max_workers", DEFAULT_MAX_WORKERS)),
+        category_limits=exec_cfg.get("category_limits") or {},
+    )
+    console.print(
+        Panel(
+            "\n".join(f"#{job.index} {escape(f'[{job.category}]')} [bold]{escape(job.command)}[/bold]" for job in jobs),
+            title=f"Executing {len(jobs)} command(s) with up to {executor.max_workers} in parallel",
+            border_style="cyan",
+        )
+    )
 
-        console.print(Panel(f"Executing command #{idx}: [bold]{raw_cmd}[/bold]", border_style="cyan"))
-        started_at = datetime.utcnow().isoformat() + "Z"
-        log_file = logs_dir / f"cmd_{idx:02d}.log"
+    sink = output_sink()
 
-        try:
-            proc = subprocess.run(raw_cmd, shell=True, capture_output=True, text=True, timeout=600)
-            ended_at = datetime.utcnow().isoformat() + "Z"
-            log_file.write_text(proc.stdout + "\n\n[STDERR]\n" + proc.stderr, encoding="utf-8")
-            preview = (proc.stdout or "")[:600]
-            console.print(
-                Panel(preview or "(no stdout output)", title=f"Output preview for #{idx}", border_style="green")
+    def show_result(result: CommandResult) -> None:
+        idx = result.job.index
+        session.record_executed(result.record)
+        add_span(
+            session.timings,
+            f"enumeration.cmd_{idx:02d}",
+            result.seconds,
+            exit_code=result.record.exit_code,
+            **(result.usage.metrics() if result.usage is not None else {}),
+        )
+        session.checkpoint(cfg.sessions_dir, "command_executed", index=idx, exit_code=result.record.exit_code)
+        if result.timed_out:
+            sink.show(
+                f"[bold red]Command #{idx} timed out (partial output kept in {result.record.log_file}).[/bold red]",
+                level=ERROR,
             )
-            console.print(f"[bold]Exit code:[/bold] {proc.returncode}")
-            session.executed_commands.append(
-                ExecutedCommand(
-                    index=idx,
-                    name=cmd_info.get("name", f"cmd_{idx}"),
-                    command=raw_cmd,
-                    category=cmd_info.get("category", "generic"),
-                    priority=int(cmd_info.get("priority", 5)),
-                    rationale=cmd_info.get("rationale", ""),
-                    started_at=started_at,
-                    ended_at=ended_at,
-                    exit_code=proc.returncode,
-                    log_file=str(log_file),
-                )
+        sink.show(
+            Panel(
+                escape(result.preview) or "(no stdout output)",
+                title=f"Output preview for #{idx}: {escape(result.job.command)}",
+                subtitle=f"exit code {result.record.exit_code}",
+                border_style="green" if result.record.exit_code == 0 else "yellow",
             )
-        except subprocess.TimeoutExpired:
-            ended_at = datetime.utcnow().isoformat() + "Z"
-            console.print(f"[bold red]Command #{idx} timed out.[/bold red]")
-            log_file.write_text("Command timed out.", encoding="utf-8")
-            session.executed_commands.append(
-                ExecutedCommand(
-                    index=idx,
-                    name=cmd_info.get("name", f"cmd_{idx}"),
-                    command=raw_cmd,
-                    category=cmd_info.get("category", "generic"),
-                    priority=int(cmd_info.get("priority", 5)),
-                    rationale=cmd_info.get("rationale", ""),
-                    started_at=started_at,
-                    ended_at=ended_at,
-                    exit_code=-1,
-                    log_file=str(log_file),
-                )
+        )
+
+    def run_job(job: CommandJob) -> CommandResult:
+        on_line = (lambda line: sink.line(line, source=f"#{job.index}")) if sink.raw else None
+        with slots if slots is not None else nullcontext():
+            return run_command(
+                job,
+                logs_dir / f"cmd_{job.index:02d}.log",
+                timeout=timeout,
+                max_output_bytes=max_output_bytes,
+                on_line=on_line,
+                running=running if running is not None else executor.running,
             )
 
+    with session.span("enumeration") as metrics:
+        metrics["commands"] = len(jobs)
+        results = executor.run(jobs, run_job, on_done=show_result)
+    sink.flush()
+    return len(results)
 
-@app.command()
-def auto_analyse() -> None:
-    """Run the full auto-analysis pipeline."""
-    cfg = load_config()
-    show_banner()
 
-    if not confirm_disclaimer():
-        console.print("[bold yellow]Disclaimer not accepted. Exiting.[/bold yellow]")
-        raise typer.Exit(code=1)
+def _wait_for_recommendations(future: Future, commands: List[dict], progress: List[int], offered: int) -> bool:
+    """Live-render streamed recommendations until generation ends. Returns True if the user pressed Ctrl-C."""
+    from rich.live import Live
+
+    from mcp_kali_assistant.io.summaries import build_ai_command_table
+
+    def render(caption: str):
+        return build_ai_command_table(commands[offered:], start=offered + 1, caption=caption)
+
+    try:
+        with Live(render("Waiting for the model..."), console=console, refresh_per_second=4) as live:
+            while not future.done():
+                live.update(render(f"Generating... {progress[0]} chars received – press Ctrl-C to select now"))
+                time.sleep(0.25)
+            live.update(render("Generation complete"))
+    except KeyboardInterrupt:
+        return True
+    return False
+
+
+def run_streaming_strategy(
+    session: Session,
+    ai_client: AIClient,
+    cfg: AppConfig,
+    cache: Optional[StrategyCache],
+) -> None:
+    """
+    Phases 3 and 4 in streaming mode.
+
+    Recommendations are shown as the model produces them; Ctrl-C jumps to command selection
+    while generation continues in the background, and commands that arrive later are
+    offered in a follow-up round.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    from rich.prompt import Prompt
+
+    from mcp_kali_assistant.ai_engine.context import budget_from_config
+    from mcp_kali_assistant.ai_engine.strategy import call_ai_strategy
+    from mcp_kali_assistant.core.journal import PHASE_AI_STRATEGY
+    from mcp_kali_assistant.io.summaries import show_ai_command_table
+
+    commands: List[dict] = []
+    progress = [0]
+    stop_event = threading.Event()
+    pool = ThreadPoolExecutor(max_workers=1)
+    future = pool.submit(
+        call_ai_strategy,
+        ai_client,
+        target=session.target,
+        mode=session.mode,
+        hint=session.hint,
+        reachability=session.reachability,
+        nmap_summary=session.nmap_summary,
+        cache=cache,
+        context_budget_chars=budget_from_config(cfg.ai_config),
+        stream=True,
+        on_command=commands.append,
+        on_progress=lambda n: progress.__setitem__(0, n),
+        stop_event=stop_event,
+        spans=session.timings,
+    )
+
+    if _wait_for_recommendations(future, commands, progress, 0):
+        console.print("[yellow]Jumping to selection; the model keeps generating in the background.[/yellow]")
+
+    def record_strategy() -> None:
+        ai_result = future.result()
+        session.ai_raw_output = ai_result.get("raw")
+        session.ai_recommendations = list(commands)
+        session.checkpoint(cfg.sessions_dir, "phase_completed", phase=PHASE_AI_STRATEGY)
+
+    console.rule("[bold cyan]Phase 4 – Enumeration & Findings[/bold cyan]")
+    offered = 0
+    strategy_recorded = False
+    try:
+        while True:
+            if future.done() and not strategy_recorded:
+                record_strategy()
+                strategy_recorded = True
+            available = len(commands)
+            if available > offered:
+                if offered:
+                    console.print(f"[bold]{available - offered} more recommendation(s) arrived:[/bold]")
+                    show_ai_command_table(commands[offered:available], start=offered + 1)
+                selection = Prompt.ask(
+                    f"Which commands to run (#{offered + 1}-#{available})? [all / comma-separated indices / empty to skip]",
+                    default="",
+                )
+                selected = [i for i in parse_command_selection(available, selection) if i > offered]
+                session.selected_indices.extend(selected)
+                session.ai_recommendations = list(commands)
+                session.checkpoint(cfg.sessions_dir, "commands_selected", indices=selected)
+                execute_commands(session, commands, selected, cfg)
+                offered = available
+            if future.done():
+                if len(commands) == offered:
+                    break
+                continue
+            console.print("[dim]Waiting for the remaining recommendations (Ctrl-C to stop generation)...[/dim]")
+            if _wait_for_recommendations(future, commands, progress, offered):
+                stop_event.set()
+                future.result()
+    finally:
+        if not future.done():
+            # Interrupted: stop generating so the worker thread does not outlive the run.
+            stop_event.set()
+        pool.shutdown(wait=True)
+
+    if not strategy_recorded:
+        record_strategy()
+    if not commands:
+        console.print("[bold yellow]No commands available to execute in this phase.[/bold yellow]")
 
-    target, hint, mode = prompt_target_and_context()
-    session = Session(target=target, mode=mode, hint=hint)
 
-    # Phase 1 – Reachability
+def phase_reachability(session: Session, cfg: AppConfig) -> None:
+    from rich.markup import escape
+
+    from mcp_kali_assistant.io.summaries import summarize_reachability
+    from mcp_kali_assistant.scanners.ping_check import reachability_check, sample_targets
+
     console.rule("[bold cyan]Phase 1 – Reachability[/bold cyan]")
-    reach = reachability_check(target)
+    reach_cfg = cfg.reachability_config
+    options = dict(
+        ports=reach_cfg.get("tcp_ports"),
+        timeout=int(reach_cfg.get("timeout_seconds", 3)),
+        max_concurrency=int(reach_cfg.get("max_concurrency", 256)),
+    )
+    with session.span("reachability"):
+        try:
+            reach = reachability_check(session.target, **options)
+        except ValueError as e:
+            # Too large to probe in full: check a sample and leave the range to Nmap.
+            hosts = sample_targets(session.target)
+            console.print(
+                f"[yellow]{escape(str(e))} Probing the first {len(hosts)} host(s) only; "
+                "Nmap still scans the whole range.[/yellow]"
+            )
+            reach = reachability_check(session.target, hosts=hosts, **options)
     session.reachability = reach
     summarize_reachability(reach)
 
-    # Phase 2 – Nmap
+
+def phase_nmap(
+    session: Session,
+    cfg: AppConfig,
+    reuse: Optional[str] = None,
+    on_host: Optional[Callable[[Host], None]] = None,
+    live_progress: bool = True,
+) -> None:
+    from mcp_kali_assistant.core.timing import ChildUsage
+    from mcp_kali_assistant.io.summaries import summarize_nmap
+    from mcp_kali_assistant.parsers.nmap_parser import load_nmap_summary
+    from mcp_kali_assistant.scanners.nmap_reuse import (
+        DEFAULT_REUSE_TTL_SECONDS,
+        REUSE_AS_IS,
+        REUSE_DIFF,
+        REUSE_OFF,
+        find_reusable_scan,
+        reuse_scan,
+        run_differential_scan,
+    )
+    from mcp_kali_assistant.scanners.nmap_scan import run_nmap_scan
+
     console.rule("[bold cyan]Phase 2 – Service Discovery (Nmap)[/bold cyan]")
     session_dir = cfg.sessions_dir / session.session_id
     session_dir.mkdir(parents=True, exist_ok=True)
     nmap_xml_path = session_dir / "nmap.xml"
-    ok, _ = run_nmap_scan(target, mode, nmap_xml_path)
-    if ok and nmap_xml_path.exists():
-        session.nmap_xml_path = str(nmap_xml_path)
-        summary = parse_nmap_xml(nmap_xml_path)
-        session.nmap_summary = summary
-        summarize_nmap(summary)
-    else:
-        console.print("[bold red]Skipping Nmap parsing due to scan failure.[/bold red]")
+    nmap_cfg = cfg.nmap_config
 
-    # Phase 3 – AI Strategy
-    console.rule("[bold cyan]Phase 3 – AI Strategy[/bold cyan]")
-    ai_client = build_ai_client(cfg)
-    commands: List[dict] = []
-    if ai_client is None:
-        console.print("[bold yellow]AI client not configured. Skipping AI strategy phase.[/bold yellow]")
-    else:
+    with session.span("nmap"):
+        # An unquoted `off` in YAML loads as False.
+        reuse = reuse or str(nmap_cfg.get("reuse") or REUSE_OFF)
+        previous = None
+        if reuse != REUSE_OFF:
+            previous = find_reusable_scan(
+                cfg.sessions_dir,
+                session.target,
+                session.mode,
+                ttl_seconds=int(nmap_cfg.get("reuse_ttl_seconds", DEFAULT_REUSE_TTL_SECONDS)),
+                exclude_session_id=session.session_id,
+            )
+            if previous is None:
+                console.print("[dim]No recent compatible Nmap scan to reuse; running a full scan.[/dim]")
+
+        usage = ChildUsage()
+        with session.span("nmap.scan") as metrics:
+            if previous is not None and reuse == REUSE_AS_IS:
+                reuse_scan(previous, nmap_xml_path)
+                ok = True
+            elif previous is not None and reuse == REUSE_DIFF:
+                ok, _ = run_differential_scan(
+                    session.target, session.mode, previous, nmap_xml_path, live_progress=live_progress, usage=usage
+                )
+            else:
+                ok, _ = run_nmap_scan(
+                    session.target,
+                    session.mode,
+                    nmap_xml_path,
+                    host_shards=int(nmap_cfg.get("host_shards", 1)),
+                    port_shards=int(nmap_cfg.get("port_shards", 1)),
+                    max_workers=int(nmap_cfg.get("max_workers", 4)),
+                    staged=bool(nmap_cfg.get("staged", True)),
+                    on_host=on_host,
+                    live_progress=live_progress,
+                    usage=usage,
+                )
+            metrics.update(usage.metrics())
+        if ok and previous is not None:
+            session.checkpoint(cfg.sessions_dir, "nmap_reused", source=previous.session_id, reuse=reuse)
+        if ok and nmap_xml_path.exists():
+            session.nmap_xml_path = str(nmap_xml_path)
+            with session.span("nmap.parse") as metrics:
+                summary = load_nmap_summary(nmap_xml_path, states=nmap_cfg.get("keep_port_states") or None)
+                metrics["hosts"] = len(summary.hosts)
+            session.nmap_summary = summary
+            summarize_nmap(summary)
+        else:
+            console.print("[bold red]Skipping Nmap parsing due to scan failure.[/bold red]")
+
+
+def phase_ai_strategy(session: Session, cfg: AppConfig, ai_client: AIClient, ai_cache: Optional[StrategyCache]) -> List[dict]:
+    from mcp_kali_assistant.ai_engine.context import budget_from_config
+    from mcp_kali_assistant.ai_engine.strategy import call_ai_strategy
+    from mcp_kali_assistant.io.summaries import show_ai_command_table
+
+    with session.span("ai"):
         ai_result = call_ai_strategy(
             ai_client,
-            target=target,
-            mode=mode,
-            hint=hint,
-            reachability=reach,
+            target=session.target,
+            mode=session.mode,
+            hint=session.hint,
+            reachability=session.reachability,
             nmap_summary=session.nmap_summary,
+            cache=ai_cache,
+            context_budget_chars=budget_from_config(cfg.ai_config),
+            spans=session.timings,
         )
-        session.ai_raw_output = ai_result.get("raw")
-        parsed = ai_result.get("parsed")
-        if parsed is not None:
-            session.ai_recommendations = ai_result.get("commands", [])
-        commands = ai_result.get("commands", [])
-        show_ai_command_table(commands)
+    session.ai_raw_output = ai_result.get("raw")
+    parsed = ai_result.get("parsed")
+    if parsed is not None:
+        session.ai_recommendations = ai_result.get("commands", [])
+    commands = ai_result.get("commands", [])
+    show_ai_command_table(commands)
+    return commands
+
+
+def build_host_pipeline(
+    session: Session, cfg: AppConfig, ai_client: AIClient, ai_cache: Optional[StrategyCache]
+) -> HostStrategyPipeline:
+    from rich.markup import escape
+
+    from mcp_kali_assistant.ai_engine.context import budget_from_config
+    from mcp_kali_assistant.ai_engine.pipeline import DEFAULT_PIPELINE_WORKERS, HostStrategyPipeline
+    from mcp_kali_assistant.io.summaries import build_ai_command_table
+
+    def show_commands(commands: List[dict], start: int, label: str) -> None:
+        console.print(build_ai_command_table(commands, start=start, caption=f"AI recommendations for {escape(label)}"))
+
+    return HostStrategyPipeline(
+        ai_client,
+        mode=session.mode,
+        hint=session.hint,
+        reachability=session.reachability,
+        cache=ai_cache,
+        context_budget_chars=budget_from_config(cfg.ai_config),
+        max_workers=int(cfg.ai_config.get("pipeline_workers", DEFAULT_PIPELINE_WORKERS)),
+        on_commands=show_commands,
+        spans=session.timings,
+    )
+
+
+def finish_host_pipeline(session: Session, host_pipeline: HostStrategyPipeline) -> List[dict]:
+    from mcp_kali_assistant.io.summaries import show_ai_command_table
+
+    console.print(f"[dim]Waiting for AI strategy requests ({host_pipeline.submitted} host(s) sent during the scan)...[/dim]")
+    with session.span("ai") as metrics:
+        ai_result = host_pipeline.finish(session.nmap_summary, session.target)
+        metrics["requests"] = host_pipeline.submitted
+    session.ai_raw_output = ai_result.get("raw")
+    if ai_result.get("parsed") is not None:
+        session.ai_recommendations = ai_result.get("commands", [])
+    commands = ai_result.get("commands", [])
+    show_ai_command_table(commands)
+    return commands
+
+
+def phase_enumeration(session: Session, cfg: AppConfig, commands: List[dict]) -> None:
+    from rich.prompt import Prompt
 
-    # Phase 4 – Enumeration & Findings
     console.rule("[bold cyan]Phase 4 – Enumeration & Findings[/bold cyan]")
-    if commands:
+    if not commands:
+        console.print("[bold yellow]No commands available to execute in this phase.[/bold yellow]")
+        return
+
+    if session.selected_indices:
+        # Resumed run: the selection was made before the interruption.
+        done = {c.index for c in session.executed_commands}
+        selected_indices = [i for i in session.selected_indices if i not in done]
+        console.print(
+            f"[bold cyan]Resuming: {len(selected_indices)} of {len(session.selected_indices)} "
+            f"selected command(s) still to run.[/bold cyan]"
+        )
+    else:
         selection = Prompt.ask(
             "Which commands to run? [all / comma-separated indices / empty to skip]",
             default="",
         )
         selected_indices = parse_command_selection(len(commands), selection)
-        execute_commands(session, commands, selected_indices, cfg)
-    else:
-        console.print("[bold yellow]No commands available to execute in this phase.[/bold yellow]")
+        session.selected_indices = list(selected_indices)
+        session.checkpoint(cfg.sessions_dir, "commands_selected", indices=selected_indices)
+    execute_commands(session, commands, selected_indices, cfg)
 
-    session_path = session.save(cfg.sessions_dir)
+
+def run_pipeline(
+    session: Session,
+    cfg: AppConfig,
+    completed: Set[str],
+    no_ai_cache: bool = False,
+    stream: Optional[bool] = None,
+    reuse_scan_mode: Optional[str] = None,
+    pipeline: Optional[bool] = None,
+) -> None:
+    """
+    Run the analysis phases, skipping those already in ``completed``.
+
+    The session is checkpointed (atomic session manifest + journal entry) after every phase
+    and every executed command, so an interrupted run can be picked up with `resume`.
+    With ``pipeline`` (default ``ai.pipeline``) Phases 2 and 3 overlap per host.
+    """
+    from mcp_kali_assistant.ai_engine.pipeline import HostStrategyPipeline
+    from mcp_kali_assistant.core.journal import PHASE_AI_STRATEGY, PHASE_ENUMERATION, PHASE_NMAP, PHASE_REACHABILITY
+    from mcp_kali_assistant.io.summaries import show_ai_command_table
+
+    root = cfg.sessions_dir
+
+    def done(phase: str) -> None:
+        completed.add(phase)
+        session.checkpoint(root, "phase_completed", phase=phase)
+
+    def skip(title: str) -> None:
+        console.rule(f"[bold cyan]{title}[/bold cyan] [dim](already completed, skipped)[/dim]")
+
+    try:
+        # Phase 1 – Reachability
+        if PHASE_REACHABILITY in completed:
+            skip("Phase 1 – Reachability")
+        else:
+            phase_reachability(session, cfg)
+            done(PHASE_REACHABILITY)
+
+        # Phase 3 can overlap Phase 2: each host nmap finishes is sent to the model right away.
+        if pipeline is None:
+            pipeline = bool(cfg.ai_config.get("pipeline", False))
+        ai_client = None
+        ai_cache = None if no_ai_cache else build_ai_cache(cfg)
+        host_pipeline: Optional[HostStrategyPipeline] = None
+        if pipeline and PHASE_NMAP not in completed and PHASE_AI_STRATEGY not in completed:
+            ai_client = build_ai_client(cfg)
+            if ai_client is not None:
+                host_pipeline = build_host_pipeline(session, cfg, ai_client, ai_cache)
+
+        try:
+            # Phase 2 – Nmap
+            if PHASE_NMAP in completed:
+                skip("Phase 2 – Service Discovery (Nmap)")
+            else:
+                phase_nmap(
+                    session,
+                    cfg,
+                    reuse=reuse_scan_mode,
+                    on_host=host_pipeline.submit if host_pipeline is not None else None,
+                )
+                done(PHASE_NMAP)
+
+            # Phase 3 – AI Strategy
+            commands: List[dict] = []
+            if PHASE_AI_STRATEGY in completed:
+                skip("Phase 3 – AI Strategy")
+                commands = list(session.ai_recommendations)
+                show_ai_command_table(commands)
+            elif host_pipeline is not None:
+                console.rule("[bold cyan]Phase 3 – AI Strategy (pipelined per host)[/bold cyan]")
+                commands = finish_host_pipeline(session, host_pipeline)
+                done(PHASE_AI_STRATEGY)
+            else:
+                console.rule("[bold cyan]Phase 3 – AI Strategy[/bold cyan]")
+                ai_client = ai_client or build_ai_client(cfg)
+                if stream is None:
+                    stream = bool(cfg.ai_config.get("stream", False))
+                if ai_client is None:
+                    console.print("[bold yellow]AI client not configured. Skipping AI strategy phase.[/bold yellow]")
+                    done(PHASE_AI_STRATEGY)
+                elif stream:
+                    # Streaming runs Phase 4 alongside generation and records Phase 3 itself.
+                    run_streaming_strategy(session, ai_client, cfg, ai_cache)
+                    completed.add(PHASE_AI_STRATEGY)
+                    done(PHASE_ENUMERATION)
+                else:
+                    commands = phase_ai_strategy(session, cfg, ai_client, ai_cache)
+                    done(PHASE_AI_STRATEGY)
+        finally:
+            if host_pipeline is not None:
+                host_pipeline.close()
+
+        # Phase 4 – Enumeration & Findings
+        if PHASE_ENUMERATION not in completed:
+            phase_enumeration(session, cfg, commands)
+            done(PHASE_ENUMERATION)
+    except KeyboardInterrupt:
+        session.save(root)
+        console.print(
+            f"\n[bold yellow]Interrupted. Progress is saved; continue with:[/bold yellow] "
+            f"python mcp_cli.py resume --session-id {session.session_id}"
+        )
+        raise typer.Exit(code=130)
+
+    session_path = session.save(root)
     console.print(f"[bold green]Session saved:[/bold green] {session_path}")
 
-    report_path = generate_markdown_report(session, cfg.reports_dir)
-    console.print(f"[bold green]Markdown report generated:[/bold green] {report_path}")
+    report_path = generate_report(session, cfg)
+    console.print(f"[bold green]Report generated:[/bold green] {report_path}")
+
+
+@app.command()
+def auto_analyse(
+    no_ai_cache: bool = typer.Option(False, "--no-ai-cache", help="Always query the AI model, bypassing the strategy cache."),
+    stream: Optional[bool] = typer.Option(
+        None, "--stream/--no-stream", help="Stream AI recommendations as they are generated (default: ai.stream)."
+    ),
+    reuse_scan_mode: Optional[str] = typer.Option(
+        None,
+        "--reuse-scan",
+        help="Reuse a recent compatible Nmap scan of the target: off, reuse (as is) or diff (re-probe states only). Default: nmap.reuse.",
+    ),
+    pipeline: Optional[bool] = typer.Option(
+        None,
+        "--pipeline/--no-pipeline",
+        help="Ask the AI about each host as soon as nmap finishes it, overlapping Phases 2 and 3 (default: ai.pipeline).",
+    ),
+    verbosity: Optional[str] = typer.Option(
+        None,
+        "--verbosity",
+        help="Tool output: quiet (errors only), summary (progress and previews) or raw (every output line). Default: output.verbosity.",
+    ),
+) -> None:
+    """Run the full auto-analysis pipeline."""
+    from mcp_kali_assistant.core.session import Session
+    from mcp_kali_assistant.io.prompts import confirm_disclaimer, prompt_target_and_context, show_banner
+
+    cfg = load_config()
+    check_reuse_mode(reuse_scan_mode)
+    setup_output(cfg, verbosity)
+    cfg.ensure_dirs()
+    show_banner()
+
+    if not confirm_disclaimer():
+        console.print("[bold yellow]Disclaimer not accepted. Exiting.[/bold yellow]")
+        raise typer.Exit(code=1)
+
+    target, hint, mode = prompt_target_and_context()
+    session = Session(target=target, mode=mode, hint=hint)
+    session.checkpoint(cfg.sessions_dir, "session_started")
+
+    run_pipeline(session, cfg, set(), no_ai_cache=no_ai_cache, stream=stream, reuse_scan_mode=reuse_scan_mode, pipeline=pipeline)
+
+
+@app.command()
+def resume(
+    session_id: str = typer.Option(..., "--session-id", "-s", help="Session ID to resume"),
+    no_ai_cache: bool = typer.Option(False, "--no-ai-cache", help="Always query the AI model, bypassing the strategy cache."),
+    stream: Optional[bool] = typer.Option(
+        None, "--stream/--no-stream", help="Stream AI recommendations as they are generated (default: ai.stream)."
+    ),
+    reuse_scan_mode: Optional[str] = typer.Option(
+        None,
+        "--reuse-scan",
+        help="Reuse a recent compatible Nmap scan of the target: off, reuse (as is) or diff (re-probe states only). Default: nmap.reuse.",
+    ),
+    pipeline: Optional[bool] = typer.Option(
+        None,
+        "--pipeline/--no-pipeline",
+        help="Ask the AI about each host as soon as nmap finishes it, overlapping Phases 2 and 3 (default: ai.pipeline).",
+    ),
+    verbosity: Optional[str] = typer.Option(
+        None,
+        "--verbosity",
+        help="Tool output: quiet (errors only), summary (progress and previews) or raw (every output line). Default: output.verbosity.",
+    ),
+) -> None:
+    """Resume an interrupted auto-analysis run, skipping phases that already completed."""
+    from rich.markup import escape
+    from rich.panel import Panel
+
+    from mcp_kali_assistant.core.journal import PHASES, SessionJournal
+    from mcp_kali_assistant.core.session import Session
+    from mcp_kali_assistant.io.prompts import confirm_disclaimer
+
+    cfg = load_config()
+    check_reuse_mode(reuse_scan_mode)
+    setup_output(cfg, verbosity)
+    try:
+        session = Session.load(cfg.sessions_dir, session_id)
+    except FileNotFoundError as e:
+        console.print(f"[bold red]{e}[/bold red]")
+        raise typer.Exit(code=1)
+
+    completed = SessionJournal(cfg.sessions_dir / session_id).completed_phases()
+    remaining = [p for p in PHASES if p not in completed]
+    console.print(
+        Panel(
+            f"[bold]Target:[/bold] {escape(session.target)}\n"
+            f"[bold]Mode:[/bold] {session.mode}\n"
+            f"[bold]Completed phases:[/bold] {', '.join(p for p in PHASES if p in completed) or 'none'}\n"
+            f"[bold]Remaining phases:[/bold] {', '.join(remaining) or 'none'}",
+            title=f"Resuming session {session_id}",
+            border_style="cyan",
+        )
+    )
+    if remaining and not confirm_disclaimer():
+        console.print("[bold yellow]Disclaimer not accepted. Exiting.[/bold yellow]")
+        raise typer.Exit(code=1)
+
+    run_pipeline(session, cfg, completed, no_ai_cache=no_ai_cache, stream=stream, reuse_scan_mode=reuse_scan_mode, pipeline=pipeline)
+
+
+def run_batch_target(
+    item: BatchTarget,
+    cfg: AppConfig,
+    scheduler: BatchScheduler,
+    policy: SelectionPolicy,
+    ai_client: Optional[AIClient],
+    ai_cache: Optional[StrategyCache],
+    reuse_scan_mode: Optional[str] = None,
+    fmt: Optional[str] = None,
+) -> BatchOutcome:
+    """
+    Run all phases for one batch target without prompting.
+
+    The session is checkpointed like an interactive run, so a failed or interrupted
+    target can be picked up with `resume`.
+    """
+    from rich.markup import escape
+
+    from mcp_kali_assistant.core.batch import BatchOutcome
+    from mcp_kali_assistant.core.journal import PHASE_AI_STRATEGY, PHASE_ENUMERATION, PHASE_NMAP, PHASE_REACHABILITY
+    from mcp_kali_assistant.core.session import Session
+
+    root = cfg.sessions_dir
+    session = Session(target=item.target, mode=item.mode, hint=item.hint)
+    session.checkpoint(root, "session_started", batch=True)
+    outcome = BatchOutcome(item, session_id=session.session_id)
+    label = escape(item.target)
+    console.print(f"[bold cyan]\\[{label}][/bold cyan] Session {session.session_id} started ({item.mode}).")
+
+    def done(phase: str) -> None:
+        # A phase running when the batch was stopped may have been cut short: it is not
+        # recorded as completed, so `resume` runs it again.
+        scheduler.check_stopping()
+        session.checkpoint(root, "phase_completed", phase=phase)
+        scheduler.check_stopping()
+
+    phase_reachability(session, cfg)
+    done(PHASE_REACHABILITY)
+
+    with scheduler.scan_slots:
+        phase_nmap(session, cfg, reuse=reuse_scan_mode, live_progress=False)
+    done(PHASE_NMAP)
+
+    commands: List[dict] = []
+    if ai_client is not None:
+        console.rule(f"[bold cyan]Phase 3 – AI Strategy[/bold cyan] [dim]({label})[/dim]")
+        with scheduler.ai_slots:
+            commands = phase_ai_strategy(session, cfg, ai_client, ai_cache)
+    done(PHASE_AI_STRATEGY)
+
+    selected = policy.select(commands)
+    session.selected_indices = list(selected)
+    session.checkpoint(root, "commands_selected", indices=selected, policy=policy.describe())
+    scheduler.check_stopping()
+    if selected:
+        console.rule(f"[bold cyan]Phase 4 – Enumeration & Findings[/bold cyan] [dim]({label})[/dim]")
+        outcome.executed = execute_commands(
+            session, commands, selected, cfg, slots=scheduler.command_slots, interactive=False, running=scheduler.running
+        )
+    done(PHASE_ENUMERATION)
+
+    session.save(root)
+    outcome.report_path = generate_report(session, cfg, fmt)
+    console.print(f"[bold green]\\[{label}][/bold green] Done; report: {outcome.report_path}")
+    return outcome
+
+
+def show_batch_summary(outcomes: List[BatchOutcome], elapsed: float, reports_dir: Path) -> None:
+    from rich.markup import escape
+    from rich.table import Table
+
+    from mcp_kali_assistant.core.batch import BATCH_FAILED
+
+    table = Table(title=f"Batch summary ({elapsed:.1f}s)")
+    table.add_column("Target")
+    table.add_column("Mode")
+    table.add_column("Session ID", no_wrap=True)
+    table.add_column("Executed", justify="right")
+    table.add_column("Time", justify="right")
+    table.add_column("Result")
+    for o in outcomes:
+        if o.status == BATCH_FAILED:
+            result = f"[bold red]failed:[/bold red] {escape(o.error)}"
+        else:
+            result = "[green]report written[/green]"
+        table.add_row(
+            escape(o.item.target), o.item.mode, o.session_id or "-", str(o.executed), f"{o.elapsed_seconds:.1f}s", result
+        )
+    console.print(table)
+    console.print(f"Reports directory: {reports_dir}")
+    if any(o.status == BATCH_FAILED and o.session_id for o in outcomes):
+        console.print("Continue a failed target with: python mcp_cli.py resume --session-id <id>")
 
 
 @app.command()
-def report(session_id: Optional[str] = typer.Option(None, "--session-id", "-s", help="Session ID to report on")) -> None:
+def batch(
+    targets_file: Path = typer.Argument(
+        ..., exists=True, dir_okay=False, help="Targets file: `target [mode] [hint...]` per line, or a YAML list."
+    ),
+    i_am_authorized: bool = typer.Option(
+        False, "--i-am-authorized", help="Confirm you own or are explicitly authorized to test every target in the file."
+    ),
+    mode: Optional[str] = typer.Option(None, "--mode", help="Scan mode for entries without one. Default: batch.mode, else balanced."),
+    top_n: Optional[int] = typer.Option(
+        None, "--top-n", help="Run the N highest-priority AI-recommended commands per target. Default: batch.top_n."
+    ),
+    categories: Optional[List[str]] = typer.Option(
+        None, "--category", help="Only run commands in this category (repeatable or comma-separated). Default: batch.categories."
+    ),
+    max_targets: Optional[int] = typer.Option(None, "--max-targets", help="Targets processed at once. Default: batch.max_targets."),
+    max_scans: Optional[int] = typer.Option(None, "--max-scans", help="Nmap scans running at once. Default: batch.max_scans."),
+    max_ai_calls: Optional[int] = typer.Option(None, "--max-ai-calls", help="AI requests at once. Default: batch.max_ai_calls."),
+    max_commands: Optional[int] = typer.Option(
+        None, "--max-commands", help="Enumeration commands running at once across all targets. Default: batch.max_commands."
+    ),
+    no_ai_cache: bool = typer.Option(False, "--no-ai-cache", help="Always query the AI model, bypassing the strategy cache."),
+    reuse_scan_mode: Optional[str] = typer.Option(
+        None,
+        "--reuse-scan",
+        help="Reuse a recent compatible Nmap scan of the target: off, reuse (as is) or diff (re-probe states only). Default: nmap.reuse.",
+    ),
+    fmt: Optional[str] = typer.Option(
+        None, "--format", "-f", help="Report format: markdown, json or html. Default: reports.format."
+    ),
+    verbosity: Optional[str] = typer.Option(
+        None,
+        "--verbosity",
+        help="Tool output: quiet (errors only), summary (progress and previews) or raw (every output line). Default: output.verbosity.",
+    ),
+) -> None:
+    """Run the auto-analysis pipeline unattended over a file of authorized targets."""
+    from rich.markup import escape
+    from rich.panel import Panel
+
+    from mcp_kali_assistant.core.batch import (
+        BATCH_FAILED,
+        DEFAULT_BATCH_MODE,
+        DEFAULT_MAX_AI_CALLS,
+        DEFAULT_MAX_COMMANDS,
+        DEFAULT_MAX_SCANS,
+        DEFAULT_MAX_TARGETS,
+        BatchScheduler,
+        SelectionPolicy,
+        load_targets_file,
+    )
+    from mcp_kali_assistant.core.modes import SCAN_PROFILES
+
+    cfg = load_config()
+    check_reuse_mode(reuse_scan_mode)
+    report_options(cfg, fmt)
+    setup_output(cfg, verbosity)
+    batch_cfg = cfg.batch_config
+
+    if not i_am_authorized:
+        console.print(
+            "[bold red]Batch mode runs without prompts, so the authorization disclaimer must be accepted up front.[/bold red]\n"
+            "Re-run with --i-am-authorized only if you own or are explicitly authorized to test every listed target."
+        )
+        raise typer.Exit(code=1)
+    cfg.ensure_dirs()
+
+    default_mode = mode or str(batch_cfg.get("mode", DEFAULT_BATCH_MODE))
+    if default_mode not in SCAN_PROFILES:
+        console.print(f"[bold red]Invalid mode: {default_mode} (expected one of {', '.join(SCAN_PROFILES)})[/bold red]")
+        raise typer.Exit(code=2)
+    try:
+        targets = load_targets_file(targets_file, default_mode=default_mode)
+    except (OSError, ValueError) as e:
+        console.print(f"[bold red]{escape(str(e))}[/bold red]")
+        raise typer.Exit(code=1)
+    if not targets:
+        console.print("[bold yellow]No targets in the targets file.[/bold yellow]")
+        raise typer.Exit(code=1)
+
+    if top_n is None and batch_cfg.get("top_n") is not None:
+        top_n = int(batch_cfg["top_n"])
+    category_values = categories or batch_cfg.get("categories") or []
+    if isinstance(category_values, str):
+        category_values = [category_values]
+    allowed = {c.strip() for value in category_values for c in str(value).split(",") if c.strip()}
+    policy = SelectionPolicy(top_n=top_n, categories=allowed or None)
+
+    scheduler = BatchScheduler(
+        max_targets=max_targets or int(batch_cfg.get("max_targets", DEFAULT_MAX_TARGETS)),
+        max_scans=max_scans or int(batch_cfg.get("max_scans", DEFAULT_MAX_SCANS)),
+        max_ai_calls=max_ai_calls or int(batch_cfg.get("max_ai_calls", DEFAULT_MAX_AI_CALLS)),
+        max_commands=max_commands or int(batch_cfg.get("max_commands", DEFAULT_MAX_COMMANDS)),
+    )
+    console.print(
+        Panel(
+            f"[bold]Targets:[/bold] {len(targets)} from {escape(str(targets_file))}\n"
+            f"[bold]Command selection:[/bold] {escape(policy.describe())}\n"
+            f"[bold]Limits:[/bold] {scheduler.max_targets} target(s), {scheduler.max_scans} scan(s), "
+            f"{scheduler.max_ai_calls} AI call(s), {scheduler.max_commands} command(s) at once\n"
+            "[dim]Authorization accepted via --i-am-authorized.[/dim]",
+            title="Batch run",
+            border_style="cyan",
+        )
+    )
+
+    ai_client = build_ai_client(cfg)
+    ai_cache = None if no_ai_cache else build_ai_cache(cfg)
+    started = time.monotonic()
+    try:
+        outcomes = scheduler.run(
+            targets,
+            lambda item: run_batch_target(item, cfg, scheduler, policy, ai_client, ai_cache, reuse_scan_mode, fmt),
+        )
+    except KeyboardInterrupt:
+        console.print(
+            "\n[bold yellow]Interrupted. Each started target's progress is saved; "
+            "continue one with:[/bold yellow] python mcp_cli.py resume --session-id <id>"
+        )
+        raise typer.Exit(code=130)
+
+    show_batch_summary(outcomes, time.monotonic() - started, cfg.reports_dir)
+    if any(o.status == BATCH_FAILED for o in outcomes):
+        raise typer.Exit(code=1)
+
+
+def show_session_list(cfg: AppConfig, target: Optional[str], mode: Optional[str], sort: str, limit: Optional[int]) -> None:
+    from rich.markup import escape
+    from rich.table import Table
+
+    from mcp_kali_assistant.core.session_index import SessionIndex
+
+    index = SessionIndex.for_root(cfg.sessions_dir)
+    try:
+        records = index.query(target=target, mode=mode, sort=sort, descending=sort in ("date", "updated", "ports"), limit=limit)
+    except ValueError as e:
+        console.print(f"[bold red]{e}[/bold red]")
+        raise typer.Exit(code=1)
+
+    if not records:
+        console.print("[bold yellow]No indexed sessions match.[/bold yellow] Run `reindex` if sessions were created before the index existed.")
+        return
+
+    table = Table(title="Sessions", show_lines=False)
+    table.add_column("Session ID")
+    table.add_column("Created (UTC)")
+    table.add_column("Target")
+    table.add_column("Mode")
+    table.add_column("Hosts", justify="right")
+    table.add_column("Open ports", justify="right")
+    table.add_column("AI cmds", justify="right")
+    table.add_column("Executed", justify="right")
+    for r in records:
+        table.add_row(
+            r.session_id,
+            r.created_at,
+            escape(r.target),
+            r.mode,
+            str(r.host_count),
+            str(r.open_port_count),
+            str(r.recommendation_count),
+            str(r.executed_count),
+        )
+    console.print(table)
+    console.print("Use --session-id to select one of the above.")
+
+
+def regenerate_all_reports(cfg: AppConfig, fmt: Optional[str], force: bool, workers: Optional[int]) -> None:
+    from rich.markup import escape
+    from rich.panel import Panel
+
+    from mcp_kali_assistant.reports.bulk import FAILED, REBUILT, SKIPPED, ReportOutcome, regenerate_reports
+
+    fmt, log_excerpt_bytes = report_options(cfg, fmt)
+    workers = workers or cfg.report_config.get("workers")
+
+    def show_outcome(outcome: ReportOutcome) -> None:
+        if outcome.status == FAILED:
+            console.print(f"[bold red]{outcome.session_id}: report failed: {escape(outcome.error)}[/bold red]")
+
+    result = regenerate_reports(
+        cfg.sessions_dir,
+        cfg.reports_dir,
+        fmt=fmt,
+        log_excerpt_bytes=log_excerpt_bytes,
+        force=force,
+        max_workers=int(workers) if workers else None,
+        on_outcome=show_outcome,
+    )
+    failed = result.count(FAILED)
+    console.print(
+        Panel(
+            f"[bold]{result.count(REBUILT)}[/bold] rebuilt, [bold]{result.count(SKIPPED)}[/bold] skipped (up to date)"
+            + (f", [bold red]{failed}[/bold red] failed" if failed else "")
+            + f" in {result.elapsed_seconds:.2f}s\nReports directory: {cfg.reports_dir}",
+            title=f"Reports ({fmt})",
+            border_style="red" if failed else "green",
+        )
+    )
+    if failed:
+        raise typer.Exit(code=1)
+
+
+@app.command()
+def report(
+    session_id: Optional[str] = typer.Option(None, "--session-id", "-s", help="Session ID to report on"),
+    list_sessions: bool = typer.Option(False, "--list", "-l", help="List indexed sessions instead of generating a report."),
+    target: Optional[str] = typer.Option(None, "--target", help="With --list: only sessions whose target contains this text."),
+    mode: Optional[str] = typer.Option(None, "--mode", help="With --list: only sessions with this scan mode."),
+    sort: str = typer.Option("date", "--sort", help="With --list: sort by date, updated, target, mode or ports."),
+    limit: Optional[int] = typer.Option(None, "--limit", help="With --list: show at most this many sessions."),
+    fmt: Optional[str] = typer.Option(
+        None, "--format", "-f", help="Report format: markdown, json or html. Default: reports.format."
+    ),
+    all_sessions: bool = typer.Option(
+        False, "--all", help="Regenerate the reports of all sessions, skipping those whose report is up to date."
+    ),
+    force: bool = typer.Option(False, "--force", help="With --all: rebuild every report, even up-to-date ones."),
+    workers: Optional[int] = typer.Option(
+        None, "--workers", help="With --all: worker processes. Default: reports.workers, else the CPU count."
+    ),
+) -> None:
     """Generate or display a report for a previous session."""
+    from rich.panel import Panel
+
+    from mcp_kali_assistant.core.session import Session
+
     cfg = load_config()
 
-    if not session_id:
+    if all_sessions:
+        regenerate_all_reports(cfg, fmt, force, workers)
+        raise typer.Exit()
+
+    if list_sessions or not session_id:
         if not cfg.sessions_dir.exists():
             console.print("[bold red]No sessions directory found.[/bold red]")
             raise typer.Exit(code=1)
-        console.print("[bold]Existing sessions:[/bold]")
-        for item in sorted(cfg.sessions_dir.iterdir()):
-            if item.is_dir() and (item / "session.json").exists():
-                console.print(f"- {item.name}")
-        console.print("Use --session-id to select one of the above.")
+        show_session_list(cfg, target, mode, sort, limit)
         raise typer.Exit()
 
     try:
@@ -274,9 +1203,97 @@ def report(session_id: Optional[str] = typer.Option(None, "--session-id", "-s",
         console.print(f"[bold red]{e}[/bold red]")
         raise typer.Exit(code=1)
 
-    report_path = generate_markdown_report(session, cfg.reports_dir)
+    report_path = generate_report(session, cfg, fmt)
     console.print(Panel(f"Report generated at: [bold]{report_path}[/bold]", title="Report", border_style="green"))
 
 
+@app.command()
+def reindex() -> None:
+    """Rebuild the session index from the session directories on disk."""
+    from mcp_kali_assistant.core.session_index import SessionIndex
+
+    cfg = load_config()
+    cfg.ensure_dirs()
+    started = time.monotonic()
+    count = SessionIndex.for_root(cfg.sessions_dir).rebuild(cfg.sessions_dir)
+    console.print(f"[bold green]Indexed {count} session(s) in {time.monotonic() - started:.2f}s.[/bold green]")
+
+
+@app.command()
+def migrate(
+    codec: Optional[str] = typer.Option(
+        None, "--codec", help="Part compression: gzip, zstd or none. Default: general.session_codec."
+    ),
+    recompress: bool = typer.Option(
+        False, "--recompress", help="Also rewrite container sessions whose parts use a different codec."
+    ),
+    dry_run: bool = typer.Option(False, "--dry-run", help="Only list the sessions that would be converted."),
+) -> None:
+    """Convert legacy session.json directories to the compressed session container."""
+    from rich.table import Table
+
+    from mcp_kali_assistant.core import session_store
+    from mcp_kali_assistant.core.session import Session
+
+    cfg = load_config()
+    try:
+        codec = session_store.check_codec(codec or cfg.session_codec)
+    except ValueError as e:
+        console.print(f"[bold red]{e}[/bold red]")
+        raise typer.Exit(code=2)
+    if not cfg.sessions_dir.exists():
+        console.print("[bold red]No sessions directory found.[/bold red]")
+        raise typer.Exit(code=1)
+
+    table = Table(title=f"Session migration ({codec})")
+    table.add_column("Session")
+    table.add_column("From")
+    table.add_column("Before", justify="right")
+    table.add_column("After", justify="right")
+    converted = failed = 0
+    before_total = after_total = 0
+    for item in sorted(p for p in cfg.sessions_dir.iterdir() if p.is_dir()):
+        if session_store.session_file(item) is None:
+            continue
+        legacy = session_store.is_legacy(item)
+        if not legacy:
+            if not recompress:
+                continue
+            manifest = session_store.read_manifest(item) or {}
+            if all(entry.get("codec", codec) == codec for entry in manifest.get("parts", {}).values()):
+                continue
+        before = session_store.directory_bytes(item)
+        if dry_run:
+            table.add_row(item.name, "session.json" if legacy else "container", f"{before:,}", "-")
+            converted += 1
+            continue
+        try:
+            session = Session.load(cfg.sessions_dir, item.name)
+            session.load_parts()
+            session.save(cfg.sessions_dir, codec=codec)
+        except (OSError, ValueError, TypeError) as e:
+            console.print(f"[bold red]{item.name}: {e}[/bold red]")
+            failed += 1
+            continue
+        after = session_store.directory_bytes(item)
+        before_total, after_total = before_total + before, after_total + after
+        table.add_row(item.name, "session.json" if legacy else "container", f"{before:,}", f"{after:,}")
+        converted += 1
+
+    if not converted and not failed:
+        console.print("[bold green]Nothing to migrate.[/bold green]")
+        return
+    if converted:
+        console.print(table)
+    if dry_run:
+        console.print(f"[bold]{converted} session(s) would be converted.[/bold]")
+    else:
+        console.print(
+            f"[bold green]Converted {converted} session(s): {before_total:,} -> {after_total:,} bytes.[/bold green]"
+        )
+    if failed:
+        raise typer.Exit(code=1)
+
+
 if __name__ == "__main__":
     app()
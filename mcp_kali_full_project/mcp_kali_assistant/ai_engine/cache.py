@@ -0,0 +1,122 @@
+"""On-disk cache for AI strategy results."""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+
+
+class StrategyCache:
+    """
+    Content-addressed cache of AI strategy results.
+
+    Entries are keyed by a hash of the canonicalised context JSON plus the model name
+    and stored as one JSON file each. File mtimes double as last-access times: hits
+    refresh them, and eviction removes expired entries first and then the least recently
+    used ones until the cache fits in ``max_bytes``.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def make_key(context_json: str, model_name: str) -> str:
+        canonical = json.dumps(json.loads(context_json), sort_keys=True, separators=(",", ":"))
+        digest = hashlib.sha256()
+        digest.update(model_name.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(canonical.encode("utf-8"))
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - created_at > self.ttl_seconds
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        try:
+            with path.open("r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        now = time.time()
+        if self._expired(float(entry.get("created_at", 0)), now):
+            path.unlink(missing_ok=True)
+            return None
+
+        try:
+            os.utime(path, (now, now))
+        except OSError:
+            pass
+        return entry.get("result")
+
+    def put(self, key: str, model_name: str, result: Dict[str, Any]) -> bool:
+        """
+        Store ``result`` under ``key``; returns False if it could not be written.
+
+        Like :meth:`get` this is best-effort: the caller already has the result. Each
+        writer uses its own temp file, so concurrent puts of one key cannot collide.
+        """
+        entry = {"created_at": time.time(), "model": model_name, "result": result}
+        tmp: Optional[str] = None
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.cache_dir, prefix=f"{key[:16]}.", suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp, self._path(key))
+            tmp = None
+            self.evict()
+        except (OSError, TypeError, ValueError):
+            return False
+        finally:
+            if tmp is not None:
+                Path(tmp).unlink(missing_ok=True)
+        return True
+
+    def evict(self) -> int:
+        """Drop expired entries, then LRU entries beyond ``max_bytes``. Returns the number removed."""
+        if not self.cache_dir.exists():
+            return 0
+
+        now = time.time()
+        entries: List[Tuple[float, int, Path]] = []
+        removed = 0
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            # mtime is refreshed on every hit; an entry untouched for longer than the TTL is expired too.
+            if self._expired(st.st_mtime, now):
+                path.unlink(missing_ok=True)
+                removed += 1
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        if self.max_bytes > 0 and total > self.max_bytes:
+            for _, size, path in sorted(entries):
+                path.unlink(missing_ok=True)
+                removed += 1
+                total -= size
+                if total <= self.max_bytes:
+                    break
+        return removed
@@ -1,12 +1,43 @@
+"""AI engine integration (client and strategy)."""
 from __future__ import annotations
 
 import json
-from typing import Any, Dict, Optional
+import random
+import time
+from typing import Any, Dict, Iterator, Optional
 
 import requests
-from rich.console import Console
+from requests.adapters import HTTPAdapter
 
-console = Console()
+from mcp_kali_assistant.io.console import LazyConsole
+
+console = LazyConsole()
+
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_BASE_SECONDS = 1.0
+DEFAULT_BACKOFF_MAX_SECONDS = 30.0
+DEFAULT_POOL_SIZE = 4
+
+# Ollama reports these with its final response object (durations in nanoseconds).
+_OLLAMA_DURATIONS = {
+    "load_duration": "load_s",
+    "prompt_eval_duration": "prompt_eval_s",
+    "eval_duration": "eval_s",
+    "total_duration": "total_s",
+}
+_OLLAMA_COUNTS = {"prompt_eval_count": "prompt_tokens", "eval_count": "eval_tokens"}
+
+
+def response_stats(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Latency breakdown and token counts from an Ollama response object (what it provides)."""
+    stats: Dict[str, Any] = {}
+    for key, name in _OLLAMA_DURATIONS.items():
+        if isinstance(data.get(key), (int, float)):
+            stats[name] = round(data[key] / 1e9, 3)
+    for key, name in _OLLAMA_COUNTS.items():
+        if isinstance(data.get(key), int):
+            stats[name] = data[key]
+    return stats
 
 
 class AIClient:
@@ -19,23 +50,92 @@ class AIClient:
         model_name: str,
         timeout_seconds: int = 60,
         api_key: str = "",
+        connect_timeout_seconds: Optional[float] = None,
+        read_timeout_seconds: Optional[float] = None,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_base_seconds: float = DEFAULT_BACKOFF_BASE_SECONDS,
+        backoff_max_seconds: float = DEFAULT_BACKOFF_MAX_SECONDS,
+        pool_size: int = DEFAULT_POOL_SIZE,
     ):
         self.base_url = base_url.rstrip("/")
         self.api_path = api_path
         self.model_name = model_name
         self.timeout = timeout_seconds
         self.api_key = api_key
+        self.connect_timeout = connect_timeout_seconds if connect_timeout_seconds is not None else min(10, timeout_seconds)
+        self.read_timeout = read_timeout_seconds if read_timeout_seconds is not None else timeout_seconds
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = backoff_base_seconds
+        self.backoff_max = backoff_max_seconds
+
+        # One pooled keep-alive session per client: repeated calls reuse the TCP connection.
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Content-Type": "application/json"})
+        if self.api_key:
+            self.session.headers["Authorization"] = f"Bearer {self.api_key}"
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self) -> "AIClient":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
 
     def _build_url(self) -> str:
         return f"{self.base_url}{self.api_path}"
 
-    def generate(self, prompt: str) -> Optional[str]:
-        """Call the AI model using an Ollama /api/generate-style endpoint."""
+    def _backoff_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.backoff_max)
+        # Exponential backoff with "equal jitter": half fixed, half random.
+        cap = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return cap / 2 + random.uniform(0, cap / 2)
 
+    def _post(self, payload: Dict[str, Any], stream: bool = False) -> Optional[requests.Response]:
+        """POST ``payload``, retrying connection errors and 5xx responses with backoff."""
         url = self._build_url()
-        headers: Dict[str, str] = {"Content-Type": "application/json"}
-        if self.api_key:
-            headers["Authorization"] = f"Bearer {self.api_key}"
+        body = json.dumps(payload)
+
+        for attempt in range(self.max_retries + 1):
+            last_try = attempt == self.max_retries
+            try:
+                resp = self.session.post(
+                    url, data=body, timeout=(self.connect_timeout, self.read_timeout), stream=stream
+                )
+            except requests.ConnectionError as e:
+                if last_try:
+                    console.print(f"[bold red]Error contacting AI endpoint: {e}[/bold red]")
+                    return None
+                delay = self._backoff_delay(attempt)
+                console.print(f"[yellow]AI endpoint unreachable ({e.__class__.__name__}); retrying in {delay:.1f}s...[/yellow]")
+                time.sleep(delay)
+                continue
+            except requests.RequestException as e:
+                console.print(f"[bold red]Error contacting AI endpoint: {e}[/bold red]")
+                return None
+
+            if resp.status_code >= 500 and not last_try:
+                # 503 is what Ollama returns while a model is still loading.
+                delay = self._backoff_delay(attempt, resp.headers.get("Retry-After"))
+                console.print(f"[yellow]AI endpoint returned HTTP {resp.status_code}; retrying in {delay:.1f}s...[/yellow]")
+                resp.close()
+                time.sleep(delay)
+                continue
+            return resp
+        return None
+
+    def generate(self, prompt: str, stats: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """
+        Call the AI model using an Ollama /api/generate-style endpoint.
+
+        If ``stats`` is given it is filled with the model-side latency breakdown the
+        endpoint reports (see :func:`response_stats`).
+        """
 
         payload: Dict[str, Any] = {
             "model": self.model_name,
@@ -43,10 +143,8 @@ class AIClient:
             "stream": False,
         }
 
-        try:
-            resp = requests.post(url, headers=headers, data=json.dumps(payload), timeout=self.timeout)
-        except requests.RequestException as e:
-            console.print(f"[bold red]Error contacting AI endpoint: {e}[/bold red]")
+        resp = self._post(payload)
+        if resp is None:
             return None
 
         if not resp.ok:
@@ -67,4 +165,49 @@ class AIClient:
             console.print(str(data)[:500])
             return None
 
+        if stats is not None:
+            stats.update(response_stats(data))
         return text
+
+    def generate_stream(self, prompt: str, stats: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        """
+        Stream the model's answer token chunk by token chunk.
+
+        Consumes Ollama's NDJSON stream (one ``{"response": ..., "done": ...}`` object per
+        line). Errors are reported and simply end the iteration. ``stats`` (if given) is
+        filled from the final ``done`` object like in :meth:`generate`.
+        """
+        payload: Dict[str, Any] = {
+            "model": self.model_name,
+            "prompt": prompt,
+            "stream": True,
+        }
+
+        resp = self._post(payload, stream=True)
+        if resp is None:
+            return
+
+        with resp:
+            if not resp.ok:
+                console.print(f"[bold red]AI endpoint returned HTTP {resp.status_code}[/bold red]")
+                console.print(resp.text[:500])
+                return
+
+            for line in resp.iter_lines():
+                if not line:
+                    continue
+                try:
+                    chunk = json.loads(line)
+                except ValueError:
+                    console.print(f"[bold red]Skipping malformed AI stream chunk:[/bold red] {line[:200]!r}")
+                    continue
+                if chunk.get("error"):
+                    console.print(f"[bold red]AI endpoint error: {chunk['error']}[/bold red]")
+                    return
+                text = chunk.get("response")
+                if isinstance(text, str) and text:
+                    yield text
+                if chunk.get("done") and stats is not None:
+                    stats.update(response_stats(chunk))
+                # Keep reading past the final "done" chunk so the stream is fully consumed
+                # and the keep-alive connection goes back to the pool.
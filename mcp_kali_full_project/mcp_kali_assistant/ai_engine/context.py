@@ -0,0 +1,204 @@
+"""Compaction of the scan context sent to the AI model."""
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+
+from mcp_kali_assistant.parsers.models import Host, NmapSummary, Port
+
+DEFAULT_CONTEXT_BUDGET_CHARS = 12000
+# Rough llama-style tokenizer ratio used to turn a token budget into characters.
+CHARS_PER_TOKEN = 4
+
+# How interesting a service is for enumeration; unknown services score 1.
+SERVICE_WEIGHTS: Dict[str, int] = {
+    "http": 5,
+    "https": 5,
+    "http-proxy": 5,
+    "http-alt": 5,
+    "ssl/http": 5,
+    "microsoft-ds": 5,
+    "netbios-ssn": 4,
+    "ftp": 5,
+    "ldap": 4,
+    "kerberos-sec": 4,
+    "ms-sql-s": 4,
+    "mysql": 4,
+    "postgresql": 4,
+    "redis": 4,
+    "mongodb": 4,
+    "nfs": 4,
+    "rpcbind": 3,
+    "ms-wbt-server": 3,
+    "smtp": 3,
+    "snmp": 3,
+    "ssh": 2,
+    "domain": 2,
+}
+
+
+@dataclass
+class CompactionStats:
+    hosts_total: int = 0
+    hosts_kept: int = 0
+    ports_total: int = 0
+    open_ports_total: int = 0
+    open_ports_kept: int = 0
+    chars: int = 0
+    budget_chars: int = 0
+
+    @property
+    def truncated(self) -> bool:
+        return self.open_ports_kept < self.open_ports_total
+
+    def describe(self) -> str:
+        text = (
+            f"{self.chars:,} chars (budget {self.budget_chars:,}); "
+            f"kept {self.open_ports_kept}/{self.open_ports_total} open ports on {self.hosts_kept}/{self.hosts_total} hosts, "
+            f"dropped {self.ports_total - self.open_ports_total} non-open ports"
+        )
+        if self.truncated:
+            text += " – truncated to the most interesting services"
+        return text
+
+
+def budget_from_config(ai_cfg: Dict[str, Any]) -> int:
+    """Character budget from ``ai.context_budget_chars`` or ``ai.context_budget_tokens``."""
+    if ai_cfg.get("context_budget_tokens"):
+        return int(ai_cfg["context_budget_tokens"]) * CHARS_PER_TOKEN
+    return int(ai_cfg.get("context_budget_chars", DEFAULT_CONTEXT_BUDGET_CHARS))
+
+
+def _dumps(obj: Any) -> str:
+    return json.dumps(obj, separators=(",", ":"))
+
+
+def _port_score(port: Port) -> int:
+    return SERVICE_WEIGHTS.get(port.service_name or "", 1) * 2 + (1 if port.product else 0)
+
+
+def _service_label(port: Port) -> str:
+    parts = [port.service_name or "unknown", port.product or "", port.version or ""]
+    label = " ".join(p for p in parts if p)
+    if port.extrainfo:
+        label += f" ({port.extrainfo})"
+    return label
+
+
+def _compact_reachability(reachability: Dict[str, Any]) -> Dict[str, Any]:
+    if not reachability:
+        return {}
+    compact: Dict[str, Any] = {
+        "icmp": bool(reachability.get("icmp_reachable")),
+        "tcp_open": [int(p) for p, ok in (reachability.get("tcp_checks") or {}).items() if ok],
+    }
+    per_host = reachability.get("hosts") or []
+    if per_host:
+        compact["responding_hosts"] = sum(
+            1 for h in per_host if h.get("icmp_reachable") or any((h.get("tcp_checks") or {}).values())
+        )
+        compact["probed_hosts"] = len(per_host)
+    return compact
+
+
+def _build(
+    base: Dict[str, Any],
+    ranked: List[Tuple[int, int, Host, Port]],
+    keep: int,
+    hosts_total: int,
+    open_total: int,
+    hosts_without_open: int,
+) -> Tuple[Dict[str, Any], int]:
+    """The context for the ``keep`` top-ranked ports, plus the number of hosts it lists."""
+    services: Dict[Tuple[str, str], List[str]] = {}
+    host_os: Dict[str, str] = {}
+    for _, _, host, port in ranked[:keep]:
+        addr = host.address or "?"
+        services.setdefault((f"{port.portid}/{port.protocol}", _service_label(port)), []).append(addr)
+        host_os[addr] = host.os_guess or "Unknown"
+
+    context = dict(base)
+    # Each service appears once, listing every host it runs on; hosts only add their OS guess.
+    context["services"] = [
+        {"port": port_label, "service": label, "hosts": hosts} for (port_label, label), hosts in services.items()
+    ]
+    os_known = {addr: os_guess for addr, os_guess in host_os.items() if os_guess != "Unknown"}
+    if os_known:
+        context["os"] = os_known
+    notes = []
+    if hosts_without_open:
+        notes.append(f"{hosts_without_open} host{'s' if hosts_without_open != 1 else ''} up with no open ports")
+    if keep < open_total:
+        notes.append(
+            f"{open_total - keep} less interesting open ports omitted"
+            f" ({hosts_total - hosts_without_open - len(host_os)} hosts not listed)"
+        )
+    if notes:
+        context["notes"] = notes
+    return context, len(host_os)
+
+
+def compact_context(
+    target: str,
+    mode: str,
+    hint: str,
+    reachability: Dict[str, Any],
+    nmap_summary: NmapSummary,
+    budget_chars: int = DEFAULT_CONTEXT_BUDGET_CHARS,
+) -> Tuple[Dict[str, Any], CompactionStats]:
+    """
+    Build a compact AI context that fits ``budget_chars``.
+
+    Only open ports are kept (without their ``reason``), each service is listed once
+    with all of its hosts, hosts without open ports are summed up in a note, and when
+    the result is still too large the least interesting ports (by service weight, then
+    by how interesting their host is) are dropped.
+    """
+    base = {
+        "target": target,
+        "mode": mode,
+        "hint": hint,
+        "reachability": _compact_reachability(reachability),
+    }
+
+    stats = CompactionStats(hosts_total=len(nmap_summary.hosts), budget_chars=budget_chars)
+    ranked: List[Tuple[int, int, Host, Port]] = []
+    hosts_without_open = 0
+    for host in nmap_summary.hosts:
+        stats.ports_total += len(host.ports)
+        open_ports = host.open_ports()
+        if not open_ports:
+            hosts_without_open += 1
+        host_score = sum(_port_score(p) for p in open_ports)
+        ranked.extend((_port_score(p), host_score, host, p) for p in open_ports)
+    ranked.sort(key=lambda item: (item[0], item[1]), reverse=True)
+    stats.open_ports_total = len(ranked)
+
+    def build(keep: int) -> Tuple[Dict[str, Any], int]:
+        return _build(base, ranked, keep, stats.hosts_total, stats.open_ports_total, hosts_without_open)
+
+    keep = len(ranked)
+    context, hosts_kept = build(keep)
+    size = len(_dumps(context))
+    if size > budget_chars and ranked:
+        # Largest number of top-ranked ports that still fits the budget.
+        lo, hi = 0, len(ranked)
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if len(_dumps(build(mid)[0])) <= budget_chars:
+                lo = mid
+            else:
+                hi = mid - 1
+        keep = lo
+        context, hosts_kept = build(keep)
+        size = len(_dumps(context))
+
+    stats.open_ports_kept = keep
+    stats.hosts_kept = hosts_kept
+    stats.chars = size
+    return context, stats
+
+
+def render_context(context: Dict[str, Any]) -> str:
+    return _dumps(context)
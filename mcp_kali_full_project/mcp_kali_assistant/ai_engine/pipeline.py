@@ -0,0 +1,134 @@
+"""Per-host AI strategy requests overlapped with a running scan."""
+from __future__ import annotations
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from mcp_kali_assistant.ai_engine.cache import StrategyCache
+from mcp_kali_assistant.ai_engine.client import AIClient
+from mcp_kali_assistant.ai_engine.context import DEFAULT_CONTEXT_BUDGET_CHARS
+from mcp_kali_assistant.ai_engine.strategy import call_ai_strategy
+from mcp_kali_assistant.core.timing import Span
+from mcp_kali_assistant.parsers.models import Host, NmapSummary
+
+DEFAULT_PIPELINE_WORKERS = 1
+
+
+def host_reachability(reachability: Dict[str, Any], address: str) -> Dict[str, Any]:
+    """The per-host entry of a multi-host reachability result, else the result itself."""
+    for entry in reachability.get("hosts") or []:
+        if entry.get("target") == address:
+            return entry
+    return reachability
+
+
+class HostStrategyPipeline:
+    """
+    Ask for an AI strategy per host while the scan is still running.
+
+    ``submit`` is called with each finished host (typically from nmap's XML watcher
+    thread) and queues a single-host ``call_ai_strategy`` request on a small worker
+    pool. ``on_commands(commands, start, label)`` fires as each answer arrives with the
+    commands not seen before and the 1-based index of the first one, so numbering stays
+    stable even though, with several workers, batches may be reported out of order.
+    ``finish`` waits for the outstanding requests and returns the combined result.
+    Each request's timings are appended to ``spans`` if given.
+    """
+
+    def __init__(
+        self,
+        client: AIClient,
+        mode: str,
+        hint: str,
+        reachability: Dict[str, Any],
+        cache: Optional[StrategyCache] = None,
+        context_budget_chars: int = DEFAULT_CONTEXT_BUDGET_CHARS,
+        max_workers: int = DEFAULT_PIPELINE_WORKERS,
+        on_commands: Optional[Callable[[List[Dict[str, Any]], int, str], None]] = None,
+        spans: Optional[List[Span]] = None,
+    ):
+        self.client = client
+        self.mode = mode
+        self.hint = hint
+        self.reachability = reachability
+        self.cache = cache
+        self.context_budget_chars = context_budget_chars
+        self.on_commands = on_commands
+        self.spans = spans
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="ai-pipeline")
+        self._lock = threading.Lock()
+        self._futures: List[Future] = []
+        self._submitted: Set[str] = set()
+        self._seen_commands: Set[str] = set()
+        self._commands: List[Dict[str, Any]] = []
+        self._raw_parts: List[str] = []
+        self._parsed: List[Any] = []
+
+    @property
+    def submitted(self) -> int:
+        return len(self._futures)
+
+    def _run(self, label: str, target: str, summary: NmapSummary, reachability: Dict[str, Any]) -> None:
+        result = call_ai_strategy(
+            self.client,
+            target=target,
+            mode=self.mode,
+            hint=self.hint,
+            reachability=reachability,
+            nmap_summary=summary,
+            cache=self.cache,
+            context_budget_chars=self.context_budget_chars,
+            spans=self.spans,
+        )
+        with self._lock:
+            if result.get("raw"):
+                self._raw_parts.append(f"# host: {label}\n{result['raw']}")
+            if result.get("parsed") is not None:
+                self._parsed.append(result["parsed"])
+            fresh = [c for c in result.get("commands", []) if c["command"] not in self._seen_commands]
+            self._seen_commands.update(c["command"] for c in fresh)
+            start = len(self._commands) + 1
+            self._commands.extend(fresh)
+        # Outside the lock: a slow callback (console output) must not hold up submit()
+        # from the scan's watcher thread or the other workers.
+        if fresh and self.on_commands is not None:
+            self.on_commands(fresh, start, label)
+
+    def submit(self, host: Host) -> bool:
+        """Queue a strategy request for ``host``; hosts without open ports or seen before are ignored."""
+        with self._lock:
+            if not host.address or host.address in self._submitted or not host.open_ports():
+                return False
+            self._submitted.add(host.address)
+            reachability = host_reachability(self.reachability, host.address)
+            self._futures.append(
+                self._pool.submit(self._run, host.address, host.address, NmapSummary([host]), reachability)
+            )
+        return True
+
+    def finish(self, summary: NmapSummary, target: str) -> Dict[str, Any]:
+        """
+        Submit any hosts of the final ``summary`` not reported during the scan, wait for
+        every request and return ``{"raw", "parsed", "commands"}`` like ``call_ai_strategy``.
+
+        If no host had open ports a single request covers the whole ``target``.
+        """
+        for host in summary.hosts:
+            self.submit(host)
+        if not self._futures:
+            self._futures.append(self._pool.submit(self._run, target, target, summary, self.reachability))
+        # Index, not a snapshot: a request may still submit another host while we wait.
+        waited = 0
+        while waited < len(self._futures):
+            self._futures[waited].result()
+            waited += 1
+        with self._lock:
+            return {
+                "raw": "\n\n".join(self._raw_parts) or None,
+                "parsed": {"hosts": self._parsed} if self._parsed else None,
+                "commands": list(self._commands),
+            }
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -1,14 +1,25 @@
 from __future__ import annotations
 
 import json
-from typing import Any, Dict, List
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 import yaml
-from rich.console import Console
 
+from mcp_kali_assistant.ai_engine.cache import StrategyCache
 from mcp_kali_assistant.ai_engine.client import AIClient
+from mcp_kali_assistant.ai_engine.context import (
+    DEFAULT_CONTEXT_BUDGET_CHARS,
+    CompactionStats,
+    compact_context,
+    render_context,
+)
+from mcp_kali_assistant.ai_engine.streaming import RecommendationStreamParser, normalise_recommendation
+from mcp_kali_assistant.core.timing import Span, record_span
+from mcp_kali_assistant.io.console import LazyConsole
+from mcp_kali_assistant.parsers.models import NmapSummary
 
-console = Console()
+console = LazyConsole()
 
 
 PROMPT_TEMPLATE = """You are an experienced senior security engineer and CTF mentor.
@@ -57,31 +68,35 @@ Return ONLY valid YAML. NO markdown, NO code fences, NO commentary outside the Y
 """
 
 
-def build_context_json(target: str, mode: str, hint: str, reachability: Dict[str, Any], nmap_summary: Dict[str, Any]) -> str:
-    context = {
-        "target": target,
-        "mode": mode,
-        "hint": hint,
-        "reachability": reachability,
-        "nmap_summary": nmap_summary,
-    }
-    return json.dumps(context, indent=2)
+def build_context_json(
+    target: str,
+    mode: str,
+    hint: str,
+    reachability: Dict[str, Any],
+    nmap_summary: Union[NmapSummary, Dict[str, Any]],
+    budget_chars: int = DEFAULT_CONTEXT_BUDGET_CHARS,
+) -> str:
+    context_json, _ = build_compact_context(target, mode, hint, reachability, nmap_summary, budget_chars)
+    return context_json
 
 
-def call_ai_strategy(
-    client: AIClient,
+def build_compact_context(
     target: str,
     mode: str,
     hint: str,
     reachability: Dict[str, Any],
-    nmap_summary: Dict[str, Any],
-) -> Dict[str, Any]:
-    context_json = build_context_json(target, mode, hint, reachability, nmap_summary)
-    prompt = PROMPT_TEMPLATE.format(context_json=context_json)
-    raw_output = client.generate(prompt)
-    if raw_output is None:
-        return {"raw": None, "parsed": None, "commands": []}
-
+    nmap_summary: Union[NmapSummary, Dict[str, Any]],
+    budget_chars: int = DEFAULT_CONTEXT_BUDGET_CHARS,
+) -> Tuple[str, CompactionStats]:
+    """Compact (open ports only, grouped services, budget-capped) context JSON plus what was cut."""
+    context, stats = compact_context(
+        target, mode, hint, reachability, NmapSummary.coerce(nmap_summary), budget_chars=budget_chars
+    )
+    return render_context(context), stats
+
+
+def parse_ai_output(raw_output: str) -> Dict[str, Any]:
+    """Parse raw model output (YAML, falling back to JSON) into the strategy result dict."""
     try:
         data = yaml.safe_load(raw_output)
     except yaml.YAMLError:
@@ -100,22 +115,124 @@ def call_ai_strategy(
     commands: List[Dict[str, Any]] = []
     if isinstance(recs, list):
         for r in recs:
-            if not isinstance(r, dict):
-                continue
-            cmd = r.get("command")
-            if not cmd or not isinstance(cmd, str):
-                continue
-            commands.append(
-                {
-                    "name": r.get("name", "Unnamed"),
-                    "command": cmd.strip(),
-                    "category": r.get("category", "generic"),
-                    "priority": int(r.get("priority", 5)),
-                    "rationale": r.get("rationale", ""),
-                    "notes": r.get("notes", ""),
-                }
-            )
+            rec = normalise_recommendation(r)
+            if rec is not None:
+                commands.append(rec)
 
     commands.sort(key=lambda c: c.get("priority", 5))
 
     return {"raw": raw_output, "parsed": data, "commands": commands}
+
+
+def _stream_generate(
+    client: AIClient,
+    prompt: str,
+    on_command: Optional[Callable[[Dict[str, Any]], None]],
+    on_progress: Optional[Callable[[int], None]],
+    stop_event: Optional[threading.Event],
+    stats: Optional[Dict[str, Any]] = None,
+) -> Tuple[Optional[str], List[Dict[str, Any]]]:
+    parser = RecommendationStreamParser()
+    chunks: List[str] = []
+    received = 0
+    streamed: List[Dict[str, Any]] = []
+
+    def emit(found: List[Dict[str, Any]]) -> None:
+        for rec in found:
+            streamed.append(rec)
+            if on_command is not None:
+                on_command(rec)
+
+    stream = client.generate_stream(prompt, stats=stats)
+    for text in stream:
+        chunks.append(text)
+        received += len(text)
+        emit(parser.feed(text))
+        if on_progress is not None:
+            on_progress(received)
+        if stop_event is not None and stop_event.is_set():
+            stream.close()
+            break
+    emit(parser.finish())
+    return ("".join(chunks) if chunks else None), streamed
+
+
+def call_ai_strategy(
+    client: AIClient,
+    target: str,
+    mode: str,
+    hint: str,
+    reachability: Dict[str, Any],
+    nmap_summary: Union[NmapSummary, Dict[str, Any]],
+    cache: Optional[StrategyCache] = None,
+    stream: bool = False,
+    on_command: Optional[Callable[[Dict[str, Any]], None]] = None,
+    on_progress: Optional[Callable[[int], None]] = None,
+    stop_event: Optional[threading.Event] = None,
+    context_budget_chars: int = DEFAULT_CONTEXT_BUDGET_CHARS,
+    spans: Optional[List[Span]] = None,
+) -> Dict[str, Any]:
+    """
+    Ask the model for an enumeration strategy.
+
+    With ``stream=True`` the answer is consumed token by token and ``on_command`` fires for
+    each recommendation as soon as its list item is complete (``on_progress`` gets the
+    number of characters received so far). Streamed commands keep their arrival order so
+    that indices shown to the user stay stable; non-streamed results are sorted by priority.
+
+    ``spans`` (e.g. ``session.timings``) receives ``ai.context``, ``ai.cache``,
+    ``ai.request`` (with the model's own latency breakdown where reported) and
+    ``ai.parse`` timings.
+    """
+    if spans is None:
+        spans = []
+    with record_span(spans, "ai.context") as metrics:
+        context_json, stats = build_compact_context(
+            target, mode, hint, reachability, nmap_summary, budget_chars=context_budget_chars
+        )
+        metrics["chars"] = len(context_json)
+    console.print(f"[dim]AI context: {stats.describe()}[/dim]")
+
+    cache_key = None
+    if cache is not None:
+        with record_span(spans, "ai.cache") as metrics:
+            cache_key = cache.make_key(context_json, client.model_name)
+            cached = cache.get(cache_key)
+            metrics["hit"] = cached is not None
+        if cached is not None:
+            console.print("[bold green]AI strategy loaded from cache (identical context and model).[/bold green]")
+            if on_command is not None:
+                for rec in cached.get("commands", []):
+                    on_command(rec)
+            return cached
+
+    prompt = PROMPT_TEMPLATE.format(context_json=context_json)
+    if not stream:
+        with record_span(spans, "ai.request") as metrics:
+            raw_output = client.generate(prompt, stats=metrics)
+        if raw_output is None:
+            return {"raw": None, "parsed": None, "commands": []}
+        with record_span(spans, "ai.parse"):
+            result = parse_ai_output(raw_output)
+    else:
+        with record_span(spans, "ai.request") as metrics:
+            metrics["stream"] = True
+            raw_output, streamed = _stream_generate(client, prompt, on_command, on_progress, stop_event, stats=metrics)
+        if raw_output is None:
+            return {"raw": None, "parsed": None, "commands": streamed}
+        with record_span(spans, "ai.parse"):
+            result = parse_ai_output(raw_output)
+        # Keep the streamed order; append anything only the full-document parse recovered.
+        seen = {c["command"] for c in streamed}
+        late = [c for c in result["commands"] if c["command"] not in seen]
+        for rec in late:
+            if on_command is not None:
+                on_command(rec)
+        result["commands"] = streamed + late
+        if stop_event is not None and stop_event.is_set():
+            # A cut-short answer must not be cached as if it were complete.
+            return result
+
+    if cache is not None and cache_key is not None and result.get("parsed") is not None:
+        cache.put(cache_key, client.model_name, result)
+    return result
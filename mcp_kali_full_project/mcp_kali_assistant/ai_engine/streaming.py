@@ -0,0 +1,101 @@
+"""Incremental parsing of streamed AI strategy output."""
+from __future__ import annotations
+
+import re
+import textwrap
+from typing import Any, Dict, List, Optional
+
+import yaml
+
+_TOP_LEVEL_KEY = re.compile(r"^[A-Za-z_][\w-]*\s*:")
+_LIST_ITEM = re.compile(r"^(\s*)-(\s|$)")
+
+
+def normalise_recommendation(r: Any) -> Optional[Dict[str, Any]]:
+    """Turn one raw ``recommendations`` entry into a command dict (None if unusable)."""
+    if not isinstance(r, dict):
+        return None
+    cmd = r.get("command")
+    if not cmd or not isinstance(cmd, str):
+        return None
+    return {
+        "name": r.get("name", "Unnamed"),
+        "command": cmd.strip(),
+        "category": r.get("category", "generic"),
+        "priority": int(r.get("priority", 5)),
+        "rationale": r.get("rationale", ""),
+        "notes": r.get("notes", ""),
+    }
+
+
+class RecommendationStreamParser:
+    """
+    Pick complete ``recommendations`` list items out of a YAML document as it streams in.
+
+    Text is fed in arbitrary chunks. An item counts as complete once the next item (or
+    the next top-level key) starts; the last one is flushed by :meth:`finish`. Each
+    complete item is parsed on its own, so a malformed item never blocks later ones.
+    """
+
+    def __init__(self) -> None:
+        self._pending = ""
+        self._in_recommendations = False
+        self._item_indent: Optional[int] = None
+        self._item_lines: List[str] = []
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        self._pending += text
+        if "\n" not in self._pending:
+            return []
+        complete, self._pending = self._pending.rsplit("\n", 1)
+        found: List[Dict[str, Any]] = []
+        for line in complete.split("\n"):
+            found.extend(self._feed_line(line))
+        return found
+
+    def finish(self) -> List[Dict[str, Any]]:
+        found: List[Dict[str, Any]] = []
+        if self._pending:
+            found.extend(self._feed_line(self._pending))
+            self._pending = ""
+        found.extend(self._flush_item())
+        return found
+
+    def _feed_line(self, line: str) -> List[Dict[str, Any]]:
+        stripped = line.strip()
+        if stripped.startswith("```"):
+            return []
+
+        if _TOP_LEVEL_KEY.match(line):
+            done = self._flush_item()
+            self._in_recommendations = line.split(":", 1)[0].strip() == "recommendations"
+            self._item_indent = None
+            return done
+
+        if not self._in_recommendations:
+            return []
+
+        m = _LIST_ITEM.match(line)
+        if m and (self._item_indent is None or len(m.group(1)) == self._item_indent):
+            done = self._flush_item()
+            self._item_indent = len(m.group(1))
+            self._item_lines = [line]
+            return done
+
+        if self._item_lines:
+            self._item_lines.append(line)
+        return []
+
+    def _flush_item(self) -> List[Dict[str, Any]]:
+        if not self._item_lines:
+            return []
+        text = textwrap.dedent("\n".join(self._item_lines))
+        self._item_lines = []
+        try:
+            data = yaml.safe_load(text)
+        except yaml.YAMLError:
+            return []
+        if not isinstance(data, list) or not data:
+            return []
+        rec = normalise_recommendation(data[0])
+        return [rec] if rec is not None else []
@@ -0,0 +1,217 @@
+"""Unattended multi-target runs: targets files, selection policies and a shared scheduler."""
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+import yaml
+
+from mcp_kali_assistant.core.executor import RunningCommands
+from mcp_kali_assistant.core.modes import SCAN_PROFILES
+
+DEFAULT_BATCH_MODE = "balanced"
+DEFAULT_MAX_TARGETS = 2
+DEFAULT_MAX_SCANS = 1
+DEFAULT_MAX_AI_CALLS = 1
+DEFAULT_MAX_COMMANDS = 4
+
+BATCH_OK = "ok"
+BATCH_FAILED = "failed"
+
+
+class BatchCancelled(Exception):
+    """Raised in a target's thread at the next phase boundary once the batch is being stopped."""
+
+
+@dataclass
+class BatchTarget:
+    target: str
+    mode: str = DEFAULT_BATCH_MODE
+    hint: str = ""
+
+
+def _make_target(target: Any, mode: Any, hint: Any, where: str) -> BatchTarget:
+    target = str(target or "").strip()
+    mode = str(mode or DEFAULT_BATCH_MODE).strip()
+    if not target:
+        raise ValueError(f"{where}: missing target")
+    if mode not in SCAN_PROFILES:
+        raise ValueError(f"{where}: unknown scan mode {mode!r} (expected one of {', '.join(SCAN_PROFILES)})")
+    return BatchTarget(target=target, mode=mode, hint=str(hint or "").strip())
+
+
+def load_targets_file(path: Path, default_mode: str = DEFAULT_BATCH_MODE) -> List[BatchTarget]:
+    """
+    Read a batch targets file.
+
+    Plain text files hold one target per line as ``target [mode] [hint ...]``; blank
+    lines and ``#`` comments are ignored. ``.yaml``/``.yml`` files hold a list (or a
+    ``targets:`` list) of mappings with ``target`` and optional ``mode`` and ``hint``.
+    Raises ValueError on the first invalid entry.
+    """
+    targets: List[BatchTarget] = []
+    if path.suffix.lower() in (".yaml", ".yml"):
+        with path.open("r", encoding="utf-8") as f:
+            data = yaml.safe_load(f) or []
+        if isinstance(data, dict):
+            data = data.get("targets") or []
+        if not isinstance(data, list):
+            raise ValueError(f"{path}: expected a list of targets")
+        for i, entry in enumerate(data, start=1):
+            if isinstance(entry, str):
+                entry = {"target": entry}
+            if not isinstance(entry, dict):
+                raise ValueError(f"{path}: entry {i} is not a mapping")
+            targets.append(
+                _make_target(entry.get("target"), entry.get("mode", default_mode), entry.get("hint"), f"{path}: entry {i}")
+            )
+        return targets
+
+    with path.open("r", encoding="utf-8") as f:
+        for lineno, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            parts = line.split(None, 2)
+            mode = parts[1] if len(parts) > 1 else default_mode
+            hint = parts[2] if len(parts) > 2 else ""
+            targets.append(_make_target(parts[0], mode, hint, f"{path}:{lineno}"))
+    return targets
+
+
+@dataclass
+class SelectionPolicy:
+    """
+    Non-interactive stand-in for the command-selection prompt.
+
+    Commands are filtered to ``categories`` (if given), ordered by priority
+    (1 = highest) and capped at ``top_n`` (if given). With neither set, nothing runs.
+    """
+
+    top_n: Optional[int] = None
+    categories: Optional[Set[str]] = None
+
+    @property
+    def runs_anything(self) -> bool:
+        return self.top_n != 0 and (self.top_n is not None or self.categories is not None)
+
+    def select(self, commands: List[Dict[str, Any]]) -> List[int]:
+        """1-based indices into ``commands`` of the commands to run, in index order."""
+        if not self.runs_anything:
+            return []
+        candidates = [
+            (int(cmd.get("priority", 5)), idx)
+            for idx, cmd in enumerate(commands, start=1)
+            if cmd.get("command") and (self.categories is None or cmd.get("category", "generic") in self.categories)
+        ]
+        candidates.sort()
+        if self.top_n is not None:
+            candidates = candidates[: max(0, self.top_n)]
+        return sorted(idx for _, idx in candidates)
+
+    def describe(self) -> str:
+        if not self.runs_anything:
+            return "none (scan and AI strategy only)"
+        parts = []
+        if self.categories is not None:
+            parts.append(f"categories {', '.join(sorted(self.categories))}")
+        parts.append(f"top {self.top_n} by priority" if self.top_n is not None else "all by priority")
+        return "; ".join(parts)
+
+
+@dataclass
+class BatchOutcome:
+    item: BatchTarget
+    status: str = BATCH_OK
+    session_id: str = ""
+    report_path: Optional[Path] = None
+    executed: int = 0
+    error: str = ""
+    elapsed_seconds: float = 0.0
+
+
+@dataclass
+class BatchScheduler:
+    """
+    Runs targets concurrently while sharing global limits across all of them.
+
+    ``max_targets`` targets are in flight at once; within them at most ``max_scans``
+    Nmap scans, ``max_ai_calls`` AI requests and ``max_commands`` enumeration commands
+    run at the same time. Targets take the matching slot around each phase.
+
+    If ``run`` is interrupted (Ctrl-C), queued targets are cancelled, the enumeration
+    commands registered in :attr:`running` are killed and started targets stop at their
+    next :meth:`check_stopping` call instead of running their remaining phases.
+    """
+
+    max_targets: int = DEFAULT_MAX_TARGETS
+    max_scans: int = DEFAULT_MAX_SCANS
+    max_ai_calls: int = DEFAULT_MAX_AI_CALLS
+    max_commands: int = DEFAULT_MAX_COMMANDS
+    scan_slots: threading.BoundedSemaphore = field(init=False)
+    ai_slots: threading.BoundedSemaphore = field(init=False)
+    command_slots: threading.BoundedSemaphore = field(init=False)
+    stopping: threading.Event = field(init=False)
+    running: RunningCommands = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.max_targets = max(1, self.max_targets)
+        self.scan_slots = threading.BoundedSemaphore(max(1, self.max_scans))
+        self.ai_slots = threading.BoundedSemaphore(max(1, self.max_ai_calls))
+        self.command_slots = threading.BoundedSemaphore(max(1, self.max_commands))
+        self.stopping = threading.Event()
+        self.running = RunningCommands()
+
+    def check_stopping(self) -> None:
+        """Raise BatchCancelled if the batch is being stopped; targets call this between phases."""
+        if self.stopping.is_set():
+            raise BatchCancelled("batch interrupted")
+
+    def stop(self) -> None:
+        """Stop the batch: no further phases start and running commands are killed."""
+        self.stopping.set()
+        self.running.kill_all()
+
+    def run(
+        self,
+        targets: Iterable[BatchTarget],
+        run_target: Callable[[BatchTarget], BatchOutcome],
+        on_done: Optional[Callable[[BatchOutcome], None]] = None,
+    ) -> List[BatchOutcome]:
+        """Run every target; a target that raises is recorded as failed and the rest continue."""
+        items = list(targets)
+        self.stopping.clear()
+        self.running = RunningCommands()
+
+        def guarded(item: BatchTarget) -> BatchOutcome:
+            started = time.monotonic()
+            try:
+                self.check_stopping()
+                outcome = run_target(item)
+            except Exception as e:  # noqa: BLE001 - one broken target must not stop the batch
+                outcome = BatchOutcome(item, status=BATCH_FAILED, error=f"{type(e).__name__}: {e}")
+            outcome.elapsed_seconds = time.monotonic() - started
+            return outcome
+
+        outcomes: List[BatchOutcome] = []
+        pool = ThreadPoolExecutor(max_workers=min(self.max_targets, max(1, len(items))), thread_name_prefix="batch")
+        try:
+            futures = [pool.submit(guarded, item) for item in items]
+            for fut in as_completed(futures):
+                outcome = fut.result()
+                outcomes.append(outcome)
+                if on_done is not None:
+                    on_done(outcome)
+        except BaseException:
+            # Leaving a `with` block would wait for every queued target to finish.
+            self.stop()
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        pool.shutdown()
+        order = {id(item): i for i, item in enumerate(items)}
+        outcomes.sort(key=lambda o: order[id(o.item)])
+        return outcomes
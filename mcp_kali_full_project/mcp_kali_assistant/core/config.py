@@ -29,18 +29,43 @@ class AppConfig:
         general = self._data.get("general", {})
         sessions_dir = general.get("sessions_dir", "sessions")
         self.sessions_dir = (self.root_dir / sessions_dir).resolve()
-        self.sessions_dir.mkdir(parents=True, exist_ok=True)
-
         self.logs_dir = self.sessions_dir / "logs"
-        self.logs_dir.mkdir(parents=True, exist_ok=True)
-
         self.reports_dir = self.sessions_dir / "reports"
-        self.reports_dir.mkdir(parents=True, exist_ok=True)
+        self.session_codec = str(general.get("session_codec", "gzip"))
+
+    def ensure_dirs(self) -> None:
+        """Create the sessions, logs and reports directories (done by commands that write)."""
+        for path in (self.sessions_dir, self.logs_dir, self.reports_dir):
+            path.mkdir(parents=True, exist_ok=True)
 
     @property
     def ai_config(self) -> Dict[str, Any]:
         return self._data.get("ai", {})
 
+    @property
+    def reachability_config(self) -> Dict[str, Any]:
+        return self._data.get("reachability", {})
+
+    @property
+    def nmap_config(self) -> Dict[str, Any]:
+        return self._data.get("nmap", {})
+
+    @property
+    def execution_config(self) -> Dict[str, Any]:
+        return self._data.get("execution", {})
+
+    @property
+    def output_config(self) -> Dict[str, Any]:
+        return self._data.get("output", {})
+
+    @property
+    def report_config(self) -> Dict[str, Any]:
+        return self._data.get("reports", {})
+
+    @property
+    def batch_config(self) -> Dict[str, Any]:
+        return self._data.get("batch", {})
+
     @classmethod
     def from_cwd(cls) -> "AppConfig":
         root = Path(__file__).resolve().parents[2]
@@ -0,0 +1,346 @@
+from __future__ import annotations
+
+import codecs
+import os
+import re
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from mcp_kali_assistant.core.session import ExecutedCommand
+from mcp_kali_assistant.core.timing import ChildUsage, ChildWaiter
+
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_TIMEOUT_SECONDS = 600
+DEFAULT_MAX_OUTPUT_BYTES = 20 * 1024 * 1024
+PREVIEW_HEAD_CHARS = 400
+PREVIEW_TAIL_CHARS = 200
+CHUNK_SIZE = 64 * 1024
+
+
+@dataclass
+class CommandJob:
+    index: int
+    command: str
+    category: str
+    host: str
+    info: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def limit_key(self) -> Tuple[str, str]:
+        return self.category, self.host
+
+
+@dataclass
+class CommandResult:
+    job: CommandJob
+    record: ExecutedCommand
+    preview: str
+    timed_out: bool = False
+    seconds: float = 0.0
+    # CPU time and peak RSS of the command's process tree, where the platform reports it.
+    usage: Optional[ChildUsage] = None
+
+
+def job_host(command: str, known_hosts: Iterable[str], default: str) -> str:
+    """Return the first known host address mentioned in ``command`` (or ``default``)."""
+    for host in known_hosts:
+        # Whole addresses only: 10.0.0.1 must not match inside 10.0.0.12.
+        if host and re.search(rf"(?<![\w.-]){re.escape(host)}(?![\w-]|\.\w)", command):
+            return host
+    return default
+
+
+class HeadTailBuffer:
+    """Keep the first ``head`` and the last ``tail`` characters of a text stream."""
+
+    def __init__(self, head: int = PREVIEW_HEAD_CHARS, tail: int = PREVIEW_TAIL_CHARS):
+        self.head_limit = head
+        self._head: List[str] = []
+        self._head_len = 0
+        self._tail: Deque[str] = deque(maxlen=tail)
+        self.truncated = False
+
+    def write(self, text: str) -> None:
+        if self._head_len < self.head_limit:
+            room = self.head_limit - self._head_len
+            self._head.append(text[:room])
+            self._head_len += min(room, len(text))
+            text = text[room:]
+        if text:
+            if len(self._tail) + len(text) > (self._tail.maxlen or 0):
+                self.truncated = True
+            self._tail.extend(text)
+
+    def render(self) -> str:
+        head = "".join(self._head)
+        tail = "".join(self._tail)
+        if self.truncated:
+            return f"{head}\n[...]\n{tail}"
+        return head + tail
+
+
+class _OutputBudget:
+    """Byte budget shared by a command's stdout and stderr (0 = unlimited)."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.used = 0
+        self.exceeded = False
+        self._lock = threading.Lock()
+
+    def take(self, n: int) -> int:
+        """Reserve up to ``n`` bytes and return how many may be written."""
+        if self.max_bytes <= 0:
+            return n
+        with self._lock:
+            allowed = max(0, min(n, self.max_bytes - self.used))
+            self.used += allowed
+            if allowed < n:
+                self.exceeded = True
+            return allowed
+
+
+def _pump(
+    stream: BinaryIO,
+    sink: BinaryIO,
+    budget: _OutputBudget,
+    preview: Optional[HeadTailBuffer],
+    on_line: Optional[Callable[[str], None]] = None,
+) -> None:
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    partial = ""
+    while True:
+        chunk = stream.read1(CHUNK_SIZE) if hasattr(stream, "read1") else stream.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        allowed = budget.take(len(chunk))
+        if allowed:
+            sink.write(chunk[:allowed])
+            sink.flush()
+        if preview is None and on_line is None:
+            continue
+        text = decoder.decode(chunk)
+        if preview is not None:
+            preview.write(text)
+        if on_line is not None:
+            *lines, partial = (partial + text).split("\n")
+            for line in lines:
+                on_line(line.rstrip("\r"))
+    text = decoder.decode(b"", final=True)
+    if preview is not None:
+        preview.write(text)
+    if on_line is not None and (partial + text):
+        on_line(partial + text)
+
+
+def _kill_process_tree(proc: subprocess.Popen) -> None:
+    try:
+        if os.name == "posix":
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+class RunningCommands:
+    """
+    The processes of commands that are still running.
+
+    Commands run in their own session (so a timeout can kill the whole tree), which
+    also means Ctrl-C never reaches them; whoever catches the interrupt stops them with
+    :meth:`kill_all`. Commands registered after that are killed straight away.
+    """
+
+    def __init__(self) -> None:
+        self._procs: Set[subprocess.Popen] = set()
+        self._lock = threading.Lock()
+        self.closed = False
+
+    def add(self, proc: subprocess.Popen) -> None:
+        with self._lock:
+            if not self.closed:
+                self._procs.add(proc)
+                return
+        _kill_process_tree(proc)
+
+    def discard(self, proc: subprocess.Popen) -> None:
+        with self._lock:
+            self._procs.discard(proc)
+
+    def kill_all(self) -> int:
+        """Kill the process group of every running command and refuse new ones; returns how many were killed."""
+        with self._lock:
+            self.closed = True
+            procs = list(self._procs)
+            self._procs.clear()
+        for proc in procs:
+            _kill_process_tree(proc)
+        return len(procs)
+
+
+def run_command(
+    job: CommandJob,
+    log_file: Path,
+    timeout: int = DEFAULT_TIMEOUT_SECONDS,
+    max_output_bytes: int = DEFAULT_MAX_OUTPUT_BYTES,
+    on_line: Optional[Callable[[str], None]] = None,
+    running: Optional[RunningCommands] = None,
+) -> CommandResult:
+    """
+    Run one shell command and build its session record.
+
+    stdout is streamed straight into ``log_file`` as it arrives and stderr is spooled to a
+    temporary file and appended under ``[STDERR]`` at the end. Only a bounded head/tail of
+    stdout is kept in memory for the preview. Output beyond ``max_output_bytes`` is
+    discarded, and a timeout keeps whatever was logged so far. ``on_line`` (if given)
+    receives every stdout line as it arrives. The process is registered in ``running``
+    while it runs; an interrupt raised while waiting kills its process tree.
+    """
+    info = job.info
+    started_at = datetime.utcnow().isoformat() + "Z"
+    started = time.monotonic()
+    timed_out = False
+    preview = HeadTailBuffer()
+    budget = _OutputBudget(max_output_bytes)
+
+    with log_file.open("wb") as log, tempfile.TemporaryFile() as err_spool:
+        proc = subprocess.Popen(
+            job.command,
+            shell=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            start_new_session=(os.name == "posix"),
+        )
+        assert proc.stdout is not None and proc.stderr is not None  # for type-checkers
+        if running is not None:
+            running.add(proc)
+        pumps = [
+            threading.Thread(target=_pump, args=(proc.stdout, log, budget, preview, on_line), daemon=True),
+            threading.Thread(target=_pump, args=(proc.stderr, err_spool, budget, None), daemon=True),
+        ]
+        for t in pumps:
+            t.start()
+
+        waiter = ChildWaiter(proc)
+        try:
+            exit_code = waiter.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            _kill_process_tree(proc)
+            waiter.wait()
+            exit_code = -1
+            timed_out = True
+        except BaseException:
+            # Ctrl-C while waiting on this thread: the child is in its own session and
+            # did not get the SIGINT.
+            _kill_process_tree(proc)
+            raise
+        finally:
+            if running is not None:
+                running.discard(proc)
+        for t in pumps:
+            t.join()
+
+        log.write(b"\n\n[STDERR]\n")
+        err_spool.seek(0)
+        shutil.copyfileobj(err_spool, log)
+        if budget.exceeded:
+            log.write(f"\n[Output truncated at {max_output_bytes} bytes]\n".encode("utf-8"))
+        if timed_out:
+            log.write(f"\n[Command timed out after {timeout}s; partial output kept above]\n".encode("utf-8"))
+    ended_at = datetime.utcnow().isoformat() + "Z"
+    seconds = time.monotonic() - started
+
+    record = ExecutedCommand(
+        index=job.index,
+        name=info.get("name", f"cmd_{job.index}"),
+        command=job.command,
+        category=job.category,
+        priority=int(info.get("priority", 5)),
+        rationale=info.get("rationale", ""),
+        started_at=started_at,
+        ended_at=ended_at,
+        exit_code=exit_code,
+        log_file=str(log_file),
+    )
+    return CommandResult(
+        job=job, record=record, preview=preview.render(), timed_out=timed_out, seconds=seconds, usage=waiter.usage
+    )
+
+
+class ParallelExecutor:
+    """
+    Run command jobs on a worker pool with a global cap and per-category caps.
+
+    Category caps apply per (category, host) pair, so ``{"web": 1}`` allows one web
+    job per host at a time. Jobs are dispatched from the calling thread only when a slot
+    is free, which keeps capped categories from tying up pool workers.
+
+    ``run_job`` should pass :attr:`running` to :func:`run_command`: if ``run`` is
+    interrupted (Ctrl-C) or a job raises, the commands still running are killed and
+    queued jobs are cancelled instead of being waited for.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        category_limits: Optional[Dict[str, int]] = None,
+    ):
+        self.max_workers = max(1, max_workers)
+        self.category_limits = {k: max(1, int(v)) for k, v in (category_limits or {}).items()}
+        self.running = RunningCommands()
+
+    def _limit_for(self, category: str) -> int:
+        return self.category_limits.get(category, self.max_workers)
+
+    def run(
+        self,
+        jobs: List[CommandJob],
+        run_job: Callable[[CommandJob], CommandResult],
+        on_done: Optional[Callable[[CommandResult], None]] = None,
+    ) -> List[CommandResult]:
+        """Run ``jobs`` and return their results in job index order; ``on_done`` fires as each finishes."""
+        pending = sorted(jobs, key=lambda j: j.index)
+        in_flight: Dict[Future, CommandJob] = {}
+        active: Dict[Tuple[str, str], int] = {}
+        results: List[CommandResult] = []
+
+        self.running = RunningCommands()
+        pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            while pending or in_flight:
+                for job in list(pending):
+                    if len(in_flight) >= self.max_workers:
+                        break
+                    if active.get(job.limit_key, 0) >= self._limit_for(job.category):
+                        continue
+                    pending.remove(job)
+                    active[job.limit_key] = active.get(job.limit_key, 0) + 1
+                    in_flight[pool.submit(run_job, job)] = job
+
+                done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+                for fut in done:
+                    job = in_flight.pop(fut)
+                    active[job.limit_key] -= 1
+                    result = fut.result()
+                    results.append(result)
+                    if on_done is not None:
+                        on_done(result)
+        except BaseException:
+            self.running.kill_all()
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        pool.shutdown()
+
+        results.sort(key=lambda r: r.job.index)
+        return results
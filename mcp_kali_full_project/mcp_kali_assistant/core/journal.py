@@ -0,0 +1,53 @@
+"""Append-only per-session journal used for checkpointing and resume."""
+from __future__ import annotations
+
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Set
+
+JOURNAL_FILENAME = "journal.jsonl"
+
+PHASE_REACHABILITY = "reachability"
+PHASE_NMAP = "nmap"
+PHASE_AI_STRATEGY = "ai_strategy"
+PHASE_ENUMERATION = "enumeration"
+PHASES = (PHASE_REACHABILITY, PHASE_NMAP, PHASE_AI_STRATEGY, PHASE_ENUMERATION)
+
+
+class SessionJournal:
+    """
+    JSON-lines journal in ``<sessions_dir>/<id>/journal.jsonl``.
+
+    Each record is written with a single ``write`` of one line, then flushed and fsynced.
+    A crash can therefore only lose or truncate the final line, and :meth:`read` skips a
+    truncated line.
+    """
+
+    def __init__(self, session_dir: Path):
+        self.path = session_dir / JOURNAL_FILENAME
+
+    def append(self, event: str, **data: Any) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        record = {"ts": datetime.utcnow().isoformat() + "Z", "event": event, **data}
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self.path.open("a", encoding="utf-8") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def read(self) -> List[Dict[str, Any]]:
+        if not self.path.exists():
+            return []
+        records: List[Dict[str, Any]] = []
+        with self.path.open("r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+        return records
+
+    def completed_phases(self) -> Set[str]:
+        return {r["phase"] for r in self.read() if r.get("event") == "phase_completed" and "phase" in r}
@@ -1,12 +1,26 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Dict, List
 
 
+@dataclass
+class ScanStage:
+    name: str
+    nmap_args: List[str]
+    # Port discovery stage: the scan type (SYN as root, connect otherwise) is added at run time.
+    discovery: bool = False
+    # Restrict this stage to the hosts and open ports found by the previous stage.
+    ports_from_previous: bool = False
+
+
 @dataclass
 class ScanProfile:
     name: str
     description: str
     nmap_args: List[str]
+    # Other modes whose results this profile's results are a superset of (ports and probes).
+    covers: List[str] = field(default_factory=list)
+    # Optional multi-stage pipeline equivalent to nmap_args; empty means a single nmap pass.
+    stages: List[ScanStage] = field(default_factory=list)
 
 
 SCAN_PROFILES: Dict[str, ScanProfile] = {
@@ -19,16 +33,31 @@ SCAN_PROFILES: Dict[str, ScanProfile] = {
         name="balanced",
         description="Top 1000 ports, version detection, default scripts.",
         nmap_args=["-T3", "--top-ports", "1000", "-sV", "-sC", "-oX"],
+        covers=["fast", "low-noise"],
     ),
     "aggressive": ScanProfile(
         name="aggressive",
         description="Full TCP scan with version detection and more scripts (CTF/lab).",
         nmap_args=["-T4", "-p-", "-sV", "-sC", "-A", "-oX"],
+        covers=["balanced", "fast", "low-noise"],
+        stages=[
+            ScanStage(
+                name="discovery",
+                nmap_args=["-T4", "-p-", "--min-rate", "1000", "--max-retries", "2", "--open", "-oX"],
+                discovery=True,
+            ),
+            ScanStage(
+                name="fingerprint",
+                nmap_args=["-T4", "-sV", "-sC", "-A", "-oX"],
+                ports_from_previous=True,
+            ),
+        ],
     ),
     "low-noise": ScanProfile(
         name="low-noise",
         description="Reduced ports and conservative timing (lower intensity).",
         nmap_args=["-T2", "--top-ports", "200", "-sV", "-oX"],
+        covers=["fast"],
     ),
 }
 
@@ -37,3 +66,11 @@ def get_scan_profile(mode: str) -> ScanProfile:
     if mode not in SCAN_PROFILES:
         raise ValueError(f"Unknown scan mode: {mode}")
     return SCAN_PROFILES[mode]
+
+
+def profile_dominates(candidate_mode: str, wanted_mode: str) -> bool:
+    """True if a scan made in ``candidate_mode`` answers everything a ``wanted_mode`` scan would."""
+    if candidate_mode == wanted_mode:
+        return True
+    profile = SCAN_PROFILES.get(candidate_mode)
+    return profile is not None and wanted_mode in profile.covers
@@ -1,12 +1,20 @@
 from __future__ import annotations
 
+import bisect
 import json
 import random
+import sqlite3
 import string
 import time
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field, asdict, fields
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, ContextManager, Dict, List, Optional, Tuple
+
+from mcp_kali_assistant.core import session_store
+from mcp_kali_assistant.core.journal import SessionJournal
+from mcp_kali_assistant.core.session_index import SessionIndex
+from mcp_kali_assistant.core.timing import Span, record_span
+from mcp_kali_assistant.parsers.models import NmapSummary
 
 
 def _generate_session_id() -> str:
@@ -29,6 +37,52 @@ class ExecutedCommand:
     log_file: str
 
 
+_UNSET = object()
+
+
+class _Part:
+    """
+    A session field stored as a separate container part.
+
+    After ``Session.load`` the part stays on disk until the attribute is first read;
+    assigning the attribute replaces it without reading the file. ``Session.save``
+    reuses a part's manifest entry for as long as the same object stays assigned, so
+    change a part by assigning a new value rather than mutating it in place.
+    """
+
+    def __init__(self, default_factory: Callable[[], Any], decode: Callable[[Any], Any] = lambda v: v):
+        self.default_factory = default_factory
+        self.decode = decode
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
+
+    def __get__(self, obj: Any, objtype: Optional[type] = None) -> Any:
+        if obj is None:
+            # Class access: the dataclass default, turned into a fresh value by __set__.
+            return _UNSET
+        state = obj.__dict__
+        if self.name not in state:
+            source = state.get("_pending_parts", {}).pop(self.name, None)
+            state[self.name] = self.decode(session_store.read_part(*source)) if source else self.default_factory()
+        return state[self.name]
+
+    def __set__(self, obj: Any, value: Any) -> None:
+        obj.__dict__.get("_pending_parts", {}).pop(self.name, None)
+        obj.__dict__.get("_saved_parts", {}).pop(self.name, None)
+        obj.__dict__[self.name] = self.default_factory() if value is _UNSET else value
+
+
+# Fields saved as separate container parts, read lazily after ``Session.load``.
+SESSION_PARTS: Tuple[str, ...] = ("nmap_summary", "ai_raw_output", "ai_recommendations")
+
+# Per-part numbers kept in the manifest so listing and indexing never open the part.
+_PART_COUNTS: Dict[str, Callable[[Any], Dict[str, int]]] = {
+    "nmap_summary": lambda s: {"host_count": len(s.hosts), "open_port_count": s.open_port_count()},
+    "ai_recommendations": lambda r: {"recommendation_count": len(r)},
+}
+
+
 @dataclass
 class Session:
     target: str
@@ -37,36 +91,120 @@ class Session:
     session_id: str = field(default_factory=_generate_session_id)
     reachability: Dict[str, Any] = field(default_factory=dict)
     nmap_xml_path: Optional[str] = None
-    nmap_summary: Dict[str, Any] = field(default_factory=dict)
-    ai_raw_output: Optional[str] = None
-    ai_recommendations: List[Dict[str, Any]] = field(default_factory=list)
+    nmap_summary: NmapSummary = _Part(NmapSummary, NmapSummary.from_dict)
+    ai_raw_output: Optional[str] = _Part(lambda: None)
+    ai_recommendations: List[Dict[str, Any]] = _Part(list)
     executed_commands: List[ExecutedCommand] = field(default_factory=list)
+    selected_indices: List[int] = field(default_factory=list)
+    timings: List[Span] = field(default_factory=list)
 
-    def to_dict(self) -> Dict[str, Any]:
-        d = asdict(self)
+    def to_dict(self, include_parts: bool = True) -> Dict[str, Any]:
+        d = {f.name: getattr(self, f.name) for f in fields(self) if include_parts or f.name not in SESSION_PARTS}
+        if include_parts:
+            d["nmap_summary"] = self.nmap_summary.to_dict()
         d["executed_commands"] = [asdict(c) for c in self.executed_commands]
+        d["timings"] = [asdict(s) for s in self.timings]
         return d
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "Session":
         cmds = [ExecutedCommand(**c) for c in data.get("executed_commands", [])]
-        data = {**data, "executed_commands": cmds}
+        summary = NmapSummary.from_dict(data.get("nmap_summary"))
+        timings = [Span(**s) for s in data.get("timings", [])]
+        data = {**data, "executed_commands": cmds, "nmap_summary": summary, "timings": timings}
         return cls(**data)
 
-    def save(self, sessions_root: Path) -> Path:
+    def record_executed(self, record: ExecutedCommand) -> None:
+        """Add an executed command, keeping ``executed_commands`` in index order."""
+        pos = bisect.bisect_right([c.index for c in self.executed_commands], record.index)
+        self.executed_commands.insert(pos, record)
+
+    def span(self, name: str) -> ContextManager[Dict[str, Any]]:
+        """Time a phase or sub-step into ``timings``; see :func:`core.timing.record_span`."""
+        return record_span(self.timings, name)
+
+    def counts(self) -> Dict[str, int]:
+        """Host, open-port, recommendation and executed-command counts (parts still on disk are not read)."""
+        counts: Dict[str, int] = {}
+        pending = self.__dict__.get("_pending_parts", {})
+        for name, count in _PART_COUNTS.items():
+            source = pending.get(name)
+            counts.update(source[1]["counts"] if source and "counts" in source[1] else count(getattr(self, name)))
+        counts["executed_count"] = len(self.executed_commands)
+        return counts
+
+    def load_parts(self) -> None:
+        """Read every part that is still on disk, so the next ``save`` rewrites them all."""
+        for name in SESSION_PARTS:
+            getattr(self, name)
+
+    def save(self, sessions_root: Path, codec: Optional[str] = None) -> Path:
+        """
+        Write the session container (see :mod:`core.session_store`) and update the index.
+
+        Parts that were never loaded or are unchanged are not rewritten; new parts use
+        ``codec`` (default: ``general.session_codec``). A part written by an earlier
+        save is not even re-encoded while the same value is still assigned, which keeps
+        per-phase checkpoints of a large scan cheap. Returns the manifest path.
+        """
         session_dir = sessions_root / self.session_id
         session_dir.mkdir(parents=True, exist_ok=True)
-        path = session_dir / "session.json"
-        with path.open("w", encoding="utf-8") as f:
-            json.dump(self.to_dict(), f, indent=2)
+        codec = codec or session_store.default_codec()
+        pending = self.__dict__.get("_pending_parts", {})
+        saved = self.__dict__.setdefault("_saved_parts", {})
+        parts: Dict[str, Dict[str, Any]] = {}
+        for name in SESSION_PARTS:
+            source = pending.get(name)
+            if source and source[0] == session_dir:
+                parts[name] = source[1]
+                continue
+            value = getattr(self, name)
+            if value is None:
+                continue
+            previous = saved.get(name)
+            if previous and previous[0] == (session_dir, codec) and previous[1] is value:
+                parts[name] = previous[2]
+                continue
+            meta = {"counts": _PART_COUNTS[name](value)} if name in _PART_COUNTS else {}
+            data = value.to_dict() if isinstance(value, NmapSummary) else value
+            parts[name] = session_store.write_part(session_dir, name, data, codec, **meta)
+            # Holding the value keeps its identity from being reused by another object.
+            saved[name] = ((session_dir, codec), value, parts[name])
+        path = session_store.write_manifest(session_dir, self.to_dict(include_parts=False), parts)
+        session_store.prune(session_dir, keep=(entry["file"] for entry in parts.values() if "file" in entry))
+        try:
+            SessionIndex.for_root(sessions_root).upsert(self)
+        except sqlite3.Error:
+            # The index is only a cache; `reindex` can always rebuild it from the session files.
+            pass
+        return path
+
+    def checkpoint(self, sessions_root: Path, event: str, **data: Any) -> Path:
+        """Atomically save the session, then append ``event`` to its journal."""
+        path = self.save(sessions_root)
+        SessionJournal(path.parent).append(event, **data)
         return path
 
+    @classmethod
+    def from_manifest(cls, session_dir: Path, manifest: Dict[str, Any]) -> "Session":
+        """A session whose parts are read from ``session_dir`` on first access."""
+        session = cls.from_dict(manifest.get("session", {}))
+        pending = {name: (session_dir, entry) for name, entry in manifest.get("parts", {}).items() if name in SESSION_PARTS}
+        for name in pending:
+            del session.__dict__[name]
+        session.__dict__["_pending_parts"] = pending
+        return session
+
     @classmethod
     def load(cls, sessions_root: Path, session_id: str) -> "Session":
+        """Load a session container (parts lazily) or a legacy ``session.json``."""
         session_dir = sessions_root / session_id
-        path = session_dir / "session.json"
+        manifest = session_store.read_manifest(session_dir)
+        if manifest is not None:
+            return cls.from_manifest(session_dir, manifest)
+        path = session_dir / session_store.LEGACY_FILENAME
         if not path.exists():
-            raise FileNotFoundError(f"Session file not found: {path}")
+            raise FileNotFoundError(f"Session not found: {session_dir}")
         with path.open("r", encoding="utf-8") as f:
             data = json.load(f)
         return cls.from_dict(data)
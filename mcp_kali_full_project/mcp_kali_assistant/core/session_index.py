@@ -0,0 +1,235 @@
+"""SQLite index of saved sessions for fast listing and lookup."""
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set
+
+if TYPE_CHECKING:
+    from mcp_kali_assistant.core.session import Session
+
+INDEX_FILENAME = "index.sqlite3"
+
+SORT_COLUMNS: Dict[str, str] = {
+    "date": "created_at",
+    "updated": "updated_at",
+    "target": "target",
+    "mode": "mode",
+    "ports": "open_port_count",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    target TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    hint TEXT NOT NULL DEFAULT '',
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    host_count INTEGER NOT NULL DEFAULT 0,
+    open_port_count INTEGER NOT NULL DEFAULT 0,
+    recommendation_count INTEGER NOT NULL DEFAULT 0,
+    executed_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_target ON sessions (target);
+CREATE INDEX IF NOT EXISTS idx_sessions_mode ON sessions (mode);
+CREATE INDEX IF NOT EXISTS idx_sessions_created ON sessions (created_at);
+"""
+
+# Index files whose schema (and WAL mode, which persists in the file) this process set up.
+_initialized: Set[str] = set()
+_initialized_lock = threading.Lock()
+
+
+@dataclass
+class SessionRecord:
+    session_id: str
+    target: str
+    mode: str
+    hint: str
+    created_at: str
+    updated_at: str
+    host_count: int
+    open_port_count: int
+    recommendation_count: int
+    executed_count: int
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def created_at_from_id(session_id: str, fallback: Optional[float] = None) -> str:
+    """Session IDs start with a local ``%Y%m%d-%H%M%S`` timestamp; fall back to ``fallback`` (epoch)."""
+    try:
+        dt = datetime.strptime(session_id[:15], "%Y%m%d-%H%M%S")
+        return dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    except ValueError:
+        return _iso(fallback if fallback is not None else time.time())
+
+
+class SessionIndex:
+    """
+    Index of session metadata kept in ``<sessions_dir>/index.sqlite3``.
+
+    It is updated by ``Session.save`` and can be rebuilt from the session directories
+    at any time. The session files remain the source of truth.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+
+    @classmethod
+    def for_root(cls, sessions_root: Path) -> "SessionIndex":
+        return cls(sessions_root / INDEX_FILENAME)
+
+    def _connect(self) -> sqlite3.Connection:
+        # Every save opens the index, so the schema is set up once per file and process
+        # (again if the file has been deleted since).
+        key = str(self.db_path.resolve())
+        with _initialized_lock:
+            initialize = key not in _initialized or not self.db_path.exists()
+            if initialize:
+                self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), timeout=10)
+            conn.row_factory = sqlite3.Row
+            if initialize:
+                try:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.executescript(_SCHEMA)
+                except sqlite3.Error:
+                    conn.close()
+                    raise
+                _initialized.add(key)
+        return conn
+
+    def _upsert_row(self, conn: sqlite3.Connection, row: Dict[str, Any]) -> None:
+        conn.execute(
+            """
+            INSERT INTO sessions (session_id, target, mode, hint, created_at, updated_at,
+                                  host_count, open_port_count, recommendation_count, executed_count)
+            VALUES (:session_id, :target, :mode, :hint, :created_at, :updated_at,
+                    :host_count, :open_port_count, :recommendation_count, :executed_count)
+            ON CONFLICT(session_id) DO UPDATE SET
+                target = excluded.target,
+                mode = excluded.mode,
+                hint = excluded.hint,
+                updated_at = excluded.updated_at,
+                host_count = excluded.host_count,
+                open_port_count = excluded.open_port_count,
+                recommendation_count = excluded.recommendation_count,
+                executed_count = excluded.executed_count
+            """,
+            row,
+        )
+
+    @staticmethod
+    def _row_for(session: "Session", updated_ts: Optional[float] = None) -> Dict[str, Any]:
+        updated_ts = updated_ts if updated_ts is not None else time.time()
+        counts = session.counts()
+        return {
+            "session_id": session.session_id,
+            "target": session.target,
+            "mode": session.mode,
+            "hint": session.hint or "",
+            "created_at": created_at_from_id(session.session_id, updated_ts),
+            "updated_at": _iso(updated_ts),
+            "host_count": counts["host_count"],
+            "open_port_count": counts["open_port_count"],
+            "recommendation_count": counts["recommendation_count"],
+            "executed_count": counts["executed_count"],
+        }
+
+    def upsert(self, session: "Session") -> None:
+        with self._connect() as conn:
+            self._upsert_row(conn, self._row_for(session))
+        conn.close()
+
+    def remove(self, session_id: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        conn.close()
+
+    def get(self, session_id: str) -> Optional[SessionRecord]:
+        if not self.db_path.exists():
+            return None
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT * FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        finally:
+            conn.close()
+        return SessionRecord(**dict(row)) if row else None
+
+    def query(
+        self,
+        target: Optional[str] = None,
+        mode: Optional[str] = None,
+        since: Optional[str] = None,
+        sort: str = "date",
+        descending: bool = True,
+        limit: Optional[int] = None,
+    ) -> List[SessionRecord]:
+        """List sessions, optionally filtered by target substring, mode and minimum creation date."""
+        if not self.db_path.exists():
+            return []
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"Unknown sort key: {sort} (expected one of {', '.join(SORT_COLUMNS)})")
+
+        clauses: List[str] = []
+        params: List[Any] = []
+        if target:
+            clauses.append("target LIKE ?")
+            params.append(f"%{target}%")
+        if mode:
+            clauses.append("mode = ?")
+            params.append(mode)
+        if since:
+            clauses.append("created_at >= ?")
+            params.append(since)
+
+        sql = "SELECT * FROM sessions"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY {SORT_COLUMNS[sort]} {'DESC' if descending else 'ASC'}, session_id"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+
+        conn = self._connect()
+        try:
+            rows = conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+        return [SessionRecord(**dict(r)) for r in rows]
+
+    def rebuild(self, sessions_root: Path) -> int:
+        """
+        Re-index every session directory under ``sessions_root``; returns the number indexed.
+
+        Container sessions are indexed from their manifest alone; legacy ``session.json``
+        files are parsed in full.
+        """
+        from mcp_kali_assistant.core import session_store
+        from mcp_kali_assistant.core.session import Session
+
+        rows: List[Dict[str, Any]] = []
+        for item in sorted(sessions_root.iterdir()):
+            path = session_store.session_file(item) if item.is_dir() else None
+            if path is None:
+                continue
+            try:
+                session = Session.load(sessions_root, item.name)
+            except (OSError, ValueError, TypeError):
+                continue
+            rows.append(self._row_for(session, updated_ts=path.stat().st_mtime))
+
+        with self._connect() as conn:
+            conn.execute("DELETE FROM sessions")
+            for row in rows:
+                self._upsert_row(conn, row)
+        conn.close()
+        return len(rows)
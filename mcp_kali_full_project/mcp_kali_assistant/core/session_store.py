@@ -0,0 +1,189 @@
+"""
+On-disk session container: a small JSON manifest plus compressed, separately loadable parts.
+
+Layout of ``<sessions_dir>/<id>/`` (format version 2)::
+
+    session.manifest.json               format, version, the small session fields, part entries
+    parts/nmap_summary-<hash>.json.gz   bulky sections, one compressed JSON document each
+    parts/ai_raw_output-<hash>.json.gz
+
+Part files are named after the SHA-256 of their uncompressed JSON, so an unchanged part
+is never rewritten and the manifest (replaced last, atomically) always points at
+complete files; parts under ``INLINE_PART_BYTES`` are kept in the manifest itself.
+Sessions saved before the container existed are a single indented ``session.json``;
+they stay readable and can be converted with ``mcp_cli.py migrate``.
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+FORMAT_NAME = "mcp-kali-session"
+FORMAT_VERSION = 2
+MANIFEST_FILENAME = "session.manifest.json"
+LEGACY_FILENAME = "session.json"
+PARTS_DIRNAME = "parts"
+TMP_SUFFIX = ".tmp"
+
+# Codec name -> part file suffix.
+CODECS: Dict[str, str] = {"gzip": ".gz", "zstd": ".zst", "none": ""}
+DEFAULT_CODEC = "gzip"
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 9
+# Parts smaller than this (uncompressed) are kept inline in the manifest: a separate
+# file would take a whole filesystem block and an extra open for no gain.
+INLINE_PART_BYTES = 4096
+
+_default_codec = DEFAULT_CODEC
+
+
+def check_codec(codec: str) -> str:
+    """Return ``codec`` if it can be used here; raises ValueError otherwise."""
+    if codec not in CODECS:
+        raise ValueError(f"Unknown session codec: {codec} (expected one of {', '.join(CODECS)})")
+    if codec == "zstd":
+        try:
+            import zstandard  # noqa: F401
+        except ImportError:
+            raise ValueError("The zstd session codec needs the 'zstandard' package (pip install zstandard)") from None
+    return codec
+
+
+def set_default_codec(codec: str) -> None:
+    """Codec for parts written by ``Session.save`` (``general.session_codec``)."""
+    global _default_codec
+    _default_codec = check_codec(codec)
+
+
+def default_codec() -> str:
+    return _default_codec
+
+
+def compress(data: bytes, codec: str) -> bytes:
+    if codec == "gzip":
+        # mtime=0 keeps the output a pure function of the content.
+        return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    if codec == "zstd":
+        import zstandard
+
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return data
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    if codec == "gzip":
+        return gzip.decompress(data)
+    if codec == "zstd":
+        import zstandard
+
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return data
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    # Write to a temp file and rename so a crash never leaves a half-written file. The
+    # temp name is unique per writer: two processes saving one session must not share it.
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f"{path.name}.", suffix=TMP_SUFFIX)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def write_part(session_dir: Path, name: str, value: Any, codec: str, **meta: Any) -> Dict[str, Any]:
+    """
+    Store ``value`` as part ``name`` and return its manifest entry.
+
+    ``meta`` (e.g. counts the index needs) is kept in the entry so it can be read
+    without opening the part. Small parts are stored in the entry itself; otherwise
+    the file is only written if it does not exist yet.
+    """
+    raw = json.dumps(value, separators=(",", ":")).encode("utf-8")
+    if len(raw) < INLINE_PART_BYTES:
+        return {"inline": value, **meta}
+    digest = hashlib.sha256(raw).hexdigest()[:16]
+    filename = f"{name}-{digest}.json{CODECS[codec]}"
+    path = session_dir / PARTS_DIRNAME / filename
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _atomic_write(path, compress(raw, codec))
+    return {"file": f"{PARTS_DIRNAME}/{filename}", "codec": codec, "raw_bytes": len(raw), **meta}
+
+
+def read_part(session_dir: Path, entry: Dict[str, Any]) -> Any:
+    if "inline" in entry:
+        return entry["inline"]
+    with (session_dir / entry["file"]).open("rb") as f:
+        data = f.read()
+    return json.loads(decompress(data, entry.get("codec", "none")))
+
+
+def write_manifest(session_dir: Path, session: Dict[str, Any], parts: Dict[str, Dict[str, Any]]) -> Path:
+    manifest = {"format": FORMAT_NAME, "version": FORMAT_VERSION, "session": session, "parts": parts}
+    path = session_dir / MANIFEST_FILENAME
+    _atomic_write(path, json.dumps(manifest, separators=(",", ":")).encode("utf-8"))
+    return path
+
+
+def read_manifest(session_dir: Path) -> Optional[Dict[str, Any]]:
+    """The parsed manifest, or None if the directory has none; raises ValueError if unreadable."""
+    path = session_dir / MANIFEST_FILENAME
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return None
+    if manifest.get("format") != FORMAT_NAME:
+        raise ValueError(f"Not a session manifest: {path}")
+    if int(manifest.get("version", 0)) > FORMAT_VERSION:
+        raise ValueError(f"Session format version {manifest['version']} is newer than supported ({FORMAT_VERSION}): {path}")
+    return manifest
+
+
+def session_file(session_dir: Path) -> Optional[Path]:
+    """The manifest, else a legacy ``session.json``, else None (not a session directory)."""
+    for name in (MANIFEST_FILENAME, LEGACY_FILENAME):
+        path = session_dir / name
+        if path.is_file():
+            return path
+    return None
+
+
+def is_legacy(session_dir: Path) -> bool:
+    return session_file(session_dir) == session_dir / LEGACY_FILENAME
+
+
+def prune(session_dir: Path, keep: Iterable[str]) -> None:
+    """
+    Remove part files not in ``keep`` and the legacy ``session.json`` (after a manifest write).
+
+    Temp files are left alone: they may belong to a concurrent save still in progress.
+    """
+    keep = set(keep)
+    parts_dir = session_dir / PARTS_DIRNAME
+    if parts_dir.is_dir():
+        for path in parts_dir.iterdir():
+            if f"{PARTS_DIRNAME}/{path.name}" not in keep and not path.name.endswith(TMP_SUFFIX):
+                path.unlink(missing_ok=True)
+        if not keep:
+            try:
+                parts_dir.rmdir()
+            except OSError:
+                # Not empty: another save is writing into it.
+                pass
+    (session_dir / LEGACY_FILENAME).unlink(missing_ok=True)
+
+
+def directory_bytes(session_dir: Path) -> int:
+    """Total size of the files under ``session_dir``."""
+    return sum(p.stat().st_size for p in session_dir.rglob("*") if p.is_file())
@@ -0,0 +1,141 @@
+"""Lightweight per-phase timing: spans recorded on the session and child-process usage."""
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+# ru_maxrss is in kilobytes on Linux but in bytes on macOS.
+_MAXRSS_DIVISOR = 1024 if sys.platform == "darwin" else 1
+
+
+@dataclass
+class Span:
+    """
+    One timed phase or sub-step.
+
+    ``name`` is dotted (``"nmap"``, ``"nmap.scan"``, ``"enumeration.cmd_03"``); the
+    number of dots is the nesting depth. ``metrics`` holds extra numbers such as child
+    CPU time, max RSS or model token counts.
+    """
+
+    name: str
+    seconds: float = 0.0
+    metrics: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def depth(self) -> int:
+        return self.name.count(".")
+
+
+@contextmanager
+def record_span(spans: List[Span], name: str) -> Iterator[Dict[str, Any]]:
+    """
+    Time the ``with`` block into a new :class:`Span` appended to ``spans``.
+
+    The span is appended when the block starts, so parents precede their sub-steps, and
+    completed when it ends (also on errors). The yielded dict is the span's ``metrics``.
+    """
+    span = Span(name)
+    spans.append(span)
+    started = time.monotonic()
+    try:
+        yield span.metrics
+    finally:
+        span.seconds = time.monotonic() - started
+
+
+def add_span(spans: List[Span], name: str, seconds: float, **metrics: Any) -> Span:
+    """Record a span measured elsewhere (e.g. a command timed on a worker thread)."""
+    span = Span(name, seconds, {k: v for k, v in metrics.items() if v is not None})
+    spans.append(span)
+    return span
+
+
+@dataclass
+class ChildUsage:
+    """
+    Resource usage of one or more finished child processes (from ``wait4``).
+
+    On Linux a child's peak RSS also covers the memory it had between fork and exec,
+    so it is never much below the assistant's own RSS at the time of the spawn.
+    """
+
+    processes: int = 0
+    user_cpu_seconds: float = 0.0
+    system_cpu_seconds: float = 0.0
+    max_rss_kb: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    @classmethod
+    def from_rusage(cls, ru: Any) -> "ChildUsage":
+        return cls(1, ru.ru_utime, ru.ru_stime, int(ru.ru_maxrss // _MAXRSS_DIVISOR))
+
+    def add(self, other: Optional["ChildUsage"]) -> None:
+        """Fold ``other`` in: CPU times add up, max RSS is the largest seen (thread-safe)."""
+        if other is None:
+            return
+        with self._lock:
+            self.processes += other.processes
+            self.user_cpu_seconds += other.user_cpu_seconds
+            self.system_cpu_seconds += other.system_cpu_seconds
+            self.max_rss_kb = max(self.max_rss_kb, other.max_rss_kb)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Span metrics; empty when nothing was measured (e.g. no ``wait4`` on this platform)."""
+        if not self.processes:
+            return {}
+        return {
+            "child_processes": self.processes,
+            "child_user_cpu_s": round(self.user_cpu_seconds, 3),
+            "child_sys_cpu_s": round(self.system_cpu_seconds, 3),
+            "child_max_rss_kb": self.max_rss_kb,
+        }
+
+
+class ChildWaiter:
+    """
+    Wait for a ``subprocess.Popen`` child and capture its resource usage.
+
+    On POSIX the child is reaped with ``os.wait4``, which returns the CPU time and peak
+    RSS of that child (and the descendants it waited for) without affecting other
+    processes running at the same time. Elsewhere this falls back to ``proc.wait`` and
+    ``usage`` stays None. Once a waiter is used, do not call ``proc.wait`` directly.
+    """
+
+    def __init__(self, proc: subprocess.Popen):
+        self.proc = proc
+        self.usage: Optional[ChildUsage] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def _reap(self) -> None:
+        try:
+            _, status, ru = os.wait4(self.proc.pid, 0)
+        except ChildProcessError:
+            return
+        self.usage = ChildUsage.from_rusage(ru)
+        self.proc.returncode = os.waitstatus_to_exitcode(status)
+
+    def wait(self, timeout: Optional[float] = None) -> int:
+        """Like ``Popen.wait``: the exit code, or ``subprocess.TimeoutExpired`` after ``timeout``."""
+        if not hasattr(os, "wait4"):
+            return self.proc.wait(timeout=timeout)
+        if self.proc.returncode is None:
+            if timeout is None and self._thread is None:
+                self._reap()
+            else:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._reap, daemon=True)
+                    self._thread.start()
+                self._thread.join(timeout)
+                if self._thread.is_alive():
+                    raise subprocess.TimeoutExpired(self.proc.args, timeout)
+        if self.proc.returncode is None:
+            # Reaped by someone else (ECHILD); let Popen settle the exit status.
+            return self.proc.wait()
+        return self.proc.returncode
@@ -0,0 +1,162 @@
+"""Resolve the binaries a command plan needs and install missing ones in one apt transaction."""
+from __future__ import annotations
+
+import os
+import shlex
+import shutil
+import subprocess
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence
+
+# Shell builtins: they start a segment without naming a binary on PATH.
+SHELL_BUILTINS = frozenset(
+    {".", ":", "cd", "echo", "eval", "exec", "exit", "export", "printf", "read", "set", "source", "test", "true",
+     "false", "ulimit", "umask", "unset", "wait", "for", "case"}
+)
+# Reserved words after which the next word is again a command.
+SHELL_KEYWORDS = frozenset({"if", "then", "else", "elif", "fi", "while", "until", "do", "done", "esac", "{", "}", "!"})
+# Prefixes that run the next word as the actual tool. They are not resolved themselves:
+# `time` is a shell keyword (and often not a binary at all), the others are part of any
+# Kali install, and only the wrapped tool can be installed on demand.
+COMMAND_WRAPPERS = frozenset({"sudo", "env", "nice", "nohup", "stdbuf", "time", "timeout"})
+# Wrapper options whose value is the next word (e.g. `sudo -u kali`).
+_WRAPPER_VALUE_OPTIONS: Dict[str, frozenset] = {
+    "sudo": frozenset({"-u", "-g", "-C", "-D", "-h", "-p", "-r", "-t", "-U"}),
+    "env": frozenset({"-u", "-C", "-S"}),
+    "nice": frozenset({"-n"}),
+    "timeout": frozenset({"-s", "-k"}),
+    "stdbuf": frozenset({"-i", "-o", "-e"}),
+}
+_SEPARATORS = frozenset({"|", "||", "&", "&&", ";", ";;", "(", ")"})
+
+# Kali package names that differ from the binary they provide.
+TOOL_PACKAGES: Dict[str, str] = {
+    "dig": "dnsutils",
+    "nslookup": "dnsutils",
+    "host": "bind9-host",
+    "nc": "netcat-openbsd",
+    "rpcclient": "smbclient",
+    "showmount": "nfs-common",
+    "snmpwalk": "snmp",
+    "snmpget": "snmp",
+    "ldapsearch": "ldap-utils",
+    "searchsploit": "exploitdb",
+    "xfreerdp": "freerdp2-x11",
+}
+
+
+def command_tools(command: str) -> List[str]:
+    """
+    The binaries ``command`` runs, in order of appearance.
+
+    Every pipeline / list segment (``|``, ``&&``, ``;`` ...) is considered; leading
+    ``VAR=value`` assignments, wrappers such as ``sudo -u kali``, ``time`` or
+    ``timeout 60`` (only the tool they run counts) and shell builtins are skipped.
+    Unparseable quoting falls back to whitespace splitting.
+    """
+    try:
+        lexer = shlex.shlex(command, posix=True, punctuation_chars=True)
+        lexer.whitespace_split = True
+        words = list(lexer)
+    except ValueError:
+        words = command.split()
+
+    tools: List[str] = []
+    at_start = True
+    wrapper = ""
+    skip_value = False
+    for word in words:
+        if word in _SEPARATORS:
+            at_start, wrapper, skip_value = True, "", False
+            continue
+        if not at_start or word in SHELL_KEYWORDS:
+            continue
+        if "=" in word and not word.startswith("=") and word.split("=", 1)[0].isidentifier():
+            continue
+        if skip_value:
+            skip_value = False
+            continue
+        if wrapper and (word.startswith("-") or word[:1].isdigit()):
+            # Options/arguments of a wrapper, e.g. `timeout 60`, `nice -n 10` or `sudo -u kali`.
+            skip_value = word in _WRAPPER_VALUE_OPTIONS.get(wrapper, ())
+            continue
+        if word in COMMAND_WRAPPERS:
+            wrapper = word
+            continue
+        at_start, wrapper = False, ""
+        if word in SHELL_BUILTINS:
+            continue
+        if word not in tools:
+            tools.append(word)
+    return tools
+
+
+@lru_cache(maxsize=None)
+def _which(tool: str, path: Optional[str]) -> Optional[str]:
+    return shutil.which(tool, path=path)
+
+
+def which(tool: str) -> Optional[str]:
+    """``shutil.which`` cached per (tool, PATH); call :func:`clear_tool_cache` after installing."""
+    return _which(tool, os.environ.get("PATH"))
+
+
+def clear_tool_cache() -> None:
+    _which.cache_clear()
+
+
+def package_for(tool: str) -> str:
+    return TOOL_PACKAGES.get(os.path.basename(tool), os.path.basename(tool))
+
+
+@dataclass
+class ToolPlan:
+    """Which tools each command needs and which of them are not on PATH."""
+
+    tools_by_command: Dict[int, List[str]] = field(default_factory=dict)
+    missing: List[str] = field(default_factory=list)
+
+    def commands_needing(self, tool: str) -> List[int]:
+        return [idx for idx, tools in self.tools_by_command.items() if tool in tools]
+
+    def blocked_commands(self) -> Dict[int, List[str]]:
+        """Command index -> its missing tools, for commands that cannot run."""
+        blocked: Dict[int, List[str]] = {}
+        for idx, tools in self.tools_by_command.items():
+            absent = [t for t in tools if t in self.missing]
+            if absent:
+                blocked[idx] = absent
+        return blocked
+
+    def packages(self) -> List[str]:
+        """Distinct apt packages for the missing tools, in first-seen order."""
+        return list(dict.fromkeys(package_for(t) for t in self.missing))
+
+
+def plan_tools(commands: Dict[int, str]) -> ToolPlan:
+    """Resolve every distinct binary used by ``commands`` (index -> command line) once."""
+    plan = ToolPlan({idx: command_tools(cmd) for idx, cmd in commands.items()})
+    distinct = dict.fromkeys(t for tools in plan.tools_by_command.values() for t in tools)
+    plan.missing = [t for t in distinct if which(t) is None]
+    return plan
+
+
+def refresh_plan(plan: ToolPlan) -> ToolPlan:
+    """Re-check the missing tools (after an install) against a fresh PATH lookup."""
+    clear_tool_cache()
+    plan.missing = [t for t in plan.missing if which(t) is None]
+    return plan
+
+
+def apt_install_commands(packages: Sequence[str]) -> List[List[str]]:
+    return [["sudo", "apt-get", "update"], ["sudo", "apt-get", "install", "-y", *packages]]
+
+
+def install_packages(packages: Iterable[str]) -> None:
+    """One ``apt-get update`` and one ``apt-get install`` for all ``packages``; raises CalledProcessError."""
+    packages = list(packages)
+    if not packages:
+        return
+    for cmd in apt_install_commands(packages):
+        subprocess.run(cmd, check=True)
@@ -0,0 +1,43 @@
+"""Rich console created on first use, so importing a module does not load Rich."""
+from __future__ import annotations
+
+import threading
+from typing import TYPE_CHECKING, Any, Optional
+
+if TYPE_CHECKING:
+    from rich.console import Console
+
+
+class LazyConsole:
+    """
+    Stand-in for a module-level ``rich.console.Console``.
+
+    Rich is imported and the console constructed (with ``kwargs``) the first time any
+    attribute is used; after that every attribute is forwarded to the real console, so
+    it can be passed wherever Rich expects a console.
+    """
+
+    def __init__(self, **kwargs: Any):
+        self._kwargs = kwargs
+        self._console: Optional["Console"] = None
+        self._lock = threading.Lock()
+
+    @property
+    def real(self) -> "Console":
+        if self._console is None:
+            with self._lock:
+                if self._console is None:
+                    from rich.console import Console
+
+                    self._console = Console(**self._kwargs)
+        return self._console
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.real, name)
+
+    # Special methods bypass __getattr__; Rich uses the console as a context manager.
+    def __enter__(self) -> "Console":
+        return self.real.__enter__()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.real.__exit__(*exc)
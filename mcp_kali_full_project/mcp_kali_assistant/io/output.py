@@ -0,0 +1,203 @@
+"""Shared, batched console output for high-volume tool output."""
+from __future__ import annotations
+
+import atexit
+import queue
+import threading
+from dataclasses import dataclass
+from typing import List, Optional, Union
+
+from rich.console import Console, RenderableType
+from rich.text import Text
+
+QUIET = "quiet"
+SUMMARY = "summary"
+RAW = "raw"
+VERBOSITY_LEVELS = (QUIET, SUMMARY, RAW)
+DEFAULT_VERBOSITY = SUMMARY
+
+# Message levels: RAW lines show only in raw mode, SUMMARY items in summary and raw
+# mode, ERROR items always.
+ERROR = "error"
+_LEVEL_RANK = {RAW: 0, SUMMARY: 1, ERROR: 2}
+_VERBOSITY_THRESHOLD = {RAW: 0, SUMMARY: 1, QUIET: 2}
+
+DEFAULT_MAX_REDRAWS_PER_SECOND = 10
+DEFAULT_QUEUE_SIZE = 10000
+
+
+@dataclass
+class _Item:
+    level: str
+    source: str
+    content: Union[str, RenderableType]
+
+
+class OutputSink:
+    """
+    Non-blocking sink that batches tool output onto one console.
+
+    Producers call :meth:`line` (plain text, never parsed as markup) or :meth:`show`
+    (any Rich renderable) from any thread; both only enqueue and return immediately.
+    When the queue is full new items are dropped and counted instead of blocking. A
+    writer thread wakes at most ``max_redraws_per_second`` times per second, collapses
+    consecutive repeated lines into one ``(xN)`` line and prints each batch in a single
+    write. ``verbosity`` decides what is shown: ``quiet`` (errors only), ``summary``
+    (previews and results) or ``raw`` (every output line too).
+    """
+
+    def __init__(
+        self,
+        verbosity: str = DEFAULT_VERBOSITY,
+        console: Optional[Console] = None,
+        max_redraws_per_second: float = DEFAULT_MAX_REDRAWS_PER_SECOND,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+    ):
+        if verbosity not in VERBOSITY_LEVELS:
+            raise ValueError(f"Unknown verbosity: {verbosity} (expected one of {', '.join(VERBOSITY_LEVELS)})")
+        self.verbosity = verbosity
+        self.console = console or Console()
+        self.interval = 1.0 / max(0.1, max_redraws_per_second)
+        self._queue: "queue.Queue[_Item]" = queue.Queue(maxsize=max(1, queue_size))
+        self._dropped = 0
+        self._dropped_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+        self._render_lock = threading.Lock()
+
+    def wants(self, level: str) -> bool:
+        return _LEVEL_RANK[level] >= _VERBOSITY_THRESHOLD[self.verbosity]
+
+    @property
+    def raw(self) -> bool:
+        return self.verbosity == RAW
+
+    @property
+    def quiet(self) -> bool:
+        return self.verbosity == QUIET
+
+    def _put(self, item: _Item) -> None:
+        if not self.wants(item.level):
+            return
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            with self._dropped_lock:
+                self._dropped += 1
+
+    def line(self, text: str, source: str = "", level: str = RAW) -> None:
+        self._put(_Item(level, source, text))
+
+    def show(self, renderable: RenderableType, level: str = SUMMARY) -> None:
+        """Queue a renderable; plain strings are treated as console markup."""
+        if isinstance(renderable, str):
+            renderable = Text.from_markup(renderable)
+        self._put(_Item(level, "", renderable))
+
+    def _ensure_writer(self) -> None:
+        if self._writer is not None:
+            return
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._run, name="output-sink", daemon=True)
+                self._writer.start()
+
+    def _drain(self) -> List[_Item]:
+        items: List[_Item] = []
+        while True:
+            try:
+                items.append(self._queue.get_nowait())
+            except queue.Empty:
+                return items
+
+    def _render_batch(self, items: List[_Item]) -> None:
+        pending = Text()
+        last_key = None
+        repeats = 0
+
+        def close_line() -> None:
+            if last_key is not None:
+                source, text = last_key
+                if source:
+                    pending.append(f"[{source}] ", style="dim")
+                pending.append(text)
+                if repeats > 1:
+                    pending.append(f"  (x{repeats})", style="dim")
+                pending.append("\n")
+
+        def flush_text() -> None:
+            nonlocal pending
+            if pending:
+                pending.rstrip()
+                self.console.print(pending, highlight=False)
+                pending = Text()
+
+        for item in items:
+            if isinstance(item.content, str):
+                key = (item.source, item.content)
+                if key == last_key:
+                    repeats += 1
+                    continue
+                close_line()
+                last_key, repeats = key, 1
+                continue
+            close_line()
+            last_key, repeats = None, 0
+            flush_text()
+            self.console.print(item.content)
+        close_line()
+        flush_text()
+
+        with self._dropped_lock:
+            dropped, self._dropped = self._dropped, 0
+        if dropped:
+            self.console.print(Text(f"[output sink] {dropped} line(s) dropped (console too slow)", style="yellow"))
+
+    def _render_pending(self) -> None:
+        with self._render_lock:
+            items = self._drain()
+            if items or self._dropped:
+                self._render_batch(items)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._render_pending()
+        self._render_pending()
+
+    def flush(self) -> None:
+        """Print everything queued so far (from the calling thread)."""
+        self._render_pending()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._writer is not None:
+            self._writer.join()
+
+
+_sink: Optional[OutputSink] = None
+_sink_lock = threading.Lock()
+
+
+def output_sink() -> OutputSink:
+    """The process-wide sink (created with the default verbosity on first use)."""
+    global _sink
+    if _sink is None:
+        with _sink_lock:
+            if _sink is None:
+                _sink = OutputSink()
+                atexit.register(_sink.close)
+    return _sink
+
+
+def configure_output(verbosity: str, max_redraws_per_second: float = DEFAULT_MAX_REDRAWS_PER_SECOND) -> OutputSink:
+    """Replace the process-wide sink, flushing whatever the previous one still held."""
+    global _sink
+    sink = OutputSink(verbosity=verbosity, max_redraws_per_second=max_redraws_per_second)
+    with _sink_lock:
+        previous, _sink = _sink, sink
+    if previous is not None:
+        previous.close()
+    atexit.register(sink.close)
+    return sink
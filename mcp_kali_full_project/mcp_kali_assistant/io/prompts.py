@@ -2,11 +2,12 @@ from __future__ import annotations
 
 from typing import Tuple
 
-from rich.console import Console
 from rich.panel import Panel
 from rich.prompt import Confirm, Prompt
 
-console = Console()
+from mcp_kali_assistant.io.console import LazyConsole
+
+console = LazyConsole()
 
 DISCLAIMER_TEXT = """[bold red]LEGAL / ETHICAL USE ONLY[/bold red]
 
@@ -1,12 +1,14 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Union
 
-from rich.console import Console
 from rich.panel import Panel
 from rich.table import Table
 
-console = Console()
+from mcp_kali_assistant.io.console import LazyConsole
+from mcp_kali_assistant.parsers.models import NmapSummary
+
+console = LazyConsole()
 
 
 def summarize_reachability(reachability: Dict[str, Any]) -> None:
@@ -16,13 +18,23 @@ def summarize_reachability(reachability: Dict[str, Any]) -> None:
     lines.append("TCP checks:")
     for port, status in reachability.get("tcp_checks", {}).items():
         lines.append(f"  - Port {port}: {'open' if status else 'closed/unreachable'}")
+    per_host = reachability.get("hosts") or []
+    if per_host:
+        alive = [h for h in per_host if h.get("icmp_reachable") or any(h.get("tcp_checks", {}).values())]
+        lines.append(f"Hosts responding: {len(alive)}/{len(per_host)}")
+        for h in alive:
+            open_ports = [str(p) for p, ok in h.get("tcp_checks", {}).items() if ok]
+            lines.append(
+                f"  - {h.get('target')}: ICMP {'yes' if h.get('icmp_reachable') else 'no'}, "
+                f"TCP open: {', '.join(open_ports) or 'none'}"
+            )
     text = "\n".join(lines)
     style = "green" if reachability.get("icmp_reachable") or any(reachability.get("tcp_checks", {}).values()) else "red"
     console.print(Panel(text, title="Phase 1 – Reachability Summary", border_style=style))
 
 
-def summarize_nmap(nmap_summary: Dict[str, Any]) -> None:
-    hosts = nmap_summary.get("hosts", [])
+def summarize_nmap(nmap_summary: Union[NmapSummary, Dict[str, Any]]) -> None:
+    hosts = NmapSummary.coerce(nmap_summary).hosts
     if not hosts:
         console.print(Panel("No hosts found in Nmap results.", title="Phase 2 – Nmap Summary", border_style="red"))
         return
@@ -34,24 +46,23 @@ def summarize_nmap(nmap_summary: Dict[str, Any]) -> None:
     table.add_column("Open Ports (proto/service)")
 
     for host in hosts:
-        addr = host.get("address", "?")
-        addr_type = host.get("addr_type", "?")
-        os_guess = host.get("os_guess", "Unknown")
-        ports_desc = []
-        for p in host.get("ports", []):
-            if p.get("state") == "open":
-                ports_desc.append(f"{p.get('portid')}/{p.get('protocol')} ({p.get('service_name')})")
-        table.add_row(addr, addr_type, os_guess, "\n".join(ports_desc) if ports_desc else "None")
+        ports_desc = [f"{p.portid}/{p.protocol} ({p.service_name})" for p in host.open_ports()]
+        table.add_row(
+            host.address or "?",
+            host.addr_type or "?",
+            host.os_guess or "Unknown",
+            "\n".join(ports_desc) if ports_desc else "None",
+        )
 
     console.print(table)
 
 
-def show_ai_command_table(commands: List[Dict[str, Any]]) -> None:
-    if not commands:
-        console.print(Panel("No AI recommendations available.", title="Phase 3 – AI Strategy", border_style="red"))
-        return
-
-    table = Table(title="Phase 3 – AI-Recommended Enumeration Commands", show_lines=True)
+def build_ai_command_table(
+    commands: List[Dict[str, Any]],
+    start: int = 1,
+    caption: Optional[str] = None,
+) -> Table:
+    table = Table(title="Phase 3 – AI-Recommended Enumeration Commands", show_lines=True, caption=caption)
     table.add_column("#", justify="right")
     table.add_column("Name")
     table.add_column("Category")
@@ -59,7 +70,7 @@ def show_ai_command_table(commands: List[Dict[str, Any]]) -> None:
     table.add_column("Command")
     table.add_column("Rationale")
 
-    for i, cmd in enumerate(commands, start=1):
+    for i, cmd in enumerate(commands, start=start):
         table.add_row(
             str(i),
             cmd.get("name", f"cmd_{i}"),
@@ -68,5 +79,12 @@ def show_ai_command_table(commands: List[Dict[str, Any]]) -> None:
             cmd.get("command", ""),
             cmd.get("rationale", ""),
         )
+    return table
 
-    console.print(table)
+
+def show_ai_command_table(commands: List[Dict[str, Any]], start: int = 1) -> None:
+    if not commands:
+        console.print(Panel("No AI recommendations available.", title="Phase 3 – AI Strategy", border_style="red"))
+        return
+
+    console.print(build_ai_command_table(commands, start=start))
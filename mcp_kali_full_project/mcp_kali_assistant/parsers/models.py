@@ -0,0 +1,143 @@
+"""Compact host/port model for parsed Nmap results."""
+from __future__ import annotations
+
+import sys
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if value is not None else None
+
+
+class Port:
+    """A single scanned port. Repetitive strings (protocol, state, service...) are interned."""
+
+    __slots__ = ("portid", "protocol", "state", "reason", "service_name", "product", "version", "extrainfo")
+
+    def __init__(
+        self,
+        portid: Optional[str],
+        protocol: Optional[str],
+        state: Optional[str],
+        reason: Optional[str] = None,
+        service_name: Optional[str] = None,
+        product: Optional[str] = None,
+        version: Optional[str] = None,
+        extrainfo: Optional[str] = None,
+    ):
+        self.portid = _intern(portid)
+        self.protocol = _intern(protocol)
+        self.state = _intern(state)
+        self.reason = _intern(reason)
+        self.service_name = _intern(service_name)
+        self.product = _intern(product)
+        self.version = _intern(version)
+        self.extrainfo = extrainfo
+
+    @property
+    def is_open(self) -> bool:
+        return self.state == "open"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in Port.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Port":
+        return cls(**{name: data.get(name) for name in Port.__slots__})
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Port):
+            return NotImplemented
+        return all(getattr(self, n) == getattr(other, n) for n in Port.__slots__)
+
+    def __repr__(self) -> str:
+        return f"Port({self.portid}/{self.protocol} {self.state} {self.service_name})"
+
+
+class Host:
+    """A host that was up during the scan, with its ports."""
+
+    __slots__ = ("address", "addr_type", "os_guess", "ports")
+
+    def __init__(
+        self,
+        address: Optional[str],
+        addr_type: Optional[str] = None,
+        os_guess: str = "Unknown",
+        ports: Optional[List[Port]] = None,
+    ):
+        self.address = address
+        self.addr_type = _intern(addr_type)
+        self.os_guess = _intern(os_guess)
+        self.ports: List[Port] = ports if ports is not None else []
+
+    def open_ports(self) -> List[Port]:
+        return [p for p in self.ports if p.is_open]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "address": self.address,
+            "addr_type": self.addr_type,
+            "os_guess": self.os_guess,
+            "ports": [p.to_dict() for p in self.ports],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Host":
+        return cls(
+            address=data.get("address"),
+            addr_type=data.get("addr_type"),
+            os_guess=data.get("os_guess", "Unknown"),
+            ports=[Port.from_dict(p) for p in data.get("ports") or []],
+        )
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Host):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return f"Host({self.address}, {len(self.ports)} ports)"
+
+
+class NmapSummary:
+    """All hosts parsed from one scan. Serialises to the historical ``{"hosts": [...]}`` dict."""
+
+    __slots__ = ("hosts",)
+
+    def __init__(self, hosts: Optional[Iterable[Host]] = None):
+        self.hosts: List[Host] = list(hosts) if hosts is not None else []
+
+    def __bool__(self) -> bool:
+        return bool(self.hosts)
+
+    def __len__(self) -> int:
+        return len(self.hosts)
+
+    def __iter__(self):
+        return iter(self.hosts)
+
+    def open_port_count(self) -> int:
+        return sum(len(h.open_ports()) for h in self.hosts)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"hosts": [h.to_dict() for h in self.hosts]}
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> "NmapSummary":
+        return cls(Host.from_dict(h) for h in (data or {}).get("hosts") or [])
+
+    @classmethod
+    def coerce(cls, value: Union["NmapSummary", Dict[str, Any], None]) -> "NmapSummary":
+        """Accept either a model instance or a legacy ``{"hosts": [...]}`` dict."""
+        if isinstance(value, NmapSummary):
+            return value
+        return cls.from_dict(value)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, NmapSummary):
+            return NotImplemented
+        return self.hosts == other.hosts
+
+    def __repr__(self) -> str:
+        return f"NmapSummary({len(self.hosts)} hosts)"
@@ -1,70 +1,149 @@
+"""Parsing utilities (e.g., Nmap XML)."""
 from __future__ import annotations
 
 import xml.etree.ElementTree as ET
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Collection, Dict, Iterator, List, Optional
 
+from mcp_kali_assistant.parsers.models import Host, NmapSummary, Port
 
-def parse_nmap_xml(xml_path: Path) -> Dict[str, Any]:
+
+def parse_host_element(host: ET.Element, states: Optional[Collection[str]] = None) -> Optional[Host]:
+    """
+    Convert a single ``<host>`` element into a :class:`Host`.
+
+    Returns None for hosts that are not up. When ``states`` is given only ports whose
+    state is in it (e.g. ``{"open"}``) are kept.
+    """
+    status = host.find("status")
+    if status is not None and status.get("state") != "up":
+        return None
+
+    address_el = host.find("address")
+    addr = address_el.get("addr") if address_el is not None else None
+    addr_type = address_el.get("addrtype") if address_el is not None else None
+
+    ports_info: List[Port] = []
+    ports_el = host.find("ports")
+    if ports_el is not None:
+        for port_el in ports_el.findall("port"):
+            state_el = port_el.find("state")
+            state = state_el.get("state") if state_el is not None else None
+            if states is not None and state not in states:
+                continue
+            service_el = port_el.find("service")
+
+            ports_info.append(
+                Port(
+                    portid=port_el.get("portid"),
+                    protocol=port_el.get("protocol"),
+                    state=state,
+                    reason=state_el.get("reason") if state_el is not None else None,
+                    service_name=service_el.get("name") if service_el is not None else None,
+                    product=service_el.get("product") if service_el is not None else None,
+                    version=service_el.get("version") if service_el is not None else None,
+                    extrainfo=service_el.get("extrainfo") if service_el is not None else None,
+                )
+            )
+
+    os_guess = "Unknown"
+    os_el = host.find("os")
+    if os_el is not None:
+        os_match = os_el.find("osmatch")
+        if os_match is not None and os_match.get("name"):
+            os_guess = os_match.get("name")
+
+    return Host(address=addr, addr_type=addr_type, os_guess=os_guess, ports=ports_info)
+
+
+def iter_nmap_hosts(xml_path: Path, states: Optional[Collection[str]] = None) -> Iterator[Host]:
+    """
+    Stream hosts out of an Nmap XML file one at a time.
+
+    Built on ``iterparse``: each ``<host>`` element is cleared (and detached from the
+    root) as soon as it has been converted, so memory stays flat regardless of file size.
+    """
     if not xml_path.exists():
         raise FileNotFoundError(f"Nmap XML not found at {xml_path}")
 
-    tree = ET.parse(str(xml_path))
-    root = tree.getroot()
+    state_filter = frozenset(states) if states is not None else None
+    root: Optional[ET.Element] = None
+    depth = 0
 
-    hosts_summary: List[Dict[str, Any]] = []
+    for event, elem in ET.iterparse(str(xml_path), events=("start", "end")):
+        if event == "start":
+            if root is None:
+                root = elem
+            depth += 1
+            continue
 
-    for host in root.findall("host"):
-        status = host.find("status")
-        if status is not None and status.get("state") != "up":
+        depth -= 1
+        # Only top-level <host> elements (direct children of <nmaprun>) are hosts.
+        if elem.tag != "host" or depth != 1:
             continue
 
-        address_el = host.find("address")
-        addr = address_el.get("addr") if address_el is not None else None
-        addr_type = address_el.get("addrtype") if address_el is not None else None
-
-        ports_info: List[Dict[str, Any]] = []
-        ports_el = host.find("ports")
-        if ports_el is not None:
-            for port_el in ports_el.findall("port"):
-                portid = port_el.get("portid")
-                protocol = port_el.get("protocol")
-                state_el = port_el.find("state")
-                service_el = port_el.find("service")
-                state = state_el.get("state") if state_el is not None else None
-                reason = state_el.get("reason") if state_el is not None else None
-                service_name = service_el.get("name") if service_el is not None else None
-                product = service_el.get("product") if service_el is not None else None
-                version = service_el.get("version") if service_el is not None else None
-                extrainfo = service_el.get("extrainfo") if service_el is not None else None
-
-                ports_info.append(
-                    {
-                        "portid": portid,
-                        "protocol": protocol,
-                        "state": state,
-                        "reason": reason,
-                        "service_name": service_name,
-                        "product": product,
-                        "version": version,
-                        "extrainfo": extrainfo,
-                    }
-                )
+        parsed = parse_host_element(elem, state_filter)
+        elem.clear()
+        if root is not None:
+            root.clear()
+        if parsed is not None:
+            yield parsed
+
+
+class NmapHostWatcher:
+    """
+    Incrementally parse an Nmap XML file that is still being written.
+
+    Nmap flushes each ``<host>`` element to its ``-oX`` file when that host is done;
+    every :meth:`poll` feeds the bytes appended since the last call to an
+    ``XMLPullParser`` and returns the hosts completed in between. A missing file (nmap
+    not started yet) simply yields nothing.
+    """
+
+    def __init__(self, xml_path: Path, states: Optional[Collection[str]] = None):
+        self.xml_path = xml_path
+        self._states = frozenset(states) if states is not None else None
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._offset = 0
+        self._root: Optional[ET.Element] = None
+        self._depth = 0
+
+    def poll(self) -> List[Host]:
+        try:
+            with self.xml_path.open("rb") as f:
+                f.seek(self._offset)
+                data = f.read()
+        except FileNotFoundError:
+            return []
+        if not data:
+            return []
+        self._offset += len(data)
+        self._parser.feed(data)
+
+        hosts: List[Host] = []
+        for event, elem in self._parser.read_events():
+            if event == "start":
+                if self._root is None:
+                    self._root = elem
+                self._depth += 1
+                continue
+            self._depth -= 1
+            if elem.tag != "host" or self._depth != 1:
+                continue
+            parsed = parse_host_element(elem, self._states)
+            elem.clear()
+            if self._root is not None:
+                self._root.clear()
+            if parsed is not None:
+                hosts.append(parsed)
+        return hosts
+
+
+def load_nmap_summary(xml_path: Path, states: Optional[Collection[str]] = None) -> NmapSummary:
+    """Parse an Nmap XML file into an :class:`NmapSummary` (optionally keeping only ports in ``states``)."""
+    return NmapSummary(iter_nmap_hosts(xml_path, states))
+
 
-        os_guess = "Unknown"
-        os_el = host.find("os")
-        if os_el is not None:
-            os_match = os_el.find("osmatch")
-            if os_match is not None and os_match.get("name"):
-                os_guess = os_match.get("name")
-
-        hosts_summary.append(
-            {
-                "address": addr,
-                "addr_type": addr_type,
-                "os_guess": os_guess,
-                "ports": ports_info,
-            }
-        )
-
-    return {"hosts": hosts_summary}
+def parse_nmap_xml(xml_path: Path, states: Optional[Collection[str]] = None) -> Dict[str, Any]:
+    """Parse an Nmap XML file into the plain ``{"hosts": [...]}`` dict form."""
+    return {"hosts": [host.to_dict() for host in iter_nmap_hosts(xml_path, states)]}
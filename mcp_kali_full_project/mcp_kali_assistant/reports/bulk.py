@@ -0,0 +1,177 @@
+"""Incremental report regeneration across many sessions."""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from mcp_kali_assistant.core import session_store
+from mcp_kali_assistant.core.session import Session
+from mcp_kali_assistant.reports.sections import DEFAULT_LOG_EXCERPT_BYTES
+from mcp_kali_assistant.reports.writer import RENDERERS, REPORT_GENERATOR_VERSION, write_report
+
+STAMP_SUFFIX = ".stamp"
+
+REBUILT = "rebuilt"
+SKIPPED = "skipped"
+FAILED = "failed"
+
+
+@dataclass
+class ReportJob:
+    session_id: str
+    sessions_root: Path
+    reports_root: Path
+    fmt: str = "markdown"
+    log_excerpt_bytes: int = DEFAULT_LOG_EXCERPT_BYTES
+
+
+@dataclass
+class ReportOutcome:
+    session_id: str
+    status: str
+    report_path: Optional[Path] = None
+    error: str = ""
+
+
+@dataclass
+class BulkReportResult:
+    outcomes: List[ReportOutcome] = field(default_factory=list)
+    elapsed_seconds: float = 0.0
+
+    def count(self, status: str) -> int:
+        return sum(1 for o in self.outcomes if o.status == status)
+
+
+def report_path_for(job: ReportJob) -> Path:
+    return job.reports_root / f"{job.session_id}{RENDERERS[job.fmt].extension}"
+
+
+def stamp_path_for(report_path: Path) -> Path:
+    return report_path.with_name(report_path.name + STAMP_SUFFIX)
+
+
+def session_content_hash(job: ReportJob) -> str:
+    """
+    SHA-256 of the session file plus the options that change the rendered report.
+
+    For a container that is the manifest only: it names every part by content hash.
+    """
+    h = hashlib.sha256(f"{job.fmt}\0{job.log_excerpt_bytes}\0".encode())
+    session_dir = job.sessions_root / job.session_id
+    path = session_store.session_file(session_dir)
+    if path is None:
+        raise FileNotFoundError(f"Session not found: {session_dir}")
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _read_stamp(stamp_path: Path) -> Dict[str, object]:
+    try:
+        with stamp_path.open("r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_stamp(report_path: Path, content_hash: str) -> None:
+    """Record which session content and generator version produced ``report_path``."""
+    stamp_path = stamp_path_for(report_path)
+    tmp = stamp_path.with_name(stamp_path.name + ".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        json.dump({"generator_version": REPORT_GENERATOR_VERSION, "content_hash": content_hash}, f)
+    os.replace(tmp, stamp_path)
+
+
+def is_up_to_date(job: ReportJob, content_hash: str) -> bool:
+    report_path = report_path_for(job)
+    if not report_path.exists():
+        return False
+    stamp = _read_stamp(stamp_path_for(report_path))
+    return stamp.get("generator_version") == REPORT_GENERATOR_VERSION and stamp.get("content_hash") == content_hash
+
+
+def build_report(job: ReportJob, content_hash: Optional[str] = None) -> ReportOutcome:
+    """Render one session's report and its stamp (runs in a worker process)."""
+    try:
+        content_hash = content_hash or session_content_hash(job)
+        session = Session.load(job.sessions_root, job.session_id)
+        report_path = write_report(session, job.reports_root, fmt=job.fmt, log_excerpt_bytes=job.log_excerpt_bytes)
+        write_stamp(report_path, content_hash)
+    except Exception as e:  # noqa: BLE001 - one broken session must not stop the batch
+        return ReportOutcome(job.session_id, FAILED, error=f"{type(e).__name__}: {e}")
+    return ReportOutcome(job.session_id, REBUILT, report_path=report_path)
+
+
+def _build_job(args: Tuple[ReportJob, str]) -> ReportOutcome:
+    return build_report(*args)
+
+
+def session_ids(sessions_root: Path) -> List[str]:
+    """Every session directory with a manifest or ``session.json`` (read from disk, not the index)."""
+    if not sessions_root.exists():
+        return []
+    return sorted(p.name for p in sessions_root.iterdir() if session_store.session_file(p) is not None)
+
+
+def regenerate_reports(
+    sessions_root: Path,
+    reports_root: Path,
+    fmt: str = "markdown",
+    log_excerpt_bytes: int = DEFAULT_LOG_EXCERPT_BYTES,
+    force: bool = False,
+    max_workers: Optional[int] = None,
+    on_outcome: Optional[Callable[[ReportOutcome], None]] = None,
+) -> BulkReportResult:
+    """
+    Rebuild the reports of all sessions under ``sessions_root`` in a process pool.
+
+    A report is skipped (unless ``force``) when its sidecar stamp records the current
+    ``REPORT_GENERATOR_VERSION`` and the hash of the session's manifest (or legacy
+    ``session.json``) with the same format options. Hashing happens in this process,
+    so a fully up-to-date tree never starts the pool.
+    """
+    started = time.monotonic()
+    result = BulkReportResult()
+
+    def record(outcome: ReportOutcome) -> None:
+        result.outcomes.append(outcome)
+        if on_outcome is not None:
+            on_outcome(outcome)
+
+    pending: List[Tuple[ReportJob, str]] = []
+    for session_id in session_ids(sessions_root):
+        job = ReportJob(session_id, sessions_root, reports_root, fmt, log_excerpt_bytes)
+        try:
+            content_hash = session_content_hash(job)
+        except OSError as e:
+            record(ReportOutcome(session_id, FAILED, error=str(e)))
+            continue
+        if not force and is_up_to_date(job, content_hash):
+            record(ReportOutcome(session_id, SKIPPED, report_path=report_path_for(job)))
+            continue
+        pending.append((job, content_hash))
+
+    if pending:
+        reports_root.mkdir(parents=True, exist_ok=True)
+        workers = max(1, min(max_workers or os.cpu_count() or 1, len(pending)))
+        if workers == 1:
+            for item in pending:
+                record(_build_job(item))
+        else:
+            # Imported here: multiprocessing is only needed when reports are rebuilt in parallel.
+            from concurrent.futures import ProcessPoolExecutor
+
+            chunksize = max(1, len(pending) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for outcome in pool.map(_build_job, pending, chunksize=chunksize):
+                    record(outcome)
+
+    result.elapsed_seconds = time.monotonic() - started
+    return result
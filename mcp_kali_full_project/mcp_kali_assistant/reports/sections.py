@@ -0,0 +1,224 @@
+"""Format-independent section model of a session report."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from mcp_kali_assistant.core.session import Session
+
+DEFAULT_LOG_EXCERPT_BYTES = 4096
+
+
+@dataclass
+class Heading:
+    text: str
+
+
+@dataclass
+class Paragraph:
+    text: str
+
+
+@dataclass
+class Field:
+    label: str
+    value: Any
+    # Render the value as inline code (Markdown backticks / HTML <code>).
+    code: bool = True
+
+
+@dataclass
+class Bullets:
+    items: List[str]
+    label: Optional[str] = None
+    # Nest under the preceding field instead of starting a new list.
+    nested: bool = False
+
+
+@dataclass
+class Excerpt:
+    title: str
+    text: str
+    truncated: bool = False
+
+
+@dataclass
+class Table:
+    headers: List[str]
+    rows: List[List[str]]
+
+
+Block = Union[Heading, Paragraph, Field, Bullets, Excerpt, Table]
+
+
+@dataclass
+class Section:
+    id: str
+    title: str
+    # Produced lazily so renderers can stream a section block by block.
+    blocks: Iterator[Block]
+
+
+def read_log_excerpt(path: Path, max_bytes: int = DEFAULT_LOG_EXCERPT_BYTES) -> Tuple[str, bool]:
+    """
+    Read at most ``max_bytes`` of a log: the whole file if it fits, else its head and tail.
+
+    Returns ``(text, truncated)``; a missing log yields an empty excerpt.
+    """
+    try:
+        with path.open("rb") as f:
+            f.seek(0, 2)
+            size = f.tell()
+            f.seek(0)
+            if size <= max_bytes:
+                return f.read().decode("utf-8", errors="replace"), False
+            half = max_bytes // 2
+            head = f.read(half)
+            f.seek(size - half)
+            tail = f.read(half)
+    except OSError:
+        return "", False
+    text = head.decode("utf-8", errors="replace") + "\n[...]\n" + tail.decode("utf-8", errors="replace")
+    return text, True
+
+
+def _notice() -> Iterator[Block]:
+    yield Paragraph("This report was generated for an **authorized** testing or CTF lab scenario only.")
+    yield Paragraph("Do not use this data for any form of unauthorized activity.")
+
+
+def _target(session: Session) -> Iterator[Block]:
+    yield Field("Target", session.target)
+    yield Field("Mode", session.mode)
+    if session.hint:
+        yield Field("CTF Hint/Context", session.hint)
+
+
+def _reachability(session: Session) -> Iterator[Block]:
+    r = session.reachability or {}
+    yield Field("ICMP reachable", r.get("icmp_reachable"))
+    yield Bullets(
+        [f"{port}: {'open/reachable' if status else 'closed/unreachable'}" for port, status in (r.get("tcp_checks") or {}).items()],
+        label="TCP checks",
+    )
+    per_host = r.get("hosts") or []
+    if per_host:
+        alive = [h for h in per_host if h.get("icmp_reachable") or any((h.get("tcp_checks") or {}).values())]
+        yield Field("Hosts responding", f"{len(alive)}/{len(per_host)}")
+        yield Bullets(
+            [
+                f"{h.get('target')}: ICMP {h.get('icmp_reachable')}, TCP open: "
+                f"{', '.join(str(p) for p, ok in (h.get('tcp_checks') or {}).items() if ok) or 'none'}"
+                for h in alive
+            ],
+            nested=True,
+        )
+
+
+def _nmap(session: Session) -> Iterator[Block]:
+    if not session.nmap_summary.hosts:
+        yield Paragraph("No hosts or open ports discovered by Nmap.")
+        return
+    for host in session.nmap_summary.hosts:
+        yield Heading(f"Host {host.address} ({host.addr_type})")
+        yield Field("OS Guess", host.os_guess or "Unknown", code=False)
+        ports = [
+            f"{p.portid}/{p.protocol} ({' '.join(x for x in (p.service_name, p.product, p.version) if x)})"
+            for p in host.open_ports()
+        ]
+        yield Bullets(ports or ["None"], label="Open Ports")
+
+
+def _recommendations(session: Session) -> Iterator[Block]:
+    if not session.ai_recommendations:
+        yield Paragraph("No AI recommendations were recorded (AI offline or disabled).")
+        return
+    for i, rcmd in enumerate(session.ai_recommendations, start=1):
+        yield Heading(f"Step {i}: {rcmd.get('name')}")
+        yield Field("Category", rcmd.get("category", "generic"))
+        yield Field("Priority", rcmd.get("priority", 5))
+        yield Field("Command", rcmd.get("command"))
+        if rcmd.get("rationale"):
+            yield Field("Rationale", rcmd.get("rationale"), code=False)
+        if rcmd.get("notes"):
+            yield Field("Notes", rcmd.get("notes"), code=False)
+
+
+def _executed(session: Session, log_excerpt_bytes: int) -> Iterator[Block]:
+    if not session.executed_commands:
+        yield Paragraph("No enumeration commands were executed in this session.")
+        return
+    for cmd in session.executed_commands:
+        yield Heading(f"#{cmd.index} – {cmd.name}")
+        yield Field("Category", cmd.category)
+        yield Field("Priority", cmd.priority)
+        yield Field("Command", cmd.command)
+        yield Field("Started at", cmd.started_at)
+        yield Field("Ended at", cmd.ended_at)
+        yield Field("Exit code", cmd.exit_code)
+        yield Field("Log file", cmd.log_file)
+        if log_excerpt_bytes > 0 and cmd.log_file:
+            text, truncated = read_log_excerpt(Path(cmd.log_file), log_excerpt_bytes)
+            if text.strip():
+                yield Excerpt(f"Log excerpt for #{cmd.index}", text, truncated)
+
+
+_MODEL_METRICS = (
+    ("load_s", "model load", None),
+    ("prompt_eval_s", "prompt eval", "prompt_tokens"),
+    ("eval_s", "generation", "eval_tokens"),
+)
+
+
+def _describe_metrics(metrics: Dict[str, Any]) -> str:
+    m = dict(metrics)
+    parts: List[str] = []
+    if "child_user_cpu_s" in m or "child_sys_cpu_s" in m:
+        procs = m.pop("child_processes", None)
+        cpu = f"CPU {m.pop('child_user_cpu_s', 0):.2f}s user + {m.pop('child_sys_cpu_s', 0):.2f}s sys"
+        parts.append(f"{cpu} ({procs} processes)" if procs and procs > 1 else cpu)
+    if "child_max_rss_kb" in m:
+        parts.append(f"max RSS {m.pop('child_max_rss_kb') / 1024:.1f} MB")
+    for key, label, tokens in _MODEL_METRICS:
+        if key in m:
+            count = m.pop(tokens, None) if tokens else None
+            parts.append(f"{label} {m.pop(key):.2f}s" + (f" ({count} tokens)" if count is not None else ""))
+    m.pop("total_s", None)
+    parts.extend(f"{k.replace('_', ' ')}: {v}" for k, v in m.items())
+    return "; ".join(parts)
+
+
+def _timings(session: Session) -> Iterator[Block]:
+    if not session.timings:
+        yield Paragraph("No timings were recorded for this session.")
+        return
+    yield Table(
+        ["Step", "Duration", "Details"],
+        [
+            [span.name, f"{span.seconds:.2f}s", _describe_metrics(span.metrics)]
+            for span in session.timings
+        ],
+    )
+
+
+def _next_steps() -> Iterator[Block]:
+    yield Paragraph(
+        "Use this report to reflect on your enumeration process. "
+        "Consider which services look most interesting or unusual. "
+        "Without exploiting anything, think about: "
+        "what information can be gathered next, what typical misconfigurations might exist, "
+        "and how you would safely validate them within the rules of your CTF or authorized engagement."
+    )
+
+
+def iter_sections(session: Session, log_excerpt_bytes: int = DEFAULT_LOG_EXCERPT_BYTES) -> Iterator[Section]:
+    """The report's sections in order; each section's blocks are generated on demand."""
+    yield Section("notice", "Legal / Ethical Notice", _notice())
+    yield Section("target", "Target & Context", _target(session))
+    yield Section("reachability", "Reachability Summary", _reachability(session))
+    yield Section("nmap", "Nmap Summary", _nmap(session))
+    yield Section("recommendations", "AI-Recommended Enumeration Steps", _recommendations(session))
+    yield Section("executed", "Commands Executed", _executed(session, log_excerpt_bytes))
+    yield Section("timings", "Timing Breakdown", _timings(session))
+    yield Section("next-steps", "High-Level Next Steps (Educational)", _next_steps())
@@ -0,0 +1,244 @@
+"""Streaming report writer with Markdown, JSON and HTML renderers."""
+from __future__ import annotations
+
+import html
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, TextIO, Type
+
+from mcp_kali_assistant.core.session import Session
+from mcp_kali_assistant.reports.sections import (
+    DEFAULT_LOG_EXCERPT_BYTES,
+    Block,
+    Bullets,
+    Excerpt,
+    Field,
+    Heading,
+    Paragraph,
+    Section,
+    Table,
+    iter_sections,
+)
+
+REPORT_TITLE = "MCP-Kali Assistant Report – Session {session_id}"
+# Bump whenever the rendered output changes so `report --all` rebuilds stamped reports.
+REPORT_GENERATOR_VERSION = 2
+
+
+class ReportRenderer:
+    """Writes a report to ``out`` one section and one block at a time."""
+
+    extension = ""
+
+    def __init__(self, out: TextIO):
+        self.out = out
+
+    def begin(self, session: Session) -> None:
+        pass
+
+    def begin_section(self, section: Section, first: bool) -> None:
+        pass
+
+    def block(self, block: Block, first: bool) -> None:
+        pass
+
+    def end_section(self, section: Section) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+
+def _markdown_row(cells: List[str]) -> str:
+    return "| " + " | ".join(str(c).replace("|", "\\|") for c in cells) + " |\n"
+
+
+class MarkdownRenderer(ReportRenderer):
+    extension = ".md"
+
+    def begin(self, session: Session) -> None:
+        self.out.write(f"# {REPORT_TITLE.format(session_id=session.session_id)}\n\n")
+
+    def begin_section(self, section: Section, first: bool) -> None:
+        self.out.write(f"## {section.title}\n")
+
+    def block(self, block: Block, first: bool) -> None:
+        w = self.out.write
+        if isinstance(block, Heading):
+            w(f"{'' if first else chr(10)}### {block.text}\n")
+        elif isinstance(block, Paragraph):
+            w(f"{block.text}\n")
+        elif isinstance(block, Field):
+            w(f"- {block.label}: `{block.value}`\n" if block.code else f"- {block.label}: {block.value}\n")
+        elif isinstance(block, Bullets):
+            indent = "  " if block.nested else ""
+            if block.label:
+                w(f"- {block.label}:\n")
+                indent = "  "
+            for item in block.items:
+                w(f"{indent}- {item}\n")
+        elif isinstance(block, Excerpt):
+            note = " (truncated)" if block.truncated else ""
+            # The fence must be longer than any backtick run inside the log.
+            longest = max((len(run) for run in re.findall(r"`+", block.text)), default=0)
+            fence = "`" * max(3, longest + 1)
+            w(f"\n<details><summary>{html.escape(block.title)}{note}</summary>\n\n{fence}text\n")
+            w(block.text.rstrip("\n"))
+            w(f"\n{fence}\n\n</details>\n")
+        elif isinstance(block, Table):
+            w(_markdown_row(block.headers) + _markdown_row(["---"] * len(block.headers)))
+            for cells in block.rows:
+                w(_markdown_row(cells))
+
+    def end_section(self, section: Section) -> None:
+        self.out.write("\n")
+
+
+class JsonRenderer(ReportRenderer):
+    extension = ".json"
+
+    def begin(self, session: Session) -> None:
+        header = {
+            "title": REPORT_TITLE.format(session_id=session.session_id),
+            "session_id": session.session_id,
+            "target": session.target,
+            "mode": session.mode,
+        }
+        # Written by hand up to the sections array so each section can be streamed.
+        self.out.write(json.dumps(header)[:-1] + ', "sections": [')
+
+    def begin_section(self, section: Section, first: bool) -> None:
+        prefix = "" if first else ","
+        self.out.write(f'{prefix}\n{{"id": {json.dumps(section.id)}, "title": {json.dumps(section.title)}, "blocks": [')
+
+    def block(self, block: Block, first: bool) -> None:
+        data = {"type": type(block).__name__.lower(), **vars(block)}
+        self.out.write(("" if first else ", ") + json.dumps(data, default=str))
+
+    def end_section(self, section: Section) -> None:
+        self.out.write("]}")
+
+    def end(self) -> None:
+        self.out.write("\n]}\n")
+
+
+_HTML_STYLE = """
+body { font-family: system-ui, sans-serif; max-width: 960px; margin: 2em auto; padding: 0 1em; color: #222; }
+h1 { font-size: 1.6em; } h2 { border-bottom: 1px solid #ccc; padding-bottom: .2em; margin-top: 1.8em; }
+code, pre { background: #f4f4f4; border-radius: 3px; } code { padding: 0 .25em; }
+pre { padding: .6em; overflow-x: auto; white-space: pre-wrap; }
+ul { margin: .2em 0 .6em; } details { margin: .4em 0 1em; }
+table { border-collapse: collapse; } th, td { border: 1px solid #ccc; padding: .2em .6em; text-align: left; }
+"""
+
+
+class HtmlRenderer(ReportRenderer):
+    """Self-contained HTML (inline CSS, no external assets)."""
+
+    extension = ".html"
+
+    def __init__(self, out: TextIO):
+        super().__init__(out)
+        self._in_list = False
+
+    def _close_list(self) -> None:
+        if self._in_list:
+            self.out.write("</ul>\n")
+            self._in_list = False
+
+    def begin(self, session: Session) -> None:
+        title = html.escape(REPORT_TITLE.format(session_id=session.session_id))
+        self.out.write(
+            f"<!DOCTYPE html>\n<html lang=\"en\">\n<head>\n<meta charset=\"utf-8\">\n<title>{title}</title>\n"
+            f"<style>{_HTML_STYLE}</style>\n</head>\n<body>\n<h1>{title}</h1>\n"
+        )
+
+    def begin_section(self, section: Section, first: bool) -> None:
+        self.out.write(f"<section id=\"{html.escape(section.id)}\">\n<h2>{html.escape(section.title)}</h2>\n")
+
+    def block(self, block: Block, first: bool) -> None:
+        e = html.escape
+        w = self.out.write
+        if isinstance(block, Field):
+            if not self._in_list:
+                w("<ul>\n")
+                self._in_list = True
+            value = f"<code>{e(str(block.value))}</code>" if block.code else e(str(block.value))
+            w(f"<li><strong>{e(block.label)}:</strong> {value}</li>\n")
+            return
+        self._close_list()
+        if isinstance(block, Heading):
+            w(f"<h3>{e(block.text)}</h3>\n")
+        elif isinstance(block, Paragraph):
+            # The only inline markup the section model uses is **bold**.
+            text = e(block.text)
+            while text.count("**") >= 2:
+                text = text.replace("**", "<strong>", 1).replace("**", "</strong>", 1)
+            w(f"<p>{text}</p>\n")
+        elif isinstance(block, Bullets):
+            if block.label:
+                w(f"<p><strong>{e(block.label)}:</strong></p>\n")
+            w("<ul>\n" + "".join(f"<li>{e(item)}</li>\n" for item in block.items) + "</ul>\n")
+        elif isinstance(block, Excerpt):
+            note = " (truncated)" if block.truncated else ""
+            w(f"<details><summary>{e(block.title)}{note}</summary>\n<pre>{e(block.text)}</pre>\n</details>\n")
+        elif isinstance(block, Table):
+            w("<table>\n<tr>" + "".join(f"<th>{e(h)}</th>" for h in block.headers) + "</tr>\n")
+            for cells in block.rows:
+                w("<tr>" + "".join(f"<td>{e(str(c))}</td>" for c in cells) + "</tr>\n")
+            w("</table>\n")
+
+    def end_section(self, section: Section) -> None:
+        self._close_list()
+        self.out.write("</section>\n")
+
+    def end(self) -> None:
+        self.out.write("</body>\n</html>\n")
+
+
+RENDERERS: Dict[str, Type[ReportRenderer]] = {
+    "markdown": MarkdownRenderer,
+    "json": JsonRenderer,
+    "html": HtmlRenderer,
+}
+REPORT_FORMATS = tuple(RENDERERS)
+
+
+def render_report(session: Session, out: TextIO, fmt: str = "markdown", log_excerpt_bytes: int = DEFAULT_LOG_EXCERPT_BYTES) -> None:
+    """Stream ``session``'s report in ``fmt`` to the open text file ``out``."""
+    if fmt not in RENDERERS:
+        raise ValueError(f"Unknown report format: {fmt} (expected one of {', '.join(REPORT_FORMATS)})")
+    renderer = RENDERERS[fmt](out)
+    renderer.begin(session)
+    for i, section in enumerate(iter_sections(session, log_excerpt_bytes)):
+        renderer.begin_section(section, first=(i == 0))
+        for j, block in enumerate(section.blocks):
+            renderer.block(block, first=(j == 0))
+        renderer.end_section(section)
+    renderer.end()
+
+
+def write_report(
+    session: Session,
+    reports_root: Path,
+    fmt: str = "markdown",
+    log_excerpt_bytes: int = DEFAULT_LOG_EXCERPT_BYTES,
+    report_path: Optional[Path] = None,
+) -> Path:
+    """
+    Write ``<reports_root>/<session_id><ext>`` (or ``report_path``) section by section.
+
+    Output goes to a temporary file that replaces the report only once it is complete.
+    """
+    renderer_cls = RENDERERS.get(fmt)
+    if renderer_cls is None:
+        raise ValueError(f"Unknown report format: {fmt} (expected one of {', '.join(REPORT_FORMATS)})")
+    reports_root.mkdir(parents=True, exist_ok=True)
+    report_path = report_path or reports_root / f"{session.session_id}{renderer_cls.extension}"
+    tmp_path = report_path.with_name(report_path.name + ".tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
+        render_report(session, f, fmt, log_excerpt_bytes)
+    os.replace(tmp_path, report_path)
+    return report_path
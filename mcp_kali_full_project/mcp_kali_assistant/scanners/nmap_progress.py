@@ -0,0 +1,181 @@
+"""Structured progress tracking for running Nmap processes."""
+from __future__ import annotations
+
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, TextIO
+
+from rich import box
+from rich.console import Console, RenderableType
+from rich.live import Live
+from rich.markup import escape
+from rich.progress_bar import ProgressBar
+from rich.table import Table
+
+from mcp_kali_assistant.core.timing import ChildUsage
+from mcp_kali_assistant.io.output import OutputSink, output_sink
+
+# Ask nmap for a status line at this interval (parsed into the live display).
+STATS_EVERY = "5s"
+TAIL_LINES = 50
+
+_STATS_RE = re.compile(r"^Stats: (\S+) elapsed; (\d+) hosts completed \((\d+) up\), (\d+) undergoing (.+)$")
+_TIMING_RE = re.compile(r"^(.+?) Timing: About ([\d.]+)% done(?:; ETC: \S+ \((\S+) remaining\))?")
+_OPEN_PORT_RE = re.compile(r"^Discovered open port (\S+) on (\S+)")
+_COMPLETED_RE = re.compile(r"^Completed (.+?) at ")
+_REPORT_RE = re.compile(r"^Nmap scan report for ")
+
+
+@dataclass
+class NmapProgress:
+    """Progress of one nmap process, updated from its (``--stats-every``) output."""
+
+    label: str
+    phase: str = "starting"
+    percent: float = 0.0
+    remaining: str = ""
+    elapsed: str = ""
+    hosts_completed: int = 0
+    hosts_up: int = 0
+    open_ports: int = 0
+    finished: bool = False
+    tail: Deque[str] = field(default_factory=lambda: deque(maxlen=TAIL_LINES))
+
+    def update(self, line: str) -> None:
+        self.tail.append(line)
+        text = line.strip()
+        m = _TIMING_RE.match(text)
+        if m:
+            self.phase = m.group(1)
+            self.percent = float(m.group(2))
+            self.remaining = m.group(3) or ""
+            return
+        m = _STATS_RE.match(text)
+        if m:
+            self.elapsed = m.group(1)
+            self.hosts_completed = int(m.group(2))
+            self.hosts_up = int(m.group(3))
+            self.phase = m.group(5)
+            return
+        m = _OPEN_PORT_RE.match(text)
+        if m:
+            self.open_ports += 1
+            return
+        m = _COMPLETED_RE.match(text)
+        if m:
+            # The next phase (if any) restarts the percentage.
+            self.phase = f"{m.group(1)} done"
+            self.percent = 100.0
+            self.remaining = ""
+            return
+        if _REPORT_RE.match(text):
+            self.hosts_completed = max(self.hosts_completed, 1)
+
+
+def _progress_cell(percent: float) -> Table:
+    cell = Table.grid(padding=(0, 1))
+    cell.add_row(ProgressBar(total=100, completed=percent, width=12), f"{percent:3.0f}%")
+    return cell
+
+
+class NmapMonitor:
+    """
+    One live progress display plus a raw log file for a set of nmap processes.
+
+    Each process feeds its output lines through :meth:`feed`; lines are appended to
+    ``log_path`` and parsed into a :class:`NmapProgress` row instead of being echoed,
+    and only the last ``TAIL_LINES`` per process are kept in memory for error reports.
+    In ``raw`` verbosity the lines are also echoed through the output sink; in
+    ``quiet`` verbosity, or with ``live=False``, the live display is off. The CPU time
+    and peak RSS of every finished process are added to ``usage``.
+    """
+
+    def __init__(
+        self,
+        log_path: Path,
+        title: str = "Nmap progress",
+        console: Optional[Console] = None,
+        sink: Optional[OutputSink] = None,
+        live: bool = True,
+        usage: Optional[ChildUsage] = None,
+    ):
+        self.log_path = log_path
+        self.title = title
+        self.console = console or Console()
+        self.sink = sink or output_sink()
+        self._rows: Dict[str, NmapProgress] = {}
+        self._lock = threading.Lock()
+        self._log: Optional[TextIO] = None
+        self._live: Optional[Live] = None
+        self._show_live = live
+        self._started = time.monotonic()
+        self.usage = usage if usage is not None else ChildUsage()
+
+    def __enter__(self) -> "NmapMonitor":
+        self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        self._log = self.log_path.open("a", encoding="utf-8")
+        if self._show_live and not self.sink.quiet:
+            self._live = Live(console=self.console, get_renderable=self.render, refresh_per_second=4)
+            self._live.start()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.sink.flush()
+        if self._live is not None:
+            self._live.stop()
+            self._live = None
+            if not self.console.is_terminal:
+                # The final frame is written without a trailing newline outside a terminal.
+                self.console.line()
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def track(self, label: str) -> NmapProgress:
+        with self._lock:
+            return self._rows.setdefault(label, NmapProgress(label=label))
+
+    def feed(self, progress: NmapProgress, line: str) -> None:
+        with self._lock:
+            if self._log is not None:
+                self._log.write(f"[{progress.label}] {line}\n" if progress.label else f"{line}\n")
+            progress.update(line)
+        if self.sink.raw:
+            self.sink.line(line, source=progress.label or "nmap")
+
+    def finish(self, progress: NmapProgress) -> List[str]:
+        """Mark a process as done and return its bounded output tail."""
+        with self._lock:
+            progress.finished = True
+            if self._log is not None:
+                self._log.flush()
+            return list(progress.tail)
+
+    def render(self) -> RenderableType:
+        table = Table(
+            title=f"{self.title} [dim]({time.monotonic() - self._started:.0f}s; raw output in {escape(str(self.log_path))})[/dim]",
+            box=box.SIMPLE_HEAD,
+        )
+        table.add_column("Scan", style="cyan", no_wrap=True)
+        table.add_column("Phase", overflow="ellipsis", no_wrap=True, ratio=1)
+        table.add_column("Progress", no_wrap=True)
+        table.add_column("ETA", justify="right", no_wrap=True, min_width=7)
+        table.add_column("Hosts (up)", justify="right", no_wrap=True)
+        table.add_column("Open", justify="right", no_wrap=True, min_width=4)
+        with self._lock:
+            rows = list(self._rows.values())
+        for p in rows:
+            percent = 100.0 if p.finished else p.percent
+            table.add_row(
+                escape(p.label or "nmap"),
+                "[green]finished[/green]" if p.finished else escape(p.phase),
+                _progress_cell(percent),
+                "" if p.finished else p.remaining,
+                f"{p.hosts_completed} ({p.hosts_up})",
+                str(p.open_ports),
+            )
+        return table
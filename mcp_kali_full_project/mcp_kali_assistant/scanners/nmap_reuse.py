@@ -0,0 +1,321 @@
+"""Reuse of earlier Nmap results and differential rescans."""
+from __future__ import annotations
+
+import re
+import shutil
+import time
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from rich.panel import Panel
+
+from mcp_kali_assistant.core.modes import get_scan_profile, profile_dominates
+from mcp_kali_assistant.core.session_index import SessionIndex
+from mcp_kali_assistant.core.timing import ChildUsage
+from mcp_kali_assistant.io.console import LazyConsole
+from mcp_kali_assistant.scanners.nmap_progress import NmapMonitor
+from mcp_kali_assistant.scanners.nmap_scan import NMAP_LOG_NAME, _nmap_cmd, _run_nmap_checked
+
+console = LazyConsole()
+
+REUSE_OFF = "off"
+REUSE_AS_IS = "reuse"
+REUSE_DIFF = "diff"
+REUSE_MODES = (REUSE_OFF, REUSE_AS_IS, REUSE_DIFF)
+DEFAULT_REUSE_TTL_SECONDS = 3600
+
+# Flags that only fingerprint already-open ports; a state-only probe drops them.
+FINGERPRINT_FLAGS = ("-sV", "-sC", "-A", "-O")
+FINGERPRINT_OPTIONS_WITH_VALUE = ("--script", "--version-intensity")
+
+PortKey = Tuple[str, str, str]  # (address, protocol, portid)
+
+
+@dataclass
+class ReusableScan:
+    session_id: str
+    mode: str
+    xml_path: Path
+    age_seconds: float
+
+
+@dataclass
+class DiffStats:
+    hosts: int = 0
+    reused_ports: int = 0
+    fingerprinted_ports: int = 0
+    carried_ports: int = 0
+
+
+_FINISHED = re.compile(rb"<finished\b[^>]*>")
+_TIME_ATTR = re.compile(rb'\btime="(\d+)"')
+
+
+def _scan_finished_at(xml_path: Path) -> Optional[float]:
+    """
+    When the scan finished, from Nmap's closing ``<finished time="...">`` element.
+
+    None if the element is missing (interrupted scans leave partial files). The time is
+    part of the XML, so it survives copies; the file's mtime is only a fallback.
+    """
+    try:
+        with xml_path.open("rb") as f:
+            f.seek(0, 2)
+            f.seek(max(0, f.tell() - 4096))
+            finished = _FINISHED.search(f.read())
+            if finished is None:
+                return None
+            stamp = _TIME_ATTR.search(finished.group(0))
+            return float(stamp.group(1)) if stamp else xml_path.stat().st_mtime
+    except OSError:
+        return None
+
+
+def find_reusable_scan(
+    sessions_root: Path,
+    target: str,
+    mode: str,
+    ttl_seconds: int = DEFAULT_REUSE_TTL_SECONDS,
+    exclude_session_id: Optional[str] = None,
+) -> Optional[ReusableScan]:
+    """
+    Find the freshest finished ``nmap.xml`` for exactly ``target`` whose mode covers ``mode``.
+
+    Candidates come from the session index; ``ttl_seconds`` (0 = no limit) is checked
+    against when the scan itself finished, so a scan copied by an earlier reuse keeps
+    its original age.
+    """
+    now = time.time()
+    best: Optional[ReusableScan] = None
+    for record in SessionIndex.for_root(sessions_root).query(target=target, sort="updated"):
+        if record.target != target or record.session_id == exclude_session_id:
+            continue
+        if not profile_dominates(record.mode, mode):
+            continue
+        xml_path = sessions_root / record.session_id / "nmap.xml"
+        finished_at = _scan_finished_at(xml_path)
+        if finished_at is None:
+            continue
+        age = max(0.0, now - finished_at)
+        if ttl_seconds > 0 and age > ttl_seconds:
+            continue
+        if best is None or age < best.age_seconds:
+            best = ReusableScan(record.session_id, record.mode, xml_path, age)
+    return best
+
+
+def reuse_scan(previous: ReusableScan, output_xml_path: Path) -> None:
+    """Copy an earlier scan into this session so the session stays self-contained."""
+    output_xml_path.parent.mkdir(parents=True, exist_ok=True)
+    # copy2 keeps the mtime too, for scans whose <finished> element has no time.
+    shutil.copy2(previous.xml_path, output_xml_path)
+    console.print(
+        Panel(
+            f"[bold green]Reusing Nmap results from session {previous.session_id}[/bold green] "
+            f"(mode {previous.mode}, {previous.age_seconds / 60:.0f} min old).\n"
+            f"[bold]XML copied to:[/bold] {output_xml_path}",
+            border_style="green",
+            title="Nmap Reused",
+        )
+    )
+
+
+def split_fingerprint_args(nmap_args: Sequence[str]) -> Tuple[List[str], List[str]]:
+    """Split profile args into (state-only args, fingerprinting flags)."""
+    state: List[str] = []
+    fingerprint: List[str] = []
+    args = list(nmap_args)
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg in FINGERPRINT_FLAGS:
+            fingerprint.append(arg)
+        elif arg in FINGERPRINT_OPTIONS_WITH_VALUE and i + 1 < len(args):
+            fingerprint.extend(args[i:i + 2])
+            i += 1
+        else:
+            state.append(arg)
+        i += 1
+    return state, fingerprint
+
+
+def _host_address(host: ET.Element) -> Optional[str]:
+    address_el = host.find("address")
+    return address_el.get("addr") if address_el is not None else None
+
+
+def _port_key(addr: str, port: ET.Element) -> PortKey:
+    return addr, port.get("protocol") or "tcp", port.get("portid") or ""
+
+
+def _is_open(port: ET.Element) -> bool:
+    state_el = port.find("state")
+    return state_el is not None and state_el.get("state") == "open"
+
+
+def _open_ports(root: ET.Element) -> Dict[PortKey, ET.Element]:
+    ports: Dict[PortKey, ET.Element] = {}
+    for host in root.findall("host"):
+        addr = _host_address(host)
+        if not addr:
+            continue
+        for port in host.findall("ports/port"):
+            if _is_open(port):
+                ports[_port_key(addr, port)] = port
+    return ports
+
+
+def _parse_port_list(spec: str) -> Set[int]:
+    ports: Set[int] = set()
+    for part in spec.split(","):
+        if not part:
+            continue
+        lo, _, hi = part.partition("-")
+        ports.update(range(int(lo), int(hi or lo) + 1))
+    return ports
+
+
+def _scanned_ports(root: ET.Element) -> Dict[str, Set[int]]:
+    """Ports probed per protocol, from ``<scaninfo services="...">``."""
+    scanned: Dict[str, Set[int]] = {}
+    for info in root.findall("scaninfo"):
+        scanned.setdefault(info.get("protocol") or "tcp", set()).update(_parse_port_list(info.get("services", "")))
+    return scanned
+
+
+def merge_differential(
+    state_root: ET.Element,
+    previous_root: ET.Element,
+    fingerprint_root: Optional[ET.Element],
+) -> DiffStats:
+    """
+    Fill ``state_root`` (a state-only probe) in place with service details.
+
+    Open ports take their fingerprint from the new fingerprint scan when they were
+    re-probed, else from the previous scan. Ports the previous scan saw open but the
+    state probe did not cover (a stronger earlier profile) are carried over unchanged.
+    """
+    stats = DiffStats()
+    previous_open = _open_ports(previous_root)
+    fresh_open = _open_ports(fingerprint_root) if fingerprint_root is not None else {}
+    scanned = _scanned_ports(state_root)
+    previous_hosts = {_host_address(h): h for h in previous_root.findall("host")}
+    fresh_hosts = {_host_address(h): h for h in fingerprint_root.findall("host")} if fingerprint_root is not None else {}
+
+    for host in state_root.findall("host"):
+        addr = _host_address(host)
+        if not addr:
+            continue
+        stats.hosts += 1
+        ports_el = host.find("ports")
+        if ports_el is None:
+            ports_el = ET.SubElement(host, "ports")
+        for i, port in enumerate(list(ports_el)):
+            if port.tag != "port" or not _is_open(port):
+                continue
+            key = _port_key(addr, port)
+            if key in fresh_open:
+                ports_el[i] = fresh_open[key]
+                stats.fingerprinted_ports += 1
+            elif key in previous_open:
+                ports_el[i] = previous_open[key]
+                stats.reused_ports += 1
+
+        for (p_addr, proto, portid), port in previous_open.items():
+            if p_addr == addr and int(portid) not in scanned.get(proto, set()):
+                ports_el.append(port)
+                stats.carried_ports += 1
+
+        # OS and host script results: prefer the new fingerprint scan, else the previous scan.
+        for tag in ("os", "hostscript"):
+            if host.find(tag) is not None:
+                continue
+            for source in (fresh_hosts.get(addr), previous_hosts.get(addr)):
+                if source is not None and source.find(tag) is not None:
+                    host.append(source.find(tag))
+                    break
+    return stats
+
+
+def run_differential_scan(
+    target: str,
+    mode: str,
+    previous: ReusableScan,
+    output_xml_path: Path,
+    live_progress: bool = True,
+    usage: Optional[ChildUsage] = None,
+) -> Tuple[bool, Optional[str]]:
+    """
+    Rescan ``target`` cheaply against an earlier scan.
+
+    A state-only probe (the profile without ``-sV``/``-sC``/``-A``) finds what is open
+    now; only ports that were not open before are fingerprinted, and everything else
+    reuses the previous service details. The merged document is written to output_xml_path.
+    The CPU time and peak RSS of the nmap processes are added to ``usage`` if given.
+    """
+    profile = get_scan_profile(mode)
+    state_args, fingerprint_flags = split_fingerprint_args(profile.nmap_args)
+    work_dir = output_xml_path.parent / "diff"
+    work_dir.mkdir(parents=True, exist_ok=True)
+    state_xml = work_dir / "nmap_state.xml"
+    fingerprint_xml = work_dir / "nmap_fingerprint.xml"
+    timing = [a for a in state_args if a.startswith("-T")]
+
+    console.print(
+        Panel(
+            f"[bold cyan]Phase 2 – Service Discovery (Nmap, differential)[/bold cyan]\n"
+            f"[bold]Mode:[/bold] {mode}\n"
+            f"[bold]Baseline:[/bold] session {previous.session_id} ({previous.mode}, "
+            f"{previous.age_seconds / 60:.0f} min old)\n\n"
+            f"[dim]Port states are re-probed; only newly open ports are fingerprinted.[/dim]",
+            border_style="cyan",
+            title="Nmap Launch",
+        )
+    )
+
+    monitor = NmapMonitor(output_xml_path.parent / NMAP_LOG_NAME, console=console, live=live_progress, usage=usage)
+    try:
+        with monitor:
+            error = _run_nmap_checked(_nmap_cmd(mode, state_args, state_xml, [target]), monitor, "state probe")
+        if error:
+            return False, error
+
+        state_root = ET.parse(str(state_xml)).getroot()
+        previous_root = ET.parse(str(previous.xml_path)).getroot()
+        previous_open = _open_ports(previous_root)
+        new_open = [key for key in _open_ports(state_root) if key not in previous_open]
+
+        fingerprint_root: Optional[ET.Element] = None
+        if new_open and fingerprint_flags:
+            hosts = sorted({addr for addr, _, _ in new_open})
+            ports = ",".join(sorted({portid for _, _, portid in new_open}, key=int))
+            args = [*timing, *fingerprint_flags, "-p", ports, "-oX"]
+            with monitor:
+                error = _run_nmap_checked(_nmap_cmd(mode, args, fingerprint_xml, hosts), monitor, "fingerprint")
+            if error:
+                return False, error
+            fingerprint_root = ET.parse(str(fingerprint_xml)).getroot()
+
+        stats = merge_differential(state_root, previous_root, fingerprint_root)
+        ET.ElementTree(state_root).write(str(output_xml_path), encoding="utf-8", xml_declaration=True)
+    except FileNotFoundError:
+        console.print("[bold red]Error: nmap binary not found.[/bold red]")
+        return False, "nmap not found"
+    except (ET.ParseError, OSError) as ex:
+        console.print(f"[bold red]Differential scan failed:[/bold red] {ex}")
+        return False, str(ex)
+
+    console.print(
+        Panel(
+            f"[bold green]Differential scan completed ({stats.hosts} hosts).[/bold green]\n"
+            f"[bold]Ports reused:[/bold] {stats.reused_ports}  "
+            f"[bold]fingerprinted:[/bold] {stats.fingerprinted_ports}  "
+            f"[bold]carried over:[/bold] {stats.carried_ports}\n"
+            f"[bold]XML saved to:[/bold] {output_xml_path}",
+            border_style="green",
+            title="Nmap Complete",
+        )
+    )
+    return True, None
@@ -1,15 +1,48 @@
 from __future__ import annotations
 
+import ipaddress
+import math
+import os
 import subprocess
+import threading
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional, Tuple, List
+from typing import Callable, Dict, Iterator, Optional, Sequence, Tuple, List, Union
 
-from rich.console import Console
 from rich.panel import Panel
 
-from mcp_kali_assistant.core.modes import get_scan_profile
+from mcp_kali_assistant.core.modes import ScanStage, get_scan_profile
+from mcp_kali_assistant.core.timing import ChildUsage, ChildWaiter
+from mcp_kali_assistant.io.console import LazyConsole
+from mcp_kali_assistant.parsers.models import Host
+from mcp_kali_assistant.parsers.nmap_parser import NmapHostWatcher, iter_nmap_hosts
+from mcp_kali_assistant.scanners.nmap_progress import STATS_EVERY, NmapMonitor
 
-console = Console()
+console = LazyConsole()
+
+MAX_TCP_PORT = 65535
+HOST_POLL_SECONDS = 0.5
+NMAP_LOG_NAME = "nmap.log"
+
+
+@dataclass
+class NmapShard:
+    label: str
+    hosts: List[str]
+    nmap_args: List[str]
+    xml_path: Path
+
+
+@dataclass
+class StageTiming:
+    name: str
+    seconds: float
+    hosts: int
+    open_ports: int
 
 
 def _verbosity_flags(mode: str) -> List[str]:
@@ -23,54 +56,616 @@ def _verbosity_flags(mode: str) -> List[str]:
     return ["-v"]
 
 
-def run_nmap_scan(target: str, mode: str, output_xml_path: Path) -> Tuple[bool, Optional[str]]:
+def discovery_scan_flag() -> str:
+    """SYN scan when running as root (raw sockets), TCP connect scan otherwise."""
+    return "-sS" if hasattr(os, "geteuid") and os.geteuid() == 0 else "-sT"
+
+
+# A target-spec piece: a network, an nmap octet range (one range per octet) or an opaque
+# host name / address that cannot be split further.
+_TargetPiece = Union[ipaddress.IPv4Network, ipaddress.IPv6Network, Tuple[range, ...], str]
+_NETWORK_TYPES = (ipaddress.IPv4Network, ipaddress.IPv6Network)
+
+# Split targets into this many pieces per host shard so shard sizes come out even.
+_PIECES_PER_SHARD = 4
+
+
+def _octet_range(octet: str) -> Optional[range]:
+    if octet == "*":
+        return range(0, 256)
+    lo, sep, hi = octet.partition("-")
+    if not lo.isdigit() or (sep and not hi.isdigit()):
+        return None
+    start, end = int(lo), int(hi) if sep else int(lo)
+    return range(start, end + 1) if 0 <= start <= end <= 255 else None
+
+
+def _parse_target_piece(part: str) -> _TargetPiece:
+    if "/" in part:
+        try:
+            return ipaddress.ip_network(part, strict=False)
+        except ValueError:
+            return part
+    octets = [_octet_range(o) for o in part.split(".")]
+    if len(octets) == 4 and all(octets) and any(len(r) > 1 for r in octets):
+        return tuple(octets)
+    return part
+
+
+def _piece_size(piece: _TargetPiece) -> int:
+    if isinstance(piece, str):
+        return 1
+    if isinstance(piece, tuple):
+        return math.prod(len(r) for r in piece)
+    return piece.num_addresses
+
+
+def _halve_piece(piece: _TargetPiece) -> Optional[Tuple[_TargetPiece, _TargetPiece]]:
+    if isinstance(piece, str):
+        return None
+    if isinstance(piece, tuple):
+        i = next(i for i, r in enumerate(piece) if len(r) > 1)
+        mid = len(piece[i]) // 2
+        return piece[:i] + (piece[i][:mid],) + piece[i + 1:], piece[:i] + (piece[i][mid:],) + piece[i + 1:]
+    if piece.prefixlen == piece.max_prefixlen:
+        return None
+    low, high = piece.subnets(prefixlen_diff=1)
+    return low, high
+
+
+def _piece_spec(piece: _TargetPiece) -> str:
+    if isinstance(piece, str):
+        return piece
+    if isinstance(piece, tuple):
+        return ".".join(str(r.start) if len(r) == 1 else f"{r.start}-{r[-1]}" for r in piece)
+    return str(piece) if piece.prefixlen < piece.max_prefixlen else str(piece.network_address)
+
+
+def _group_specs(pieces: Sequence[_TargetPiece]) -> List[str]:
+    """Target specs for one group, with adjacent subnets collapsed back into larger ones."""
+    networks = [p for p in pieces if isinstance(p, _NETWORK_TYPES)]
+    merged: List[_TargetPiece] = []
+    for piece in pieces:
+        if isinstance(piece, _NETWORK_TYPES):
+            continue
+        prev = merged[-1] if merged else None
+        if isinstance(piece, tuple) and isinstance(prev, tuple):
+            differ = [i for i in range(4) if prev[i] != piece[i]]
+            if len(differ) == 1 and prev[differ[0]][-1] + 1 == piece[differ[0]].start:
+                i = differ[0]
+                merged[-1] = prev[:i] + (range(prev[i].start, piece[i][-1] + 1),) + prev[i + 1:]
+                continue
+        merged.append(piece)
+    specs = [_piece_spec(p) for p in merged]
+    for version in (4, 6):
+        same = [n for n in networks if n.version == version]
+        specs.extend(_piece_spec(n) for n in ipaddress.collapse_addresses(same))
+    return specs
+
+
+def split_targets(target: str, parts: int) -> List[List[str]]:
     """
-    Runs Nmap with a mode-based profile and streams output live to the console.
-    Saves results to XML at output_xml_path.
+    Split an nmap target spec into at most ``parts`` groups of similar size.
 
-    Returns:
-      (success, error_message_or_none)
+    CIDRs are cut into subnets and octet ranges (``10.0.0.1-50``, ``10.0.*.1``) into
+    sub-ranges, without expanding them to individual addresses, so any range nmap
+    accepts can be sharded. Each group is a contiguous run of the target spec.
     """
-    profile = get_scan_profile(mode)
+    pieces = [_parse_target_piece(p) for p in target.replace(",", " ").split()]
+    wanted = max(1, parts) * _PIECES_PER_SHARD
+    while len(pieces) < wanted:
+        i = max(range(len(pieces)), key=lambda j: _piece_size(pieces[j]), default=None)
+        halves = _halve_piece(pieces[i]) if i is not None and _piece_size(pieces[i]) > 1 else None
+        if halves is None:
+            break
+        pieces[i:i + 1] = halves
+
+    # Each piece goes to the group its midpoint falls in, so groups stay contiguous.
+    count = max(1, min(parts, len(pieces)))
+    total = sum(_piece_size(p) for p in pieces)
+    groups: List[List[_TargetPiece]] = [[] for _ in range(count)]
+    filled = 0
+    for piece in pieces:
+        size = _piece_size(piece)
+        groups[min(count - 1, int((filled + size / 2) * count // total))].append(piece)
+        filled += size
+    return [_group_specs(group) for group in groups if group]
+
+
+def _split_port_ranges(parts: int) -> List[str]:
+    parts = max(1, min(parts, MAX_TCP_PORT))
+    size, extra = divmod(MAX_TCP_PORT, parts)
+    ranges: List[str] = []
+    start = 1
+    for i in range(parts):
+        end = start + size - 1 + (1 if i < extra else 0)
+        ranges.append(f"{start}-{end}")
+        start = end + 1
+    return ranges
+
+
+def build_shards(
+    target: str,
+    nmap_args: Sequence[str],
+    xml_dir: Path,
+    host_shards: int = 1,
+    port_shards: int = 1,
+) -> List[NmapShard]:
+    """
+    Split a scan into host x port shards.
+
+    Host sharding splits the target spec into ``host_shards`` groups (see
+    :func:`split_targets`).
+    Port sharding only applies to full-range profiles (``-p-``), which are split
+    into ``port_shards`` contiguous ranges.
+    """
+    args = list(nmap_args)
+    host_groups = (split_targets(target, host_shards) if host_shards > 1 else None) or [[target]]
+
+    if port_shards > 1 and "-p-" in args:
+        pos = args.index("-p-")
+        port_variants = [args[:pos] + ["-p", rng] + args[pos + 1:] for rng in _split_port_ranges(port_shards)]
+    else:
+        port_variants = [args]
+
+    total = len(host_groups) * len(port_variants)
+    shards: List[NmapShard] = []
+    for hosts in host_groups:
+        for variant in port_variants:
+            n = len(shards) + 1
+            shards.append(
+                NmapShard(
+                    label=f"shard {n}/{total}",
+                    hosts=hosts,
+                    nmap_args=variant,
+                    xml_path=xml_dir / f"nmap_shard_{n:02d}.xml",
+                )
+            )
+    return shards
+
+
+def merge_nmap_xml(xml_paths: Sequence[Path], output_xml_path: Path) -> int:
+    """
+    Merge several Nmap XML files into a single ``<nmaprun>`` document.
+
+    Hosts appearing in more than one file (port shards) are combined into one
+    ``<host>`` element holding the union of their ports. Returns the number of hosts written.
+    """
+    merged: Optional[ET.Element] = None
+    hosts_by_addr: Dict[str, ET.Element] = {}
+    runstats: Optional[ET.Element] = None
+
+    for path in xml_paths:
+        root = ET.parse(str(path)).getroot()
+        if merged is None:
+            merged = ET.Element(root.tag, dict(root.attrib))
+            for child in root:
+                if child.tag not in ("host", "runstats"):
+                    merged.append(child)
+        if root.find("runstats") is not None:
+            runstats = root.find("runstats")
+
+        for host in root.findall("host"):
+            address_el = host.find("address")
+            addr = address_el.get("addr") if address_el is not None else None
+            existing = hosts_by_addr.get(addr) if addr else None
+            if existing is None:
+                merged.append(host)
+                if addr:
+                    hosts_by_addr[addr] = host
+                continue
+            _merge_host(existing, host)
+
+    if merged is None:
+        raise ValueError("No Nmap XML files to merge.")
+
+    hosts = merged.findall("host")
+    if runstats is not None:
+        hosts_el = runstats.find("hosts")
+        if hosts_el is not None:
+            up = sum(1 for h in hosts if (h.find("status") is not None and h.find("status").get("state") == "up"))
+            hosts_el.set("up", str(up))
+            hosts_el.set("down", str(len(hosts) - up))
+            hosts_el.set("total", str(len(hosts)))
+        merged.append(runstats)
 
     output_xml_path.parent.mkdir(parents=True, exist_ok=True)
+    ET.ElementTree(merged).write(str(output_xml_path), encoding="utf-8", xml_declaration=True)
+    return len(hosts)
 
-    # Nmap profile args in modes.py are designed to include "-oX" at the end.
-    # We insert verbosity near the start.
-    cmd = ["nmap", *_verbosity_flags(mode), *profile.nmap_args, str(output_xml_path), target]
+
+def _merge_host(existing: ET.Element, other: ET.Element) -> None:
+    existing_status = existing.find("status")
+    other_status = other.find("status")
+    if (
+        existing_status is not None
+        and other_status is not None
+        and existing_status.get("state") != "up"
+        and other_status.get("state") == "up"
+    ):
+        existing.remove(existing_status)
+        existing.insert(0, other_status)
+
+    other_ports = other.find("ports")
+    if other_ports is not None:
+        existing_ports = existing.find("ports")
+        if existing_ports is None:
+            existing.append(other_ports)
+        else:
+            current = {(p.get("protocol"), p.get("portid")): p for p in existing_ports.findall("port")}
+            for port in other_ports.findall("port"):
+                key = (port.get("protocol"), port.get("portid"))
+                if key not in current:
+                    existing_ports.append(port)
+                elif _port_detail(port) > _port_detail(current[key]):
+                    # A later stage fingerprinted a port an earlier stage only discovered.
+                    existing_ports[list(existing_ports).index(current[key])] = port
+
+    for tag in ("os", "hostscript"):
+        if existing.find(tag) is None and other.find(tag) is not None:
+            existing.append(other.find(tag))
+
+
+def _port_detail(port: ET.Element) -> int:
+    service = port.find("service")
+    return (len(service.attrib) if service is not None else 0) + len(port.findall("script"))
+
+
+def _nmap_cmd(mode: str, nmap_args: Sequence[str], xml_path: Path, hosts: Sequence[str]) -> List[str]:
+    # Profile args end with "-oX"; the XML path goes right after them.
+    return ["nmap", *_verbosity_flags(mode), "--stats-every", STATS_EVERY, *nmap_args, str(xml_path), *hosts]
+
+
+def _stream_nmap(cmd: Sequence[str], monitor: NmapMonitor, label: str = "") -> Tuple[int, List[str]]:
+    """
+    Run one nmap process, feeding its output to ``monitor`` (raw log + live progress row).
+
+    Returns the exit code and the last output lines (bounded) for error reporting.
+    """
+    progress = monitor.track(label)
+    proc = subprocess.Popen(
+        list(cmd),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        bufsize=1,          # line-buffered
+        universal_newlines=True,
+    )
+    assert proc.stdout is not None  # for type-checkers
+
+    for line in proc.stdout:
+        monitor.feed(progress, line.rstrip("\n"))
+
+    waiter = ChildWaiter(proc)
+    rc = waiter.wait()
+    monitor.usage.add(waiter.usage)
+    return rc, monitor.finish(progress)
+
+
+@contextmanager
+def _watch_hosts(xml_path: Path, on_host: Optional[Callable[[Host], None]]) -> Iterator[None]:
+    """Call ``on_host`` from a background thread for each host nmap finishes writing to ``xml_path``."""
+    if on_host is None:
+        yield
+        return
+
+    # Nmap truncates the file anyway; a stale copy would desync the incremental parser.
+    xml_path.unlink(missing_ok=True)
+    watcher = NmapHostWatcher(xml_path)
+    stop = threading.Event()
+    broken = False
+
+    def drain() -> None:
+        nonlocal broken
+        if broken:
+            return
+        try:
+            for host in watcher.poll():
+                on_host(host)
+        except ET.ParseError as ex:
+            broken = True
+            console.print(f"[yellow]Stopped watching {xml_path.name} for finished hosts: {ex}[/yellow]")
+
+    def loop() -> None:
+        while not stop.wait(HOST_POLL_SECONDS):
+            drain()
+
+    thread = threading.Thread(target=loop, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+        drain()
+
+
+def _run_nmap_checked(cmd: Sequence[str], monitor: NmapMonitor, label: str) -> Optional[str]:
+    """Run one labelled nmap process; on failure show its last lines and return an error message."""
+    rc, lines = _stream_nmap(cmd, monitor, label=label)
+    if rc == 0:
+        return None
+    tail = "\n".join(lines[-15:]) if lines else ""
+    console.print(
+        Panel(
+            f"[bold red]Nmap {label} exited with code {rc}[/bold red]\n\n"
+            f"[bold]Last output lines:[/bold]\n{tail}",
+            border_style="red",
+            title="Nmap Error",
+        )
+    )
+    return f"nmap {label} failed with exit code {rc}"
+
+
+def _run_sharded(
+    target: str,
+    mode: str,
+    output_xml_path: Path,
+    host_shards: int,
+    port_shards: int,
+    max_workers: int,
+    monitor: NmapMonitor,
+    nmap_args: Optional[Sequence[str]] = None,
+    quiet: bool = False,
+) -> Tuple[bool, Optional[str]]:
+    """Run the shards and merge their XML; ``quiet`` skips the launch/complete panels (nested use)."""
+    if nmap_args is None:
+        nmap_args = get_scan_profile(mode).nmap_args
+    # Profile args end with "-oX"; each shard appends its own XML path after it.
+    shards = build_shards(
+        target,
+        nmap_args,
+        output_xml_path.parent / "shards",
+        host_shards=host_shards,
+        port_shards=port_shards,
+    )
+    shards[0].xml_path.parent.mkdir(parents=True, exist_ok=True)
+
+    if not quiet:
+        console.print(
+            Panel(
+                f"[bold cyan]Phase 2 – Service Discovery (Nmap, sharded)[/bold cyan]\n"
+                f"[bold]Mode:[/bold] {mode}\n"
+                f"[bold]Shards:[/bold] {len(shards)} (hosts x{max(1, host_shards)}, ports x{max(1, port_shards)})\n"
+                f"[bold]Workers:[/bold] {max_workers}\n\n"
+                f"[dim]Raw output of every shard goes to {monitor.log_path}.[/dim]",
+                border_style="cyan",
+                title="Nmap Launch",
+            )
+        )
+
+    def run_shard(shard: NmapShard) -> Tuple[NmapShard, int, List[str]]:
+        cmd = _nmap_cmd(mode, shard.nmap_args, shard.xml_path, shard.hosts)
+        rc, lines = _stream_nmap(cmd, monitor, label=shard.label)
+        return shard, rc, lines
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        results = list(pool.map(run_shard, shards))
+
+    failed = [(shard, rc, lines) for shard, rc, lines in results if rc != 0 or not shard.xml_path.exists()]
+    for shard, rc, lines in failed:
+        tail = "\n".join(lines[-15:]) if lines else ""
+        console.print(
+            Panel(
+                f"[bold red]Nmap {shard.label} exited with code {rc}[/bold red]\n\n"
+                f"[bold]Last output lines:[/bold]\n{tail}",
+                border_style="red",
+                title="Nmap Error",
+            )
+        )
+    if failed:
+        return False, f"{len(failed)} of {len(shards)} nmap shards failed"
+
+    host_count = merge_nmap_xml([s.xml_path for s in shards], output_xml_path)
+    if not quiet:
+        console.print(
+            Panel(
+                f"[bold green]Nmap scan completed successfully ({len(shards)} shards, {host_count} hosts).[/bold green]\n"
+                f"[bold]Merged XML saved to:[/bold] {output_xml_path}",
+                border_style="green",
+                title="Nmap Complete",
+            )
+        )
+    return True, None
+
+
+def _open_ports_by_host(xml_path: Path) -> Dict[str, List[str]]:
+    return {
+        host.address: [p.portid for p in host.ports if p.protocol == "tcp"]
+        for host in iter_nmap_hosts(xml_path, states=["open"])
+        if host.address and host.ports
+    }
+
+
+def _hosts_by_port_set(open_by_host: Dict[str, List[str]]) -> List[Tuple[List[str], List[str]]]:
+    """``(hosts, ports)`` groups of hosts that share exactly the same open ports."""
+    groups: Dict[Tuple[str, ...], List[str]] = {}
+    for host, ports in open_by_host.items():
+        groups.setdefault(tuple(sorted(set(ports), key=int)), []).append(host)
+    return [(hosts, list(ports)) for ports, hosts in groups.items()]
+
+
+def _stage_args(stage: ScanStage, ports: Sequence[str]) -> List[str]:
+    args = list(stage.nmap_args)
+    if stage.discovery:
+        args.insert(0, discovery_scan_flag())
+    if stage.ports_from_previous:
+        # Keep "-oX" last so the XML path can follow it.
+        args[-1:-1] = ["-p", ",".join(sorted(set(ports), key=int))]
+    return args
+
+
+def _run_staged(
+    target: str,
+    mode: str,
+    output_xml_path: Path,
+    host_shards: int,
+    port_shards: int,
+    max_workers: int,
+    monitor: NmapMonitor,
+    on_host: Optional[Callable[[Host], None]] = None,
+) -> Tuple[bool, Optional[str]]:
+    """
+    Run the profile's stages in order and merge their XML into output_xml_path.
+
+    A ``ports_from_previous`` stage only scans the hosts and open ports found by the
+    stage before it, each host on its own open ports only (hosts sharing a port set
+    share one nmap run), so slow fingerprinting never touches closed ports. Sharding,
+    when enabled, applies to the first stage; ``on_host`` watches the last stage.
+    """
+    profile = get_scan_profile(mode)
+    stage_dir = output_xml_path.parent / "stages"
+    stage_dir.mkdir(parents=True, exist_ok=True)
+    stage_xmls: List[Path] = []
+    timings: List[StageTiming] = []
+    open_by_host: Dict[str, List[str]] = {}
 
     console.print(
         Panel(
-            f"[bold cyan]Phase 2 – Service Discovery (Nmap)[/bold cyan]\n"
+            f"[bold cyan]Phase 2 – Service Discovery (Nmap, {len(profile.stages)} stages)[/bold cyan]\n"
             f"[bold]Mode:[/bold] {mode}\n"
-            f"[bold]Command:[/bold] [italic]{' '.join(cmd)}[/italic]\n\n"
-            f"[dim]Tip: Streaming output is enabled. If a scan takes time, you will see progress lines here.[/dim]",
+            f"[bold]Stages:[/bold] {' → '.join(stage.name for stage in profile.stages)}\n\n"
+            f"[dim]Raw output of every stage goes to {monitor.log_path}.[/dim]",
             border_style="cyan",
             title="Nmap Launch",
         )
     )
 
-    try:
-        # Stream stdout/stderr live. This makes Nmap feel "interactive".
-        proc = subprocess.Popen(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-            bufsize=1,          # line-buffered
-            universal_newlines=True,
+    for n, stage in enumerate(profile.stages, 1):
+        label = f"stage {n}/{len(profile.stages)} {stage.name}"
+        xml_path = stage_dir / f"nmap_stage{n}_{stage.name}.xml"
+        # (hosts, ports) runs of this stage; a ports_from_previous stage gives every host
+        # only its own open ports, with one nmap run per distinct port set.
+        runs: List[Tuple[List[str], List[str]]] = [([target], [])]
+        if stage.ports_from_previous:
+            if not open_by_host:
+                console.print(f"[dim]No open ports from the previous stage; skipping {label}.[/dim]")
+                break
+            runs = _hosts_by_port_set(open_by_host)
+
+        started = time.perf_counter()
+        if n == 1 and (host_shards > 1 or port_shards > 1):
+            ok, error = _run_sharded(
+                target, mode, xml_path, host_shards, port_shards, max_workers, monitor,
+                nmap_args=_stage_args(stage, []), quiet=True,
+            )
+            if not ok:
+                return False, error
+        else:
+            watch = on_host if n == len(profile.stages) else None
+            run_xmls = [xml_path] if len(runs) == 1 else [
+                stage_dir / f"nmap_stage{n}_{stage.name}_{i:02d}.xml" for i in range(1, len(runs) + 1)
+            ]
+
+            def run_group(i: int) -> Optional[str]:
+                hosts, ports = runs[i]
+                run_label = label if len(runs) == 1 else f"{label} ({i + 1}/{len(runs)})"
+                with _watch_hosts(run_xmls[i], watch):
+                    return _run_nmap_checked(
+                        _nmap_cmd(mode, _stage_args(stage, ports), run_xmls[i], hosts), monitor, run_label
+                    )
+
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(runs)))) as pool:
+                errors = [e for e in pool.map(run_group, range(len(runs))) if e]
+            if errors:
+                return False, errors[0] if len(errors) == 1 else f"{len(errors)} of {len(runs)} nmap {label} runs failed"
+            if len(runs) > 1:
+                missing = [p for p in run_xmls if not p.exists()]
+                if missing:
+                    return False, f"nmap {label} completed but XML output file missing"
+                merge_nmap_xml(run_xmls, xml_path)
+        if not xml_path.exists():
+            return False, f"nmap {label} completed but XML output file missing"
+
+        open_by_host = _open_ports_by_host(xml_path)
+        timings.append(
+            StageTiming(
+                name=stage.name,
+                seconds=time.perf_counter() - started,
+                hosts=len(open_by_host),
+                open_ports=sum(len(p) for p in open_by_host.values()),
+            )
         )
+        stage_xmls.append(xml_path)
+
+    host_count = merge_nmap_xml(stage_xmls, output_xml_path)
+    stage_lines = "\n".join(
+        f"  {t.name}: {t.seconds:.1f}s ({t.open_ports} open ports on {t.hosts} hosts)" for t in timings
+    )
+    console.print(
+        Panel(
+            f"[bold green]Nmap scan completed successfully ({len(timings)} stages, {host_count} hosts).[/bold green]\n"
+            f"[bold]Stage timings:[/bold]\n{stage_lines}\n"
+            f"[bold]Merged XML saved to:[/bold] {output_xml_path}",
+            border_style="green",
+            title="Nmap Complete",
+        )
+    )
+    return True, None
+
+
+def run_nmap_scan(
+    target: str,
+    mode: str,
+    output_xml_path: Path,
+    host_shards: int = 1,
+    port_shards: int = 1,
+    max_workers: int = 4,
+    staged: bool = True,
+    on_host: Optional[Callable[[Host], None]] = None,
+    live_progress: bool = True,
+    usage: Optional[ChildUsage] = None,
+) -> Tuple[bool, Optional[str]]:
+    """
+    Runs Nmap with a mode-based profile and streams output live to the console.
+    Saves results to XML at output_xml_path.
 
-        output_lines: List[str] = []
-        assert proc.stdout is not None  # for type-checkers
+    With ``host_shards``/``port_shards`` above 1 the scan is split into shards that run
+    in up to ``max_workers`` parallel nmap processes; their XML is merged into output_xml_path.
 
-        for line in proc.stdout:
-            line = line.rstrip("\n")
-            output_lines.append(line)
-            # Print live. Keep it readable (no extra styling on every line).
-            console.print(line)
+    Profiles with ``stages`` (and ``staged`` left on) run as a discovery-then-fingerprint
+    pipeline instead of a single pass.
+
+    ``on_host`` is called (from a watcher thread) with each host as soon as nmap has
+    written it to the XML, while the scan is still running. Sharded scans do not
+    report hosts early. ``live_progress=False`` keeps the progress table off the
+    console (output still goes to nmap.log), e.g. when several scans run at once.
+    The CPU time and peak RSS of every nmap process are added to ``usage`` if given.
+
+    Returns:
+      (success, error_message_or_none)
+    """
+    profile = get_scan_profile(mode)
+
+    output_xml_path.parent.mkdir(parents=True, exist_ok=True)
+
+    # Nmap profile args in modes.py are designed to include "-oX" at the end.
+    cmd = _nmap_cmd(mode, profile.nmap_args, output_xml_path, [target])
+    monitor = NmapMonitor(output_xml_path.parent / NMAP_LOG_NAME, console=console, live=live_progress, usage=usage)
+
+    try:
+        if staged and profile.stages:
+            with monitor:
+                return _run_staged(
+                    target, mode, output_xml_path, host_shards, port_shards, max_workers, monitor, on_host=on_host
+                )
+        if host_shards > 1 or port_shards > 1:
+            with monitor:
+                return _run_sharded(target, mode, output_xml_path, host_shards, port_shards, max_workers, monitor)
+
+        console.print(
+            Panel(
+                f"[bold cyan]Phase 2 – Service Discovery (Nmap)[/bold cyan]\n"
+                f"[bold]Mode:[/bold] {mode}\n"
+                f"[bold]Command:[/bold] [italic]{' '.join(cmd)}[/italic]\n\n"
+                f"[dim]Progress is shown live below; raw nmap output goes to {monitor.log_path}.[/dim]",
+                border_style="cyan",
+                title="Nmap Launch",
+            )
+        )
 
-        rc = proc.wait()
+        with monitor, _watch_hosts(output_xml_path, on_host):
+            rc, output_lines = _stream_nmap(cmd, monitor)
 
         if rc != 0:
             # Show last part of output for quick debugging.
@@ -1,17 +1,22 @@
 from __future__ import annotations
 
+import asyncio
+import ipaddress
+import itertools
 import platform
 import socket
 import subprocess
-from typing import Dict
+from typing import Dict, Iterable, List, Optional, Sequence
+
+DEFAULT_TCP_PORTS: Sequence[int] = (22, 80, 443)
+DEFAULT_MAX_CONCURRENCY = 256
+
+# Reachability is meant for small lab ranges; refuse to expand anything bigger than a /22.
+MAX_EXPANDED_HOSTS = 1024
 
 
 def icmp_ping(target: str, timeout: int = 3, count: int = 2) -> bool:
-    system = platform.system().lower()
-    if system == "windows":
-        cmd = ["ping", "-n", str(count), "-w", str(timeout * 1000), target]
-    else:
-        cmd = ["ping", "-c", str(count), "-W", str(timeout), target]
+    cmd = _ping_command(target, timeout, count)
 
     try:
         result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=timeout * (count + 1))
@@ -28,12 +33,164 @@ def tcp_port_check(target: str, port: int, timeout: int = 3) -> bool:
         return False
 
 
-def reachability_check(target: str) -> Dict[str, object]:
-    result: Dict[str, object] = {"target": target, "icmp_reachable": False, "tcp_checks": {}}
-    icmp_ok = icmp_ping(target)
-    result["icmp_reachable"] = icmp_ok
+def _ping_command(target: str, timeout: int, count: int) -> List[str]:
+    system = platform.system().lower()
+    if system == "windows":
+        return ["ping", "-n", str(count), "-w", str(timeout * 1000), target]
+    return ["ping", "-c", str(count), "-W", str(timeout), target]
+
+
+def expand_targets(target: str) -> List[str]:
+    """
+    Expand a target specification into individual hosts.
+
+    Accepts a single IP/hostname, a small CIDR (e.g. 10.10.10.0/24) or a
+    comma/space separated list mixing both. Order is preserved and duplicates dropped.
+    """
+    hosts: List[str] = []
+    seen = set()
+    for part in target.replace(",", " ").split():
+        if "/" in part:
+            try:
+                network = ipaddress.ip_network(part, strict=False)
+            except ValueError as e:
+                raise ValueError(f"Invalid CIDR target: {part}") from e
+            if network.num_addresses > MAX_EXPANDED_HOSTS + 2:
+                raise ValueError(
+                    f"CIDR {part} is too large for reachability checks (max {MAX_EXPANDED_HOSTS} hosts)."
+                )
+            candidates: Iterable[str] = (str(ip) for ip in network.hosts())
+        else:
+            candidates = (part,)
+        for host in candidates:
+            if host not in seen:
+                seen.add(host)
+                hosts.append(host)
+    return hosts
+
+
+def sample_targets(target: str, max_hosts: int = MAX_EXPANDED_HOSTS) -> List[str]:
+    """
+    The first ``max_hosts`` distinct hosts of ``target``, for ranges too large to probe in full.
+
+    Networks are expanded lazily; parts that are not valid CIDRs are kept as they are,
+    so they are probed like a single host.
+    """
+    def candidates() -> Iterable[str]:
+        for part in target.replace(",", " ").split():
+            network = None
+            if "/" in part:
+                try:
+                    network = ipaddress.ip_network(part, strict=False)
+                except ValueError:
+                    pass
+            if network is None:
+                yield part
+            else:
+                yield from (str(ip) for ip in network.hosts())
+
+    seen = set()
+    unique = (h for h in candidates() if not (h in seen or seen.add(h)))
+    return list(itertools.islice(unique, max(0, max_hosts)))
+
+
+async def async_icmp_ping(target: str, timeout: int = 3, count: int = 2) -> bool:
+    cmd = _ping_command(target, timeout, count)
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL
+        )
+    except OSError:
+        return False
+
+    try:
+        rc = await asyncio.wait_for(proc.wait(), timeout=timeout * (count + 1))
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        return False
+    return rc == 0
+
+
+async def async_tcp_port_check(target: str, port: int, timeout: float = 3) -> bool:
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(target, port), timeout=timeout)
+    except (OSError, asyncio.TimeoutError):
+        return False
+
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return True
+
+
+async def _check_host(
+    host: str,
+    ports: Sequence[int],
+    timeout: int,
+    limiter: asyncio.Semaphore,
+) -> Dict[str, object]:
+    async def bounded(coro):
+        async with limiter:
+            return await coro
+
+    probes = [bounded(async_icmp_ping(host, timeout=timeout))]
+    probes.extend(bounded(async_tcp_port_check(host, port, timeout=timeout)) for port in ports)
+    icmp_ok, *tcp_results = await asyncio.gather(*probes)
+
+    return {
+        "target": host,
+        "icmp_reachable": icmp_ok,
+        "tcp_checks": dict(zip(ports, tcp_results)),
+    }
+
+
+async def reachability_check_many(
+    hosts: Sequence[str],
+    ports: Sequence[int] = DEFAULT_TCP_PORTS,
+    timeout: int = 3,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+) -> List[Dict[str, object]]:
+    """
+    Probe ICMP and every TCP port of every host at the same time.
+
+    At most ``max_concurrency`` probes (ping processes or sockets) are in flight.
+    Results are returned in the same order as ``hosts``.
+    """
+    limiter = asyncio.Semaphore(max(1, max_concurrency))
+    return list(await asyncio.gather(*(_check_host(h, ports, timeout, limiter) for h in hosts)))
+
+
+def reachability_check(
+    target: str,
+    ports: Optional[Sequence[int]] = None,
+    timeout: int = 3,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    hosts: Optional[Sequence[str]] = None,
+) -> Dict[str, object]:
+    """
+    Run Phase 1 reachability checks against a host, CIDR or host list.
+
+    For a single host the classic ``{"target", "icmp_reachable", "tcp_checks"}`` dict is
+    returned. For several hosts the same keys are aggregated (any host reachable / port
+    open anywhere) and the per-host dicts are listed under ``"hosts"``. ``hosts``
+    replaces the expansion of ``target`` (e.g. a :func:`sample_targets` subset);
+    otherwise a CIDR over ``MAX_EXPANDED_HOSTS`` raises ValueError.
+    """
+    ports = [int(p) for p in (ports or DEFAULT_TCP_PORTS)]
+    hosts = list(hosts) if hosts is not None else expand_targets(target)
+    if not hosts:
+        return {"target": target, "icmp_reachable": False, "tcp_checks": {p: False for p in ports}}
 
-    for port in (22, 80, 443):
-        result["tcp_checks"][port] = tcp_port_check(target, port)
+    results = asyncio.run(reachability_check_many(hosts, ports, timeout=timeout, max_concurrency=max_concurrency))
+    if len(results) == 1 and results[0]["target"] == target:
+        return results[0]
 
-    return result
+    return {
+        "target": target,
+        "icmp_reachable": any(r["icmp_reachable"] for r in results),
+        "tcp_checks": {p: any(r["tcp_checks"][p] for r in results) for p in ports},
+        "hosts": results,
+    }
@@ -0,0 +1,60 @@
+"""Shared fixtures: small hand-written Nmap XML documents."""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import pytest
+
+# Let plain `pytest` (not only `python -m pytest`) import the package from the project root.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# (portid, state, service name or None)
+PortSpec = Tuple[str, str, Optional[str]]
+
+NMAPRUN_OPEN = '<?xml version="1.0" encoding="UTF-8"?>\n<nmaprun scanner="nmap" args="nmap -oX -" version="7.94">\n'
+NMAPRUN_CLOSE = "</nmaprun>\n"
+
+
+def host_xml(
+    addr: str,
+    ports: Sequence[PortSpec] = (),
+    state: str = "up",
+    os_name: Optional[str] = None,
+    service_attrs: Optional[Dict[str, str]] = None,
+) -> str:
+    """One ``<host>`` element as nmap writes it."""
+    lines = [f'<host><status state="{state}" reason="syn-ack"/>', f'<address addr="{addr}" addrtype="ipv4"/>']
+    if ports:
+        lines.append("<ports>")
+        for portid, port_state, service in ports:
+            lines.append(f'<port protocol="tcp" portid="{portid}"><state state="{port_state}" reason="syn-ack"/>')
+            if service:
+                extra = "".join(f' {k}="{v}"' for k, v in (service_attrs or {}).items())
+                lines.append(f'<service name="{service}"{extra}/>')
+            lines.append("</port>")
+        lines.append("</ports>")
+    if os_name:
+        lines.append(f'<os><osmatch name="{os_name}" accuracy="96"/></os>')
+    lines.append("</host>\n")
+    return "".join(lines)
+
+
+def nmap_xml(hosts: Iterable[str], runstats: bool = True) -> str:
+    """A complete ``<nmaprun>`` document around already rendered hosts."""
+    body = "".join(hosts)
+    stats = '<runstats><finished time="0"/><hosts up="0" down="0" total="0"/></runstats>\n' if runstats else ""
+    return NMAPRUN_OPEN + body + stats + NMAPRUN_CLOSE
+
+
+@pytest.fixture
+def write_xml(tmp_path: Path):
+    """Write ``nmap_xml(hosts)`` to ``tmp_path/<name>`` and return the path."""
+
+    def write(name: str, *hosts: str, runstats: bool = True) -> Path:
+        path = tmp_path / name
+        path.write_text(nmap_xml(hosts, runstats=runstats), encoding="utf-8")
+        return path
+
+    return write
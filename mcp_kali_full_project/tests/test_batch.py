@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import signal
+import subprocess
+import threading
+import time
+
+import pytest
+
+from mcp_kali_assistant.core.batch import (
+    BATCH_FAILED,
+    BATCH_OK,
+    DEFAULT_BATCH_MODE,
+    BatchCancelled,
+    BatchOutcome,
+    BatchScheduler,
+    BatchTarget,
+    SelectionPolicy,
+    load_targets_file,
+)
+
+COMMANDS = [
+    {"command": "nikto -h http://t/", "category": "web", "priority": 2},
+    {"command": "smbclient -L //t -N", "category": "smb", "priority": 1},
+    {"command": "", "category": "web", "priority": 1},
+    {"command": "gobuster dir -u http://t/", "category": "web", "priority": 3},
+    {"command": "whoami"},
+]
+
+
+def test_text_targets_file(tmp_path):
+    path = tmp_path / "targets.txt"
+    path.write_text(
+        "# lab hosts\n\n10.0.0.1\n10.0.0.2 fast\n  10.0.0.0/29 low-noise  web app, login page \n",
+        encoding="utf-8",
+    )
+    assert load_targets_file(path) == [
+        BatchTarget("10.0.0.1", DEFAULT_BATCH_MODE, ""),
+        BatchTarget("10.0.0.2", "fast", ""),
+        BatchTarget("10.0.0.0/29", "low-noise", "web app, login page"),
+    ]
+    assert load_targets_file(path, default_mode="fast")[0].mode == "fast"
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        "targets:\n  - target: 10.0.0.1\n    mode: fast\n    hint: dc\n  - 10.0.0.2\n",
+        "- {target: 10.0.0.1, mode: fast, hint: dc}\n- target: 10.0.0.2\n",
+    ],
+)
+def test_yaml_targets_file(tmp_path, content: str):
+    path = tmp_path / "targets.yaml"
+    path.write_text(content, encoding="utf-8")
+    assert load_targets_file(path) == [BatchTarget("10.0.0.1", "fast", "dc"), BatchTarget("10.0.0.2")]
+
+
+def test_empty_targets_file(tmp_path):
+    (tmp_path / "a.yml").write_text("", encoding="utf-8")
+    (tmp_path / "b.txt").write_text("# nothing yet\n", encoding="utf-8")
+    assert load_targets_file(tmp_path / "a.yml") == []
+    assert load_targets_file(tmp_path / "b.txt") == []
+
+
+@pytest.mark.parametrize(
+    ("name", "content", "message"),
+    [
+        ("t.txt", "10.0.0.1\n10.0.0.2 turbo\n", r"t\.txt:2: unknown scan mode 'turbo'"),
+        ("t.yaml", "- target: 10.0.0.1\n- mode: fast\n", r"entry 2: missing target"),
+        ("t.yaml", "- [10.0.0.1]\n", r"entry 1 is not a mapping"),
+        ("t.yaml", "targets: 10.0.0.1\n", r"expected a list of targets"),
+    ],
+)
+def test_invalid_targets_file(tmp_path, name: str, content: str, message: str):
+    path = tmp_path / name
+    path.write_text(content, encoding="utf-8")
+    with pytest.raises(ValueError, match=message):
+        load_targets_file(path)
+
+
+def test_policy_without_limits_runs_nothing():
+    policy = SelectionPolicy()
+    assert not policy.runs_anything
+    assert policy.select(COMMANDS) == []
+    assert SelectionPolicy(top_n=0, categories={"web"}).select(COMMANDS) == []
+    assert policy.describe() == "none (scan and AI strategy only)"
+
+
+def test_policy_top_n_by_priority_in_index_order():
+    # Priorities: #1=2, #2=1, #4=3, #5=5 (default); #3 has no command.
+    assert SelectionPolicy(top_n=2).select(COMMANDS) == [1, 2]
+    assert SelectionPolicy(top_n=3).select(COMMANDS) == [1, 2, 4]
+    assert SelectionPolicy(top_n=100).select(COMMANDS) == [1, 2, 4, 5]
+
+
+def test_policy_categories():
+    assert SelectionPolicy(categories={"web"}).select(COMMANDS) == [1, 4]
+    assert SelectionPolicy(categories={"generic", "smb"}).select(COMMANDS) == [2, 5]
+    policy = SelectionPolicy(top_n=1, categories={"web", "smb"})
+    assert policy.select(COMMANDS) == [2]
+    assert policy.describe() == "categories smb, web; top 1 by priority"
+
+
+def test_scheduler_keeps_order_and_isolates_failures():
+    items = [BatchTarget(f"10.0.0.{i}") for i in range(1, 5)]
+
+    def run_target(item: BatchTarget) -> BatchOutcome:
+        # Later targets finish first.
+        time.sleep(0.01 * (5 - int(item.target.rsplit(".", 1)[1])))
+        if item.target == "10.0.0.2":
+            raise RuntimeError("scan failed")
+        return BatchOutcome(item, session_id=item.target)
+
+    done = []
+    outcomes = BatchScheduler(max_targets=4).run(items, run_target, on_done=done.append)
+    assert [o.item for o in outcomes] == items
+    assert [o.status for o in outcomes] == [BATCH_OK, BATCH_FAILED, BATCH_OK, BATCH_OK]
+    assert outcomes[1].error == "RuntimeError: scan failed"
+    assert len(done) == 4
+    assert all(o.elapsed_seconds > 0 for o in outcomes)
+
+
+def test_scheduler_limits_targets_in_flight():
+    lock = threading.Lock()
+    active = peak = 0
+
+    def run_target(item: BatchTarget) -> BatchOutcome:
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.03)
+        with lock:
+            active -= 1
+        return BatchOutcome(item)
+
+    BatchScheduler(max_targets=2).run([BatchTarget(str(i)) for i in range(6)], run_target)
+    assert peak == 2
+
+
+def test_interrupt_cancels_queued_targets_and_kills_commands():
+    scheduler = BatchScheduler(max_targets=1)
+    started = []
+    procs = []
+    phases_after_stop = []
+
+    def run_target(item: BatchTarget) -> BatchOutcome:
+        started.append(item.target)
+        proc = subprocess.Popen(["sleep", "30"], start_new_session=True)
+        procs.append(proc)
+        scheduler.running.add(proc)
+        for _ in range(10):
+            # One "phase": wait on the enumeration command, then check for a stop.
+            try:
+                proc.wait(timeout=0.05)
+            except subprocess.TimeoutExpired:
+                pass
+            scheduler.check_stopping()
+            phases_after_stop.append(scheduler.stopping.is_set())
+        return BatchOutcome(item)
+
+    # Like Ctrl-C: a real SIGINT to the main thread, which is blocked waiting for results.
+    main = threading.main_thread().ident
+    threading.Timer(0.2, signal.pthread_kill, (main, signal.SIGINT)).start()
+    t0 = time.monotonic()
+    with pytest.raises(KeyboardInterrupt):
+        scheduler.run([BatchTarget(f"10.0.0.{i}") for i in range(6)], run_target)
+    assert time.monotonic() - t0 < 1.0
+    assert started == ["10.0.0.0"]
+    assert not any(phases_after_stop)
+    assert procs[0].wait(timeout=5) != 0
+
+    # Commands started by a target that is still winding down are killed straight away.
+    late = subprocess.Popen(["sleep", "30"], start_new_session=True)
+    scheduler.running.add(late)
+    assert late.wait(timeout=5) != 0
+    with pytest.raises(BatchCancelled):
+        scheduler.check_stopping()
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+
+from mcp_kali_assistant.ai_engine.cache import StrategyCache
+
+
+def _age(cache: StrategyCache, key: str, seconds: float) -> None:
+    """Pretend the entry was last used ``seconds`` ago."""
+    then = time.time() - seconds
+    os.utime(cache.cache_dir / f"{key}.json", (then, then))
+
+
+def test_key_ignores_json_formatting_but_not_model():
+    a = StrategyCache.make_key('{"target": "10.0.0.1", "mode": "fast"}', "llama3")
+    b = StrategyCache.make_key('{"mode":"fast","target":"10.0.0.1"}', "llama3")
+    assert a == b
+    assert StrategyCache.make_key('{"mode":"fast","target":"10.0.0.1"}', "mistral") != a
+    assert StrategyCache.make_key('{"mode":"full","target":"10.0.0.1"}', "llama3") != a
+
+
+def test_round_trip_and_miss(tmp_path):
+    cache = StrategyCache(tmp_path / "cache")
+    assert cache.get("missing") is None
+    cache.put("k", "llama3", {"recommendations": [{"command": "whoami"}]})
+    assert cache.get("k") == {"recommendations": [{"command": "whoami"}]}
+
+
+def test_corrupt_entry_is_a_miss(tmp_path):
+    cache = StrategyCache(tmp_path)
+    (tmp_path / "k.json").write_text("{not json", encoding="utf-8")
+    assert cache.get("k") is None
+
+
+def test_expired_entry_is_dropped(tmp_path, monkeypatch):
+    cache = StrategyCache(tmp_path, ttl_seconds=60)
+    cache.put("k", "llama3", {"x": 1})
+    real_time = time.time
+    monkeypatch.setattr(time, "time", lambda: real_time() + 120)
+    assert cache.get("k") is None
+    assert not (tmp_path / "k.json").exists()
+
+
+def test_zero_ttl_never_expires(tmp_path, monkeypatch):
+    cache = StrategyCache(tmp_path, ttl_seconds=0)
+    cache.put("k", "llama3", {"x": 1})
+    real_time = time.time
+    monkeypatch.setattr(time, "time", lambda: real_time() + 10 * 365 * 24 * 3600)
+    assert cache.get("k") == {"x": 1}
+
+
+def test_hit_refreshes_last_use(tmp_path):
+    cache = StrategyCache(tmp_path)
+    cache.put("k", "llama3", {"x": 1})
+    _age(cache, "k", 3600)
+    before = (tmp_path / "k.json").stat().st_mtime
+    cache.get("k")
+    assert (tmp_path / "k.json").stat().st_mtime > before
+
+
+def test_evict_drops_least_recently_used_first(tmp_path):
+    cache = StrategyCache(tmp_path, max_bytes=0)
+    for key in ("a", "b", "c"):
+        cache.put(key, "llama3", {"pad": "x" * 100})
+    _age(cache, "a", 30)
+    _age(cache, "b", 20)
+    _age(cache, "c", 10)
+    cache.get("a")
+
+    # Room for "a" and "c" only: "b" is now the least recently used.
+    cache.max_bytes = sum((tmp_path / f"{key}.json").stat().st_size for key in ("a", "c"))
+    assert cache.evict() == 1
+    assert sorted(p.stem for p in tmp_path.glob("*.json")) == ["a", "c"]
+
+
+def test_put_evicts_entries_unused_for_longer_than_ttl(tmp_path):
+    cache = StrategyCache(tmp_path, ttl_seconds=60)
+    cache.put("old", "llama3", {"x": 1})
+    _age(cache, "old", 120)
+    cache.put("new", "llama3", {"x": 2})
+    assert [p.stem for p in tmp_path.glob("*.json")] == ["new"]
+    assert json.loads((tmp_path / "new.json").read_text())["model"] == "llama3"
+
+
+def test_evict_without_cache_dir(tmp_path):
+    assert StrategyCache(tmp_path / "missing").evict() == 0
+
+
+def test_concurrent_puts_of_one_key(tmp_path):
+    cache = StrategyCache(tmp_path)
+    errors = []
+
+    def put(n: int) -> None:
+        for _ in range(20):
+            if not cache.put("k", "llama3", {"writer": n, "pad": "x" * 4096}):
+                errors.append(n)
+
+    threads = [threading.Thread(target=put, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert cache.get("k")["writer"] in range(8)
+    assert [p.name for p in tmp_path.iterdir()] == ["k.json"]
+
+
+def test_failed_put_is_not_an_error(tmp_path):
+    blocker = tmp_path / "cache"
+    blocker.write_text("not a directory", encoding="utf-8")
+    cache = StrategyCache(blocker)
+    assert cache.put("k", "llama3", {"x": 1}) is False
+    assert cache.get("k") is None
+    # An unserialisable result is skipped the same way, without leaving a temp file behind.
+    cache = StrategyCache(tmp_path / "ok")
+    assert cache.put("k", "llama3", {"x": object()}) is False
+    assert list((tmp_path / "ok").iterdir()) == []
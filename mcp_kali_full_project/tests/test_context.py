@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from mcp_kali_assistant.ai_engine.context import budget_from_config, compact_context, render_context
+from mcp_kali_assistant.parsers.models import Host, NmapSummary, Port
+
+
+def _port(portid: str, service: str, state: str = "open", product: str = "") -> Port:
+    return Port(portid, "tcp", state, reason="syn-ack", service_name=service, product=product or None)
+
+
+def _summary() -> NmapSummary:
+    return NmapSummary(
+        [
+            Host("10.0.0.1", "ipv4", "Linux 5.4", [_port("80", "http", product="nginx"), _port("22", "ssh")]),
+            Host("10.0.0.2", "ipv4", "Unknown", [_port("80", "http", product="nginx"), _port("25", "smtp", "closed")]),
+            Host("10.0.0.3", "ipv4", "Unknown", [_port("443", "https", "filtered")]),
+            Host("10.0.0.4", "ipv4", "Unknown", []),
+        ]
+    )
+
+
+def _compact(summary: NmapSummary, budget: int = 100_000):
+    return compact_context("10.0.0.0/24", "fast", "lab", {"icmp_reachable": True}, summary, budget)
+
+
+def test_services_are_listed_once_with_all_their_hosts():
+    context, stats = _compact(_summary())
+    assert context["services"] == [
+        {"port": "80/tcp", "service": "http nginx", "hosts": ["10.0.0.1", "10.0.0.2"]},
+        {"port": "22/tcp", "service": "ssh", "hosts": ["10.0.0.1"]},
+    ]
+    assert context["os"] == {"10.0.0.1": "Linux 5.4"}
+    assert context["notes"] == ["2 hosts up with no open ports"]
+    assert context["reachability"] == {"icmp": True, "tcp_open": []}
+    assert "hosts" not in context
+    assert not stats.truncated
+    assert (stats.hosts_total, stats.hosts_kept, stats.ports_total, stats.open_ports_total) == (4, 2, 5, 3)
+    assert stats.chars == len(render_context(context))
+
+
+def test_single_host_without_open_ports_note():
+    context, _ = _compact(NmapSummary([Host("10.0.0.9", ports=[_port("80", "http", "closed")])]))
+    assert context["services"] == []
+    assert context["notes"] == ["1 host up with no open ports"]
+    assert "os" not in context
+
+
+def test_budget_drops_least_interesting_ports_first():
+    hosts = [Host(f"10.0.1.{i}", ports=[_port("80", "http"), _port(str(9000 + i), "unknown")]) for i in range(40)]
+    full, _ = _compact(NmapSummary(hosts))
+    budget = len(render_context(full)) // 2
+    context, stats = _compact(NmapSummary(hosts), budget)
+
+    assert stats.chars <= budget
+    assert stats.truncated
+    assert stats.chars == len(render_context(context))
+    # Every host's web port outranks the unknown high ports.
+    assert context["services"][0]["port"] == "80/tcp"
+    assert len(context["services"][0]["hosts"]) == 40
+    assert stats.open_ports_kept == 40 + len(context["services"]) - 1
+    omitted = 80 - stats.open_ports_kept
+    assert context["notes"] == [f"{omitted} less interesting open ports omitted (0 hosts not listed)"]
+
+
+def test_tiny_budget_keeps_nothing_but_reports_it():
+    context, stats = _compact(_summary(), budget=10)
+    assert context["services"] == []
+    assert stats.open_ports_kept == 0
+    assert stats.hosts_kept == 0
+    assert context["notes"][-1] == "3 less interesting open ports omitted (2 hosts not listed)"
+
+
+def test_empty_scan():
+    context, stats = _compact(NmapSummary())
+    assert context["services"] == []
+    assert "notes" not in context
+    assert stats.describe().startswith(f"{stats.chars:,} chars")
+
+
+def test_budget_from_config():
+    assert budget_from_config({"context_budget_tokens": 1000}) == 4000
+    assert budget_from_config({"context_budget_chars": 5000}) == 5000
+    assert budget_from_config({}) > 0
@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import subprocess
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Tuple
+
+import pytest
+
+from mcp_kali_assistant.core.executor import (
+    PREVIEW_HEAD_CHARS,
+    CommandJob,
+    CommandResult,
+    HeadTailBuffer,
+    ParallelExecutor,
+    RunningCommands,
+    _OutputBudget,
+    job_host,
+    run_command,
+)
+from mcp_kali_assistant.core.session import ExecutedCommand
+
+
+def _job(index: int, category: str = "web", host: str = "10.0.0.1") -> CommandJob:
+    return CommandJob(index=index, command=f"true #{index}", category=category, host=host)
+
+
+def _result(job: CommandJob) -> CommandResult:
+    record = ExecutedCommand(
+        index=job.index,
+        name=f"cmd_{job.index}",
+        command=job.command,
+        category=job.category,
+        priority=5,
+        rationale="",
+        started_at="",
+        ended_at="",
+        exit_code=0,
+        log_file="",
+    )
+    return CommandResult(job=job, record=record, preview="")
+
+
+class _Tracker:
+    """A ``run_job`` that sleeps briefly and records the peak concurrency per key."""
+
+    def __init__(self, seconds: float = 0.05):
+        self.seconds = seconds
+        self.lock = threading.Lock()
+        self.active: Counter = Counter()
+        self.peak: Dict[object, int] = {}
+
+    def _enter(self, key: object) -> None:
+        self.active[key] += 1
+        self.peak[key] = max(self.peak.get(key, 0), self.active[key])
+
+    def __call__(self, job: CommandJob) -> CommandResult:
+        with self.lock:
+            self._enter("all")
+            self._enter(job.limit_key)
+        time.sleep(self.seconds)
+        with self.lock:
+            self.active["all"] -= 1
+            self.active[job.limit_key] -= 1
+        return _result(job)
+
+
+def test_results_come_back_in_index_order():
+    jobs = [_job(i, category=f"c{i}") for i in (3, 1, 2)]
+    done: List[int] = []
+
+    def run_job(job: CommandJob) -> CommandResult:
+        # Later indices finish first.
+        time.sleep(0.01 * (4 - job.index))
+        return _result(job)
+
+    results = ParallelExecutor(max_workers=3).run(jobs, run_job, on_done=lambda r: done.append(r.job.index))
+    assert [r.job.index for r in results] == [1, 2, 3]
+    assert sorted(done) == [1, 2, 3]
+
+
+def test_global_cap():
+    tracker = _Tracker()
+    ParallelExecutor(max_workers=2).run([_job(i, category=f"c{i}") for i in range(6)], tracker)
+    assert tracker.peak["all"] == 2
+
+
+def test_category_cap_is_per_host():
+    jobs = [_job(i, "web", host) for i, host in enumerate(["a", "a", "a", "b", "b", "b"])]
+    jobs += [_job(10 + i, "smb", "a") for i in range(3)]
+    tracker = _Tracker()
+    results = ParallelExecutor(max_workers=8, category_limits={"web": 1}).run(jobs, tracker)
+
+    assert len(results) == len(jobs)
+    assert tracker.peak[("web", "a")] == 1
+    assert tracker.peak[("web", "b")] == 1
+    # Uncapped categories may use the whole pool.
+    assert tracker.peak[("smb", "a")] == 3
+
+
+def test_capped_jobs_do_not_block_other_categories():
+    # With one worker per web host, smb jobs queued behind web ones still run alongside them.
+    jobs = [_job(i, "web") for i in range(3)] + [_job(3, "smb")]
+    starts: Dict[int, float] = {}
+
+    def run_job(job: CommandJob) -> CommandResult:
+        starts[job.index] = time.monotonic()
+        time.sleep(0.05)
+        return _result(job)
+
+    ParallelExecutor(max_workers=4, category_limits={"web": 1}).run(jobs, run_job)
+    assert starts[3] - starts[0] < 0.04
+
+
+def test_invalid_limits_are_clamped():
+    executor = ParallelExecutor(max_workers=0, category_limits={"web": 0})
+    assert executor.max_workers == 1
+    assert executor.category_limits == {"web": 1}
+    assert [r.job.index for r in executor.run([_job(1), _job(2)], _Tracker(0))] == [1, 2]
+
+
+def test_job_error_propagates():
+    def run_job(job: CommandJob) -> CommandResult:
+        if job.index == 2:
+            raise RuntimeError("boom")
+        return _result(job)
+
+    with pytest.raises(RuntimeError, match="boom"):
+        ParallelExecutor(max_workers=2).run([_job(1, "a"), _job(2, "b")], run_job)
+
+
+@pytest.mark.parametrize(
+    ("command", "expected"),
+    [
+        ("nikto -h http://10.0.0.12/", "10.0.0.12"),
+        ("enum4linux 10.0.0.1", "10.0.0.1"),
+        ("curl http://10.0.0.1:8080/", "10.0.0.1"),
+        ("ping -c1 10.0.0.123", "default"),
+        ("whoami", "default"),
+    ],
+)
+def test_job_host(command: str, expected: str):
+    # 10.0.0.1 comes first so a substring match would wrongly claim 10.0.0.12.
+    known: Tuple[str, ...] = ("", "10.0.0.1", "10.0.0.12")
+    assert job_host(command, known, "default") == expected
+
+
+def test_head_tail_buffer_short_output_is_kept_whole():
+    buf = HeadTailBuffer(head=5, tail=5)
+    for chunk in ("ab", "cde", "fg"):
+        buf.write(chunk)
+    assert buf.render() == "abcdefg"
+    assert not buf.truncated
+
+
+def test_head_tail_buffer_keeps_both_ends():
+    buf = HeadTailBuffer(head=4, tail=3)
+    for chunk in ("0123", "45", "6789", "X"):
+        buf.write(chunk)
+    assert buf.truncated
+    assert buf.render() == "0123\n[...]\n89X"
+
+
+def test_output_budget():
+    budget = _OutputBudget(10)
+    assert [budget.take(4), budget.take(4), budget.take(4), budget.take(4)] == [4, 4, 2, 0]
+    assert budget.exceeded
+    unlimited = _OutputBudget(0)
+    assert unlimited.take(1 << 30) == 1 << 30
+    assert not unlimited.exceeded
+
+
+def _shell_job(command: str, index: int = 1) -> CommandJob:
+    return CommandJob(index=index, command=command, category="generic", host="local", info={"name": "t", "priority": 2})
+
+
+def test_run_command_logs_stdout_then_stderr(tmp_path):
+    lines: List[str] = []
+    result = run_command(
+        _shell_job("printf 'one\\ntwo\\r\\nthree'; echo oops >&2; exit 3"),
+        tmp_path / "cmd.log",
+        on_line=lines.append,
+    )
+    assert result.record.exit_code == 3
+    assert (result.record.name, result.record.priority) == ("t", 2)
+    assert not result.timed_out
+    assert result.preview == "one\ntwo\r\nthree"
+    assert lines == ["one", "two", "three"]
+    assert (tmp_path / "cmd.log").read_bytes() == b"one\ntwo\r\nthree\n\n[STDERR]\noops\n"
+
+
+def test_run_command_truncates_at_output_budget(tmp_path):
+    result = run_command(_shell_job("head -c 100000 /dev/zero | tr '\\0' x"), tmp_path / "cmd.log", max_output_bytes=1000)
+    log = (tmp_path / "cmd.log").read_text()
+    assert log.startswith("x" * 1000 + "\n\n[STDERR]\n")
+    assert "[Output truncated at 1000 bytes]" in log
+    # The preview still shows both ends of the full stream.
+    assert result.preview.startswith("x" * PREVIEW_HEAD_CHARS)
+    assert "[...]" in result.preview
+
+
+def test_run_command_timeout_keeps_partial_output(tmp_path):
+    started = time.monotonic()
+    result = run_command(_shell_job("echo started; sleep 30; echo never"), tmp_path / "cmd.log", timeout=1)
+    assert time.monotonic() - started < 10
+    assert result.timed_out
+    assert result.record.exit_code == -1
+    log = (tmp_path / "cmd.log").read_text()
+    assert log.startswith("started\n")
+    assert "never" not in log
+    assert "[Command timed out after 1s; partial output kept above]" in log
+
+
+def test_running_commands_kills_late_arrivals():
+    running = RunningCommands()
+    proc = subprocess.Popen(["sleep", "30"], start_new_session=True)
+    running.add(proc)
+    assert running.kill_all() == 1
+    assert proc.wait(timeout=5) != 0
+
+    late = subprocess.Popen(["sleep", "30"], start_new_session=True)
+    running.add(late)
+    assert late.wait(timeout=5) != 0
+    assert running.kill_all() == 0
+
+
+def _alive(pid: int) -> bool:
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # A killed child the pool thread has not reaped yet is a zombie.
+            return f.read().split(")")[-1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+def test_failed_job_kills_commands_still_running(tmp_path):
+    executor = ParallelExecutor(max_workers=2)
+    pid_file = tmp_path / "pid"
+
+    def run_job(job: CommandJob) -> CommandResult:
+        if job.index == 2:
+            # Give the long command time to start, then fail like an interrupt would.
+            deadline = time.monotonic() + 5
+            while not pid_file.exists() and time.monotonic() < deadline:
+                time.sleep(0.01)
+            raise KeyboardInterrupt
+        return run_command(job, tmp_path / f"{job.index}.log", running=executor.running)
+
+    long_job = CommandJob(index=1, command=f"echo $$ > {pid_file}; exec sleep 30", category="a", host="local")
+    started = time.monotonic()
+    with pytest.raises(KeyboardInterrupt):
+        executor.run([long_job, _job(2, "b")], run_job)
+    assert time.monotonic() - started < 10
+    assert executor.running.closed
+
+    pid = int(pid_file.read_text())
+    deadline = time.monotonic() + 5
+    while _alive(pid) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not _alive(pid)
+
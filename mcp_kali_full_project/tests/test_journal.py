@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from mcp_kali_assistant.core.journal import (
+    JOURNAL_FILENAME,
+    PHASE_AI_STRATEGY,
+    PHASE_NMAP,
+    PHASE_REACHABILITY,
+    PHASES,
+    SessionJournal,
+)
+from mcp_kali_assistant.core.session import ExecutedCommand, Session
+
+
+def _executed(index: int) -> ExecutedCommand:
+    return ExecutedCommand(
+        index=index,
+        name=f"cmd_{index}",
+        command="whoami",
+        category="generic",
+        priority=5,
+        rationale="",
+        started_at="2026-01-01T00:00:00Z",
+        ended_at="2026-01-01T00:00:01Z",
+        exit_code=0,
+        log_file=f"cmd_{index}.log",
+    )
+
+
+def test_append_and_read(tmp_path):
+    journal = SessionJournal(tmp_path / "s1")
+    assert journal.read() == []
+    journal.append("session_started")
+    journal.append("phase_completed", phase=PHASE_REACHABILITY)
+    records = journal.read()
+    assert [r["event"] for r in records] == ["session_started", "phase_completed"]
+    assert records[1]["phase"] == PHASE_REACHABILITY
+    assert all(r["ts"].endswith("Z") for r in records)
+
+
+def test_truncated_last_line_is_skipped(tmp_path):
+    journal = SessionJournal(tmp_path)
+    journal.append("phase_completed", phase=PHASE_REACHABILITY)
+    with (tmp_path / JOURNAL_FILENAME).open("a", encoding="utf-8") as f:
+        # A crash in the middle of the next append.
+        f.write('{"ts":"2026-01-01T00:00:00Z","event":"phase_comp')
+    assert journal.completed_phases() == {PHASE_REACHABILITY}
+
+
+def test_completed_phases_ignores_other_events(tmp_path):
+    journal = SessionJournal(tmp_path)
+    journal.append("phase_completed", phase=PHASE_NMAP)
+    journal.append("commands_selected", indices=[1, 2])
+    journal.append("phase_completed")
+    assert journal.completed_phases() == {PHASE_NMAP}
+
+
+def test_resume_sees_the_last_checkpoint(tmp_path):
+    session = Session(target="10.0.0.1", mode="fast", session_id="run-1")
+    session.checkpoint(tmp_path, "session_started")
+    for phase in (PHASE_REACHABILITY, PHASE_NMAP):
+        session.checkpoint(tmp_path, "phase_completed", phase=phase)
+    session.ai_recommendations = [{"name": "a", "command": "whoami"}, {"name": "b", "command": "id"}]
+    session.selected_indices = [1, 2]
+    session.checkpoint(tmp_path, "phase_completed", phase=PHASE_AI_STRATEGY)
+    # Commands finish out of order; only #2 completed before the interruption.
+    session.record_executed(_executed(2))
+    session.checkpoint(tmp_path, "command_executed", index=2, exit_code=0)
+    # Not checkpointed: lost in the crash.
+    session.record_executed(_executed(1))
+
+    resumed = Session.load(tmp_path, "run-1")
+    completed = SessionJournal(tmp_path / "run-1").completed_phases()
+    assert [p for p in PHASES if p not in completed] == ["enumeration"]
+    assert resumed.selected_indices == [1, 2]
+    assert [c.index for c in resumed.executed_commands] == [2]
+    assert [r["command"] for r in resumed.ai_recommendations] == ["whoami", "id"]
+
+    resumed.record_executed(_executed(1))
+    assert [c.index for c in resumed.executed_commands] == [1, 2]
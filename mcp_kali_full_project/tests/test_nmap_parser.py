@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from conftest import NMAPRUN_CLOSE, NMAPRUN_OPEN, host_xml
+from mcp_kali_assistant.parsers.nmap_parser import (
+    NmapHostWatcher,
+    iter_nmap_hosts,
+    load_nmap_summary,
+    parse_nmap_xml,
+)
+
+WEB = host_xml(
+    "10.0.0.1",
+    [("22", "open", "ssh"), ("80", "open", "http"), ("443", "closed", "https"), ("8080", "filtered", None)],
+    os_name="Linux 5.4",
+    service_attrs={"product": "Apache httpd", "version": "2.4.52"},
+)
+DOWN = host_xml("10.0.0.2", state="down")
+BARE = host_xml("10.0.0.3")
+
+
+def test_iter_hosts_skips_down_hosts_and_keeps_order(write_xml):
+    path = write_xml("scan.xml", WEB, DOWN, BARE)
+    hosts = list(iter_nmap_hosts(path))
+    assert [h.address for h in hosts] == ["10.0.0.1", "10.0.0.3"]
+    assert hosts[0].os_guess == "Linux 5.4"
+    assert hosts[1].os_guess == "Unknown"
+    assert hosts[1].ports == []
+
+
+def test_port_fields(write_xml):
+    path = write_xml("scan.xml", WEB)
+    http = next(p for p in next(iter_nmap_hosts(path)).ports if p.portid == "80")
+    assert (http.protocol, http.state, http.reason) == ("tcp", "open", "syn-ack")
+    assert (http.service_name, http.product, http.version) == ("http", "Apache httpd", "2.4.52")
+
+
+def test_state_filter(write_xml):
+    path = write_xml("scan.xml", WEB)
+    (host,) = iter_nmap_hosts(path, states={"open"})
+    assert [p.portid for p in host.ports] == ["22", "80"]
+    (host,) = iter_nmap_hosts(path, states=["open", "filtered"])
+    assert [p.portid for p in host.ports] == ["22", "80", "8080"]
+
+
+def test_nested_host_elements_are_not_hosts(write_xml):
+    # Only direct children of <nmaprun> are scan results.
+    nested = '<prescript><host><address addr="192.0.2.9" addrtype="ipv4"/></host></prescript>'
+    path = write_xml("scan.xml", nested, WEB)
+    assert [h.address for h in iter_nmap_hosts(path)] == ["10.0.0.1"]
+
+
+def test_empty_scan(write_xml):
+    path = write_xml("empty.xml")
+    assert list(iter_nmap_hosts(path)) == []
+    assert parse_nmap_xml(path) == {"hosts": []}
+    assert not load_nmap_summary(path)
+
+
+def test_missing_file_raises(tmp_path: Path):
+    with pytest.raises(FileNotFoundError):
+        list(iter_nmap_hosts(tmp_path / "missing.xml"))
+
+
+def test_summary_dict_round_trip(write_xml):
+    path = write_xml("scan.xml", WEB, DOWN, BARE)
+    summary = load_nmap_summary(path)
+    assert len(summary) == 2
+    assert summary.open_port_count() == 2
+    assert summary.to_dict() == parse_nmap_xml(path)
+    assert type(summary).from_dict(summary.to_dict()) == summary
+
+
+def test_watcher_yields_hosts_as_they_are_written(tmp_path: Path):
+    path = tmp_path / "live.xml"
+    watcher = NmapHostWatcher(path)
+    # Nmap not started yet.
+    assert watcher.poll() == []
+
+    with path.open("w", encoding="utf-8") as f:
+        f.write(NMAPRUN_OPEN)
+        f.flush()
+        assert watcher.poll() == []
+
+        f.write(WEB)
+        f.flush()
+        assert [h.address for h in watcher.poll()] == ["10.0.0.1"]
+        assert watcher.poll() == []
+
+        # A host split across two writes is only reported once it is complete.
+        f.write(BARE[:40])
+        f.flush()
+        assert watcher.poll() == []
+        f.write(BARE[40:] + DOWN)
+        f.flush()
+        assert [h.address for h in watcher.poll()] == ["10.0.0.3"]
+
+        f.write(NMAPRUN_CLOSE)
+    assert watcher.poll() == []
+
+
+def test_watcher_matches_full_parse(write_xml):
+    path = write_xml("scan.xml", WEB, DOWN, BARE)
+    watcher = NmapHostWatcher(path, states={"open"})
+    assert watcher.poll() == list(iter_nmap_hosts(path, states={"open"}))
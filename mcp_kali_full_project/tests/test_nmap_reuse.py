@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import os
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+import pytest
+
+from conftest import NMAPRUN_CLOSE, NMAPRUN_OPEN, host_xml
+from mcp_kali_assistant.core.modes import SCAN_PROFILES, profile_dominates
+from mcp_kali_assistant.core.session import Session
+from mcp_kali_assistant.scanners.nmap_reuse import (
+    _scan_finished_at,
+    find_reusable_scan,
+    merge_differential,
+    reuse_scan,
+    split_fingerprint_args,
+)
+
+TARGET = "10.0.0.1"
+
+
+def _scan_xml(finished_at: float, hosts: str = "") -> str:
+    stats = f'<runstats><finished time="{int(finished_at)}" elapsed="12.5"/><hosts up="1" down="0" total="1"/></runstats>\n'
+    return NMAPRUN_OPEN + (hosts or host_xml(TARGET, [("80", "open", "http")])) + stats + NMAPRUN_CLOSE
+
+
+def _session_with_scan(root: Path, session_id: str, mode: str, xml: str, target: str = TARGET) -> Path:
+    Session(target=target, mode=mode, session_id=session_id).save(root)
+    path = root / session_id / "nmap.xml"
+    path.write_text(xml, encoding="utf-8")
+    return path
+
+
+def test_reused_copy_keeps_the_original_scan_age(tmp_path):
+    two_hours_ago = time.time() - 2 * 3600
+    _session_with_scan(tmp_path, "old", "fast", _scan_xml(two_hours_ago))
+
+    found = find_reusable_scan(tmp_path, TARGET, "fast", ttl_seconds=3 * 3600)
+    assert found is not None and found.session_id == "old"
+    assert 2 * 3600 - 5 < found.age_seconds < 2 * 3600 + 5
+
+    # The copy made by reusing the scan must not look like a fresh scan.
+    Session(target=TARGET, mode="fast", session_id="copy").save(tmp_path)
+    reuse_scan(found, tmp_path / "copy" / "nmap.xml")
+    (tmp_path / "old" / "nmap.xml").unlink()
+    again = find_reusable_scan(tmp_path, TARGET, "fast", ttl_seconds=3 * 3600)
+    assert again is not None and again.session_id == "copy"
+    assert again.age_seconds > 2 * 3600 - 5
+    assert find_reusable_scan(tmp_path, TARGET, "fast", ttl_seconds=3600) is None
+
+
+def _port(portid: str, state: str = "open", service: str = "") -> str:
+    service_el = f'<service name="{service}" product="{service}-d"/>' if service else ""
+    return f'<port protocol="tcp" portid="{portid}"><state state="{state}"/>{service_el}</port>'
+
+
+def _root(hosts: str, scanned: str = "") -> ET.Element:
+    info = f'<scaninfo type="syn" protocol="tcp" services="{scanned}"/>' if scanned else ""
+    return ET.fromstring(f"<nmaprun>{info}{hosts}</nmaprun>")
+
+
+def _host(addr: str, *ports: str, extra: str = "") -> str:
+    return f'<host><status state="up"/><address addr="{addr}"/><ports>{"".join(ports)}</ports>{extra}</host>'
+
+
+def _services(root: ET.Element, addr: str):
+    host = next(h for h in root.findall("host") if h.find("address").get("addr") == addr)
+    return {
+        p.get("portid"): (p.find("state").get("state"), p.find("service").get("name") if p.find("service") is not None else None)
+        for p in host.findall("ports/port")
+    }
+
+
+def test_merge_differential_reprobed_reused_and_carried_ports():
+    previous = _root(
+        _host(
+            "10.0.0.1",
+            _port("21", service="ftp"),
+            _port("22", service="ssh"),
+            _port("80", service="http"),
+            _port("8080", service="http-proxy"),
+            extra='<os><osmatch name="Linux 5.x"/></os>',
+        )
+    )
+    # State-only probe of the top ports: 21 closed since, 443 newly open, 8080 not probed.
+    state = _root(
+        _host("10.0.0.1", _port("21", "closed"), _port("22"), _port("80"), _port("443"))
+        + _host("10.0.0.2", _port("22")),
+        scanned="1-1024",
+    )
+    fingerprint = _root(_host("10.0.0.1", _port("443", service="https")) + _host("10.0.0.2", _port("22", service="ssh")))
+
+    stats = merge_differential(state, previous, fingerprint)
+
+    assert _services(state, "10.0.0.1") == {
+        "21": ("closed", None),
+        "22": ("open", "ssh"),
+        "80": ("open", "http"),
+        "443": ("open", "https"),
+        "8080": ("open", "http-proxy"),
+    }
+    assert _services(state, "10.0.0.2") == {"22": ("open", "ssh")}
+    assert (stats.hosts, stats.reused_ports, stats.fingerprinted_ports, stats.carried_ports) == (2, 2, 2, 1)
+    # OS details come from the previous scan when the new scans have none.
+    assert state.find("host/os/osmatch").get("name") == "Linux 5.x"
+
+
+def test_merge_differential_without_fingerprint_scan():
+    previous = _root(_host("10.0.0.1", _port("22", service="ssh")))
+    state = _root(_host("10.0.0.1", _port("22"), _port("25")), scanned="22,25")
+    stats = merge_differential(state, previous, None)
+    assert _services(state, "10.0.0.1") == {"22": ("open", "ssh"), "25": ("open", None)}
+    assert (stats.reused_ports, stats.fingerprinted_ports, stats.carried_ports) == (1, 0, 0)
+
+
+def test_split_fingerprint_args():
+    state, fingerprint = split_fingerprint_args(
+        ["-T4", "-p-", "-sV", "--script", "vuln", "-sC", "--version-intensity", "9", "-A", "-O", "-oX"]
+    )
+    assert state == ["-T4", "-p-", "-oX"]
+    assert fingerprint == ["-sV", "--script", "vuln", "-sC", "--version-intensity", "9", "-A", "-O"]
+    # A trailing option without its value is left alone.
+    assert split_fingerprint_args(["-T4", "--script"]) == (["-T4", "--script"], [])
+
+
+@pytest.mark.parametrize(
+    ("candidate", "wanted", "expected"),
+    [
+        ("fast", "fast", True),
+        ("balanced", "fast", True),
+        ("aggressive", "balanced", True),
+        ("fast", "balanced", False),
+        ("low-noise", "balanced", False),
+        ("unknown", "fast", False),
+    ],
+)
+def test_profile_dominates(candidate: str, wanted: str, expected: bool):
+    assert profile_dominates(candidate, wanted) is expected
+
+
+def test_every_profile_covers_only_known_modes():
+    for profile in SCAN_PROFILES.values():
+        assert set(profile.covers) <= set(SCAN_PROFILES) - {profile.name}
+
+
+def test_find_reusable_scan_filters(tmp_path):
+    now = time.time()
+    _session_with_scan(tmp_path, "fast-recent", "fast", _scan_xml(now - 60))
+    _session_with_scan(tmp_path, "balanced-older", "balanced", _scan_xml(now - 600))
+    _session_with_scan(tmp_path, "aggr-stale", "aggressive", _scan_xml(now - 7200))
+    _session_with_scan(tmp_path, "other-target", "aggressive", _scan_xml(now), target="10.0.0.10")
+
+    assert find_reusable_scan(tmp_path, TARGET, "fast").session_id == "fast-recent"
+    # Only a dominating mode answers a balanced scan, and the stale aggressive one is past the TTL.
+    assert find_reusable_scan(tmp_path, TARGET, "balanced").session_id == "balanced-older"
+    assert find_reusable_scan(tmp_path, TARGET, "balanced", ttl_seconds=300) is None
+    assert find_reusable_scan(tmp_path, TARGET, "aggressive") is None
+    assert find_reusable_scan(tmp_path, TARGET, "aggressive", ttl_seconds=0).session_id == "aggr-stale"
+    assert find_reusable_scan(tmp_path, TARGET, "fast", exclude_session_id="fast-recent").session_id == "balanced-older"
+    # Targets match exactly, not as a substring.
+    assert find_reusable_scan(tmp_path, "10.0.0.1", "aggressive", ttl_seconds=0).session_id == "aggr-stale"
+
+
+def test_partial_scans_are_not_reused(tmp_path):
+    complete = _scan_xml(time.time() - 60)
+    partial = complete[: complete.index("<runstats>")]
+    _session_with_scan(tmp_path, "interrupted", "fast", partial)
+    _session_with_scan(tmp_path, "no-xml", "fast", complete).unlink()
+    assert find_reusable_scan(tmp_path, TARGET, "fast") is None
+    assert _scan_finished_at(tmp_path / "interrupted" / "nmap.xml") is None
+
+
+def test_finished_without_time_falls_back_to_mtime(tmp_path):
+    path = tmp_path / "nmap.xml"
+    path.write_text(NMAPRUN_OPEN + "<runstats><finished elapsed=\"1\"/></runstats>" + NMAPRUN_CLOSE, encoding="utf-8")
+    os.utime(path, (1_000_000, 1_000_000))
+    assert _scan_finished_at(path) == 1_000_000
+    # A long document: only the tail is read.
+    path.write_text(_scan_xml(2_000_000, host_xml(TARGET) * 2000), encoding="utf-8")
+    assert _scan_finished_at(path) == 2_000_000
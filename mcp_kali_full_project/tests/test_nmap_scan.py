@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import ipaddress
+import json
+import os
+import sys
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from conftest import host_xml
+from mcp_kali_assistant.core.modes import ScanStage, get_scan_profile
+from mcp_kali_assistant.parsers.nmap_parser import iter_nmap_hosts
+from mcp_kali_assistant.scanners.nmap_scan import (
+    _hosts_by_port_set,
+    _stage_args,
+    discovery_scan_flag,
+    merge_nmap_xml,
+    run_nmap_scan,
+    split_targets,
+)
+
+
+def _addresses(spec: str):
+    """Every address an nmap target spec (CIDR, octet range or single host) covers."""
+    if "/" in spec:
+        return [str(a) for a in ipaddress.ip_network(spec)]
+    octets = []
+    for octet in spec.split("."):
+        lo, _, hi = octet.partition("-")
+        octets.append(range(int(lo), int(hi or lo) + 1))
+    return [f"{a}.{b}.{c}.{d}" for a in octets[0] for b in octets[1] for c in octets[2] for d in octets[3]]
+
+
+def _covered(groups):
+    return [addr for group in groups for spec in group for addr in _addresses(spec)]
+
+
+@pytest.mark.parametrize("target", ["10.0.0.0/24", "10.0.0.1-200", "10.0.0-3.1", "10.0.0.0/30 10.0.1.5"])
+def test_split_covers_every_address_once(target):
+    expected = [addr for spec in target.split() for addr in _addresses(spec)]
+    groups = split_targets(target, 4)
+    assert len(groups) == 4
+    assert _covered(groups) == expected
+
+
+def test_split_large_cidr_into_contiguous_subnets():
+    # A /16 is cut into subnets, never expanded to addresses.
+    assert split_targets("10.1.0.0/16", 4) == [["10.1.0.0/18"], ["10.1.64.0/18"], ["10.1.128.0/18"], ["10.1.192.0/18"]]
+
+
+def test_split_octet_range_keeps_ranges():
+    assert split_targets("192.168.1.1-100", 2) == [["192.168.1.1-50"], ["192.168.1.51-100"]]
+
+
+def test_split_cannot_exceed_target_size():
+    assert split_targets("10.0.0.1 10.0.0.2", 8) == [["10.0.0.1"], ["10.0.0.2"]]
+    assert split_targets("10.0.0.7/32", 4) == [["10.0.0.7"]]
+
+
+def test_split_keeps_hostnames_whole():
+    groups = split_targets("example.test,10.0.0.0/29", 2)
+    assert sorted(spec for group in groups for spec in group if not spec[0].isdigit()) == ["example.test"]
+    assert len(_covered([[s for s in g if s != "example.test"] for g in groups])) == 8
+
+
+def test_merge_combines_port_shards(write_xml, tmp_path):
+    first = write_xml("a.xml", host_xml("10.0.0.1", [("22", "open", "ssh")]), host_xml("10.0.0.2", state="down"))
+    second = write_xml(
+        "b.xml",
+        host_xml("10.0.0.1", [("22", "open", None), ("80", "open", "http")], os_name="Linux"),
+        host_xml("10.0.0.2", [("443", "open", "https")]),
+    )
+    out = tmp_path / "merged" / "out.xml"
+    assert merge_nmap_xml([first, second], out) == 2
+
+    hosts = {h.address: h for h in iter_nmap_hosts(out)}
+    assert [(p.portid, p.service_name) for p in hosts["10.0.0.1"].ports] == [("22", "ssh"), ("80", "http")]
+    assert hosts["10.0.0.1"].os_guess == "Linux"
+    # Down in one shard but up in another: the host is up.
+    assert [p.portid for p in hosts["10.0.0.2"].ports] == ["443"]
+
+    stats = ET.parse(out).getroot().find("runstats/hosts")
+    assert (stats.get("up"), stats.get("down"), stats.get("total")) == ("2", "0", "2")
+
+
+def test_merge_prefers_the_more_detailed_port(write_xml, tmp_path):
+    discovery = write_xml("discovery.xml", host_xml("10.0.0.1", [("80", "open", None)]))
+    fingerprint = write_xml(
+        "fingerprint.xml",
+        host_xml("10.0.0.1", [("80", "open", "http")], service_attrs={"product": "nginx"}),
+    )
+    out = tmp_path / "out.xml"
+    merge_nmap_xml([discovery, fingerprint], out)
+    (host,) = iter_nmap_hosts(out)
+    assert [(p.service_name, p.product) for p in host.ports] == [("http", "nginx")]
+
+    # A less detailed later copy does not replace it.
+    merge_nmap_xml([fingerprint, discovery], out)
+    (host,) = iter_nmap_hosts(out)
+    assert [(p.service_name, p.product) for p in host.ports] == [("http", "nginx")]
+
+
+def test_merge_without_runstats(write_xml, tmp_path):
+    path = write_xml("a.xml", host_xml("10.0.0.1"), runstats=False)
+    out = tmp_path / "out.xml"
+    assert merge_nmap_xml([path], out) == 1
+    assert ET.parse(out).getroot().find("runstats") is None
+
+
+def test_merge_nothing_raises(tmp_path):
+    with pytest.raises(ValueError):
+        merge_nmap_xml([], tmp_path / "out.xml")
+
+
+def test_hosts_by_port_set_groups_identical_port_sets():
+    groups = _hosts_by_port_set({"10.0.0.1": ["80", "22"], "10.0.0.2": ["22", "80", "22"], "10.0.0.3": ["443"]})
+    assert groups == [(["10.0.0.1", "10.0.0.2"], ["22", "80"]), (["10.0.0.3"], ["443"])]
+    assert _hosts_by_port_set({}) == []
+
+
+def test_stage_args():
+    discovery, fingerprint = get_scan_profile("aggressive").stages
+    args = _stage_args(discovery, [])
+    assert args[0] == discovery_scan_flag() and args[-1] == "-oX" and "-p" not in args
+    args = _stage_args(fingerprint, ["8080", "22", "80", "22"])
+    # Ports go before "-oX", which must stay last for the XML path.
+    assert args[-3:] == ["-p", "22,80,8080", "-oX"]
+    assert _stage_args(ScanStage("plain", ["-sV", "-oX"]), ["22"]) == ["-sV", "-oX"]
+
+
+# Discovery results of the fake nmap: open ports per host.
+_DISCOVERED = {"10.0.0.1": ["22", "80"], "10.0.0.2": ["80", "22"], "10.0.0.3": ["443"]}
+
+_FAKE_NMAP = """#!{python}
+import json, sys
+sys.path.insert(0, {tests!r})
+from conftest import host_xml, nmap_xml
+
+argv = sys.argv[1:]
+with open({calls!r}, "a") as f:
+    f.write(json.dumps(argv) + "\\n")
+at = argv.index("-oX")
+xml_path, hosts = argv[at + 1], argv[at + 2:]
+if "-p" in argv:
+    # Fingerprint stage: every requested port, with service details.
+    ports = argv[argv.index("-p") + 1].split(",")
+    rendered = [host_xml(h, [(p, "open", "svc" + p) for p in ports], service_attrs={{"product": "fp"}}) for h in hosts]
+else:
+    discovered = json.loads({discovered!r})
+    rendered = [host_xml(h, [(p, "open", None) for p in ports]) for h, ports in discovered.items()]
+with open(xml_path, "w") as f:
+    f.write(nmap_xml(rendered))
+"""
+
+
+@pytest.fixture
+def fake_nmap(tmp_path, monkeypatch):
+    """Put an ``nmap`` on PATH that records its argv and writes canned XML; returns a reader of the calls."""
+
+    def install(discovered):
+        bin_dir = tmp_path / "bin"
+        bin_dir.mkdir()
+        calls = tmp_path / "calls.jsonl"
+        script = bin_dir / "nmap"
+        script.write_text(
+            _FAKE_NMAP.format(
+                python=sys.executable,
+                tests=os.path.dirname(__file__),
+                calls=str(calls),
+                discovered=json.dumps(discovered),
+            ),
+            encoding="utf-8",
+        )
+        script.chmod(0o755)
+        monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+        return lambda: [json.loads(line) for line in calls.read_text().splitlines()] if calls.exists() else []
+
+    return install
+
+
+def test_staged_scan_fingerprints_only_discovered_ports(tmp_path, fake_nmap):
+    calls = fake_nmap(_DISCOVERED)
+    out = tmp_path / "scan" / "nmap.xml"
+    ok, error = run_nmap_scan("10.0.0.0/29", "aggressive", out, live_progress=False)
+    assert (ok, error) == (True, None)
+
+    discovery, *fingerprint = calls()
+    assert discovery[-1] == "10.0.0.0/29" and "-p-" in discovery
+    # One fingerprint run per distinct port set, each host on its own open ports only.
+    runs = sorted((argv[argv.index("-oX") + 2:], argv[argv.index("-p") + 1]) for argv in fingerprint)
+    assert runs == [(["10.0.0.1", "10.0.0.2"], "22,80"), (["10.0.0.3"], "443")]
+
+    # The merged XML keeps the fingerprinted copy of every discovered port.
+    hosts = {h.address: h for h in iter_nmap_hosts(out)}
+    assert sorted(hosts) == ["10.0.0.1", "10.0.0.2", "10.0.0.3"]
+    assert {(p.portid, p.service_name, p.product) for p in hosts["10.0.0.2"].ports} == {
+        ("22", "svc22", "fp"),
+        ("80", "svc80", "fp"),
+    }
+    assert [(p.portid, p.product) for p in hosts["10.0.0.3"].ports] == [("443", "fp")]
+
+
+def test_staged_scan_stops_when_nothing_is_open(tmp_path, fake_nmap):
+    calls = fake_nmap({})
+    out = tmp_path / "nmap.xml"
+    assert run_nmap_scan("10.0.0.0/29", "aggressive", out, live_progress=False) == (True, None)
+    assert len(calls()) == 1
+    assert list(iter_nmap_hosts(out)) == []
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import socket
+
+import pytest
+
+from mcp_kali_assistant.scanners.ping_check import (
+    MAX_EXPANDED_HOSTS,
+    expand_targets,
+    reachability_check,
+    sample_targets,
+)
+
+
+def test_expand_targets():
+    assert expand_targets("10.0.0.0/30, 10.0.0.1 lab.test") == ["10.0.0.1", "10.0.0.2", "lab.test"]
+    assert expand_targets("10.0.0.5/32") == ["10.0.0.5"]
+
+
+@pytest.mark.parametrize(("target", "message"), [("10.0.0.0/16", "too large"), ("10.0.0.0/33", "Invalid CIDR")])
+def test_expand_targets_rejects(target: str, message: str):
+    with pytest.raises(ValueError, match=message):
+        expand_targets(target)
+
+
+def test_sample_targets_takes_the_first_hosts_of_large_ranges():
+    sample = sample_targets("10.0.0.0/8")
+    assert len(sample) == MAX_EXPANDED_HOSTS
+    assert sample[:2] == ["10.0.0.1", "10.0.0.2"]
+    assert sample[-1] == "10.0.4.0"
+
+
+def test_sample_targets_keeps_order_and_other_parts():
+    assert sample_targets("lab.test 10.0.0.0/30 10.0.0.2 10.0.0.0/99", max_hosts=10) == [
+        "lab.test",
+        "10.0.0.1",
+        "10.0.0.2",
+        "10.0.0.0/99",
+    ]
+    assert sample_targets("10.0.0.0/24", max_hosts=0) == []
+
+
+def test_reachability_check_with_explicit_hosts():
+    with socket.socket() as server:
+        server.bind(("127.0.0.1", 0))
+        server.listen()
+        port = server.getsockname()[1]
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            closed = probe.getsockname()[1]
+
+        single = reachability_check("127.0.0.1", ports=[port, closed], timeout=1)
+        assert single["target"] == "127.0.0.1"
+        assert single["tcp_checks"] == {port: True, closed: False}
+        assert "hosts" not in single
+
+        # A sampled subset stands in for the expansion of a range that is too large.
+        sampled = reachability_check("127.0.0.0/8", ports=[port], timeout=1, hosts=["127.0.0.1"])
+        assert sampled["target"] == "127.0.0.0/8"
+        assert sampled["tcp_checks"] == {port: True}
+        assert [h["target"] for h in sampled["hosts"]] == ["127.0.0.1"]
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from mcp_kali_assistant.ai_engine import pipeline
+from mcp_kali_assistant.ai_engine.pipeline import HostStrategyPipeline, host_reachability
+from mcp_kali_assistant.parsers.models import Host, NmapSummary, Port
+
+# Commands the fake model recommends per target.
+ANSWERS = {
+    "10.0.0.1": ["nikto -h 10.0.0.1", "whatweb 10.0.0.1", "searchsploit apache"],
+    "10.0.0.2": ["searchsploit apache", "smbclient -L //10.0.0.2 -N"],
+    "10.0.0.3": [],
+    "10.0.0.0/29": ["nmap -sU 10.0.0.0/29"],
+}
+
+
+def _host(address: str, state: str = "open") -> Host:
+    return Host(address, "ipv4", None, [Port("80", "tcp", state, "syn-ack", "http")])
+
+
+@pytest.fixture
+def gates():
+    """Target -> event its fake request waits for before answering."""
+    return {}
+
+
+@pytest.fixture
+def requests(monkeypatch, gates):
+    """Replace the model call; returns the ``(target, reachability)`` of every request."""
+    seen = []
+
+    def fake_call(client, target, reachability, nmap_summary, **kwargs):
+        seen.append((target, reachability))
+        if target in gates:
+            gates[target].wait(5)
+        commands = [{"command": c} for c in ANSWERS[target]]
+        return {"raw": f"raw {target}", "parsed": {"target": target}, "commands": commands}
+
+    monkeypatch.setattr(pipeline, "call_ai_strategy", fake_call)
+    return seen
+
+
+def _pipeline(on_commands=None, max_workers=1, reachability=None) -> HostStrategyPipeline:
+    return HostStrategyPipeline(
+        client=None, mode="fast", hint="", reachability=reachability or {}, max_workers=max_workers, on_commands=on_commands
+    )
+
+
+def test_commands_merge_in_arrival_order_with_stable_numbering(requests):
+    batches = []
+    p = _pipeline(on_commands=lambda commands, start, label: batches.append(([c["command"] for c in commands], start, label)))
+    for address in ("10.0.0.1", "10.0.0.2", "10.0.0.3"):
+        assert p.submit(_host(address))
+    result = p.finish(NmapSummary([_host("10.0.0.1"), _host("10.0.0.2")]), "10.0.0.0/29")
+    p.close()
+
+    # Duplicates across hosts are dropped; later hosts continue the numbering.
+    assert batches == [
+        (ANSWERS["10.0.0.1"], 1, "10.0.0.1"),
+        (["smbclient -L //10.0.0.2 -N"], 4, "10.0.0.2"),
+    ]
+    assert [c["command"] for c in result["commands"]] == ANSWERS["10.0.0.1"] + ["smbclient -L //10.0.0.2 -N"]
+    assert result["raw"].split("\n\n") == [f"# host: {a}\nraw {a}" for a in ("10.0.0.1", "10.0.0.2", "10.0.0.3")]
+    assert result["parsed"] == {"hosts": [{"target": a} for a in ("10.0.0.1", "10.0.0.2", "10.0.0.3")]}
+
+
+def test_numbering_follows_completion_order(requests, gates):
+    # The second host answers first: its commands are numbered first.
+    gates["10.0.0.1"] = gate = threading.Event()
+    batches = []
+
+    def on_commands(commands, start, label):
+        batches.append((start, label))
+        if label == "10.0.0.2":
+            gate.set()
+
+    p = _pipeline(on_commands=on_commands, max_workers=2)
+    p.submit(_host("10.0.0.1"))
+    p.submit(_host("10.0.0.2"))
+    result = p.finish(NmapSummary(), "10.0.0.0/29")
+    p.close()
+    assert batches == [(1, "10.0.0.2"), (3, "10.0.0.1")]
+    assert [c["command"] for c in result["commands"]][:2] == ANSWERS["10.0.0.2"]
+
+
+def test_callback_does_not_block_submit(requests):
+    blocked = []
+
+    def on_commands(commands, start, label):
+        # The scan's watcher thread reports another host while the callback is printing.
+        watcher = threading.Thread(target=p.submit, args=(_host("10.0.0.2"),))
+        watcher.start()
+        watcher.join(timeout=2)
+        blocked.append(watcher.is_alive())
+
+    p = _pipeline(on_commands=on_commands)
+    p.submit(_host("10.0.0.1"))
+    result = p.finish(NmapSummary(), "10.0.0.0/29")
+    p.close()
+    assert blocked == [False, False]
+    assert p.submitted == 2
+    assert len(result["commands"]) == 4
+
+
+def test_submit_ignores_repeats_and_hosts_without_open_ports(requests):
+    p = _pipeline()
+    assert p.submit(_host("10.0.0.1"))
+    assert not p.submit(_host("10.0.0.1"))
+    assert not p.submit(_host("10.0.0.2", state="closed"))
+    assert not p.submit(Host("", "ipv4", None, [Port("80", "tcp", "open", "syn-ack")]))
+    p.finish(NmapSummary(), "10.0.0.0/29")
+    p.close()
+    assert [target for target, _ in requests] == ["10.0.0.1"]
+
+
+def test_no_open_ports_asks_once_for_the_whole_target(requests):
+    reachability = {"icmp_reachable": True}
+    p = _pipeline(reachability=reachability)
+    result = p.finish(NmapSummary([_host("10.0.0.1", state="closed")]), "10.0.0.0/29")
+    p.close()
+    assert requests == [("10.0.0.0/29", reachability)]
+    assert [c["command"] for c in result["commands"]] == ANSWERS["10.0.0.0/29"]
+
+
+def test_host_reachability():
+    per_host = {"hosts": [{"target": "10.0.0.1", "icmp_reachable": False}], "icmp_reachable": True}
+    assert host_reachability(per_host, "10.0.0.1") == {"target": "10.0.0.1", "icmp_reachable": False}
+    assert host_reachability(per_host, "10.0.0.9") is per_host
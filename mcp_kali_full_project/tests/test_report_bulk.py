@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import json
+
+from mcp_kali_assistant.core import session_store
+from mcp_kali_assistant.core.session import Session
+from mcp_kali_assistant.reports import bulk
+from mcp_kali_assistant.reports.bulk import FAILED, REBUILT, SKIPPED, regenerate_reports, stamp_path_for
+
+
+def _save(root, session_id: str, hint: str = "") -> Session:
+    session = Session(target="10.0.0.1", mode="fast", hint=hint, session_id=session_id)
+    session.save(root)
+    return session
+
+
+def _statuses(result):
+    return {o.session_id: o.status for o in result.outcomes}
+
+
+def _run(tmp_path, **kwargs):
+    kwargs.setdefault("max_workers", 1)
+    return regenerate_reports(tmp_path / "sessions", tmp_path / "reports", **kwargs)
+
+
+def test_unchanged_sessions_are_skipped(tmp_path):
+    for session_id in ("a", "b"):
+        _save(tmp_path / "sessions", session_id)
+    assert _statuses(_run(tmp_path)) == {"a": REBUILT, "b": REBUILT}
+    report = tmp_path / "reports" / "a.md"
+    stamp = json.loads(stamp_path_for(report).read_text())
+    assert stamp["generator_version"] == bulk.REPORT_GENERATOR_VERSION
+    before = report.stat().st_mtime_ns
+
+    result = _run(tmp_path)
+    assert _statuses(result) == {"a": SKIPPED, "b": SKIPPED}
+    assert report.stat().st_mtime_ns == before
+    assert _statuses(_run(tmp_path, force=True)) == {"a": REBUILT, "b": REBUILT}
+
+
+def test_changed_manifest_invalidates_the_stamp(tmp_path):
+    root = tmp_path / "sessions"
+    _save(root, "a")
+    _save(root, "b")
+    _run(tmp_path)
+
+    session = Session.load(root, "a")
+    session.hint = "new hint"
+    session.save(root)
+    assert _statuses(_run(tmp_path)) == {"a": REBUILT, "b": SKIPPED}
+    assert "new hint" in (tmp_path / "reports" / "a.md").read_text(encoding="utf-8")
+
+
+def test_changed_format_options_invalidate_the_stamp(tmp_path):
+    _save(tmp_path / "sessions", "a")
+    _run(tmp_path)
+    assert _statuses(_run(tmp_path, log_excerpt_bytes=128)) == {"a": REBUILT}
+    assert _statuses(_run(tmp_path, log_excerpt_bytes=128)) == {"a": SKIPPED}
+    # Another format is another report with its own stamp.
+    assert _statuses(_run(tmp_path, fmt="html")) == {"a": REBUILT}
+    assert _statuses(_run(tmp_path, fmt="html")) == {"a": SKIPPED}
+    assert sorted(p.name for p in (tmp_path / "reports").iterdir()) == [
+        "a.html",
+        "a.html.stamp",
+        "a.md",
+        "a.md.stamp",
+    ]
+
+
+def test_generator_version_and_missing_report_invalidate(tmp_path, monkeypatch):
+    _save(tmp_path / "sessions", "a")
+    _run(tmp_path)
+    monkeypatch.setattr(bulk, "REPORT_GENERATOR_VERSION", bulk.REPORT_GENERATOR_VERSION + 1)
+    assert _statuses(_run(tmp_path)) == {"a": REBUILT}
+    (tmp_path / "reports" / "a.md").unlink()
+    assert _statuses(_run(tmp_path)) == {"a": REBUILT}
+    stamp_path_for(tmp_path / "reports" / "a.md").write_text("{not json", encoding="utf-8")
+    assert _statuses(_run(tmp_path)) == {"a": REBUILT}
+    assert _statuses(_run(tmp_path)) == {"a": SKIPPED}
+
+
+def test_broken_session_fails_alone(tmp_path):
+    root = tmp_path / "sessions"
+    _save(root, "a")
+    (root / "broken").mkdir()
+    (root / "broken" / session_store.MANIFEST_FILENAME).write_text("{not json", encoding="utf-8")
+    (root / "not-a-session").mkdir()
+
+    result = _run(tmp_path)
+    assert _statuses(result) == {"a": REBUILT, "broken": FAILED}
+    assert not stamp_path_for(tmp_path / "reports" / "broken.md").exists()
+
+
+def test_process_pool(tmp_path):
+    for i in range(4):
+        _save(tmp_path / "sessions", f"s{i}")
+    result = _run(tmp_path, max_workers=2)
+    assert sorted(_statuses(result).values()) == [REBUILT] * 4
+    assert _statuses(_run(tmp_path, max_workers=2)) == {f"s{i}": SKIPPED for i in range(4)}
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import io
+import json
+
+import pytest
+
+from mcp_kali_assistant.core.session import Session
+from mcp_kali_assistant.reports.sections import Bullets, Excerpt, Field, Heading, Paragraph, Section, Table
+from mcp_kali_assistant.reports.writer import (
+    REPORT_FORMATS,
+    RENDERERS,
+    HtmlRenderer,
+    JsonRenderer,
+    MarkdownRenderer,
+    render_report,
+    write_report,
+)
+
+BLOCKS = [
+    Heading("Host <a>"),
+    Paragraph("An **authorized** run & <b>not</b> more"),
+    Field("Target", "10.0.0.1 <img>"),
+    Field("Hint", "a|b", code=False),
+    Bullets(["<li>x</li>", "y & z"], label="TCP checks"),
+    Excerpt("cmd <1>", "line with ``` fence and </pre>\n", truncated=True),
+    Table(["Port", "Service"], [["22", "ssh|alt"], ["80", "<http>"]]),
+]
+
+
+def _render(renderer_cls, blocks=BLOCKS) -> str:
+    out = io.StringIO()
+    renderer = renderer_cls(out)
+    renderer.begin(Session(target="10.0.0.1", mode="fast", session_id="s<1>"))
+    for i, title in enumerate(["First & only", "Second"]):
+        renderer.begin_section(Section(f"sec{i}", title, iter(())), first=i == 0)
+        for j, block in enumerate(blocks):
+            renderer.block(block, first=j == 0)
+        renderer.end_section(None)
+    renderer.end()
+    return out.getvalue()
+
+
+def test_markdown_escapes_table_cells_and_fences():
+    text = _render(MarkdownRenderer)
+    assert text.startswith("# MCP-Kali Assistant Report – Session s<1>\n")
+    assert "| 22 | ssh\\|alt |" in text
+    assert "- Hint: a|b\n" in text
+    assert "- Target: `10.0.0.1 <img>`\n" in text
+    assert "- TCP checks:\n  - <li>x</li>\n" in text
+    # The excerpt's fence outgrows the backtick run inside it; its title is HTML-escaped.
+    assert "<summary>cmd &lt;1&gt; (truncated)</summary>\n\n````text\n" in text
+    assert "\n````\n\n</details>" in text
+
+
+def test_json_is_one_valid_document():
+    data = json.loads(_render(JsonRenderer))
+    assert data["session_id"] == "s<1>"
+    assert [s["title"] for s in data["sections"]] == ["First & only", "Second"]
+    blocks = data["sections"][0]["blocks"]
+    assert [b["type"] for b in blocks] == ["heading", "paragraph", "field", "field", "bullets", "excerpt", "table"]
+    assert blocks[5] == {"type": "excerpt", "title": "cmd <1>", "text": "line with ``` fence and </pre>\n", "truncated": True}
+    assert blocks[6]["rows"][1] == ["80", "<http>"]
+
+
+def test_html_escapes_everything_from_the_session():
+    text = _render(HtmlRenderer)
+    for raw in ("<a>", "<b>not</b>", "<img>", "<li>x</li>", "and </pre>", "<http>", "s<1>"):
+        assert raw not in text
+    assert "<title>MCP-Kali Assistant Report – Session s&lt;1&gt;</title>" in text
+    assert "<p>An <strong>authorized</strong> run &amp; &lt;b&gt;not&lt;/b&gt; more</p>" in text
+    assert "<li><strong>Target:</strong> <code>10.0.0.1 &lt;img&gt;</code></li>" in text
+    assert "<td>&lt;http&gt;</td>" in text
+    assert "<section id=\"sec0\">\n<h2>First &amp; only</h2>" in text
+    # Per section: one list for both fields, closed before the bullets, plus the bullets list.
+    assert text.count("<ul>") == text.count("</ul>") == 4
+    assert text.rstrip().endswith("</body>\n</html>")
+
+
+def test_html_closes_a_trailing_field_list():
+    text = _render(HtmlRenderer, [Field("Mode", "fast")])
+    assert "<ul>\n<li><strong>Mode:</strong> <code>fast</code></li>\n</ul>\n</section>" in text
+
+
+@pytest.mark.parametrize("fmt", REPORT_FORMATS)
+def test_write_report_for_a_session(tmp_path, fmt: str):
+    session = Session(target="10.0.0.1", mode="fast", hint="<ctf> & co", session_id="s1")
+    session.ai_recommendations = [{"name": "web|scan", "command": "nikto -h http://10.0.0.1/", "priority": 1}]
+    path = write_report(session, tmp_path / "reports", fmt=fmt)
+    assert path == tmp_path / "reports" / f"s1{RENDERERS[fmt].extension}"
+    assert [p.name for p in path.parent.iterdir()] == [path.name]
+    text = path.read_text(encoding="utf-8")
+    if fmt == "json":
+        assert json.loads(text)["target"] == "10.0.0.1"
+    elif fmt == "html":
+        assert "&lt;ctf&gt; &amp; co" in text
+    else:
+        assert "<ctf> & co" in text
+
+
+def test_unknown_format(tmp_path):
+    session = Session(target="10.0.0.1", mode="fast", session_id="s1")
+    with pytest.raises(ValueError, match="Unknown report format"):
+        render_report(session, io.StringIO(), fmt="pdf")
+    with pytest.raises(ValueError, match="Unknown report format"):
+        write_report(session, tmp_path, fmt="pdf")
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import sqlite3
+
+import pytest
+
+from mcp_kali_assistant.core import session_index
+from mcp_kali_assistant.core.session import Session
+from mcp_kali_assistant.core.session_index import SessionIndex, created_at_from_id
+from mcp_kali_assistant.parsers.models import Host, NmapSummary, Port
+
+
+def _session(session_id: str, target: str, mode: str, open_ports: int = 0) -> Session:
+    session = Session(target=target, mode=mode, session_id=session_id)
+    ports = [Port(str(20 + i), "tcp", "open", "syn-ack") for i in range(open_ports)]
+    session.nmap_summary = NmapSummary([Host(target, "ipv4", None, ports)])
+    return session
+
+
+@pytest.fixture
+def root(tmp_path):
+    # Saving a session upserts it into the index.
+    _session("20260101-090000-aaaa", "10.0.0.1", "fast", open_ports=3).save(tmp_path)
+    _session("20260102-090000-bbbb", "10.0.0.12", "balanced", open_ports=1).save(tmp_path)
+    _session("20260103-090000-cccc", "192.168.1.5", "fast", open_ports=7).save(tmp_path)
+    return tmp_path
+
+
+def _ids(records):
+    return [r.session_id[-4:] for r in records]
+
+
+def test_upsert_and_get(root):
+    index = SessionIndex.for_root(root)
+    record = index.get("20260101-090000-aaaa")
+    assert (record.target, record.mode, record.host_count, record.open_port_count) == ("10.0.0.1", "fast", 1, 3)
+    assert record.created_at == created_at_from_id("20260101-090000-aaaa")
+
+    session = Session.load(root, "20260101-090000-aaaa")
+    session.mode = "aggressive"
+    session.selected_indices = [1]
+    session.save(root)
+    record = index.get("20260101-090000-aaaa")
+    assert record.mode == "aggressive"
+    assert record.created_at == created_at_from_id("20260101-090000-aaaa")
+    assert len(index.query()) == 3
+    assert index.get("missing") is None
+
+
+def test_query_filters_and_sorting(root):
+    index = SessionIndex.for_root(root)
+    assert _ids(index.query()) == ["cccc", "bbbb", "aaaa"]
+    assert _ids(index.query(descending=False, limit=2)) == ["aaaa", "bbbb"]
+    assert _ids(index.query(sort="ports")) == ["cccc", "aaaa", "bbbb"]
+    # Target matches as a substring.
+    assert _ids(index.query(target="10.0.0.1")) == ["bbbb", "aaaa"]
+    assert _ids(index.query(mode="fast")) == ["cccc", "aaaa"]
+    assert _ids(index.query(since=created_at_from_id("20260102-000000-x"))) == ["cccc", "bbbb"]
+
+
+@pytest.mark.parametrize("sort", ["created_at", "target; DROP TABLE sessions", ""])
+def test_query_rejects_unknown_sort(root, sort: str):
+    with pytest.raises(ValueError, match="Unknown sort key"):
+        SessionIndex.for_root(root).query(sort=sort)
+    assert len(SessionIndex.for_root(root).query()) == 3
+
+
+def test_query_without_index(tmp_path):
+    assert SessionIndex.for_root(tmp_path).query() == []
+    assert not (tmp_path / session_index.INDEX_FILENAME).exists()
+
+
+def test_rebuild_from_session_files(root):
+    index = SessionIndex.for_root(root)
+    index.remove("20260102-090000-bbbb")
+    assert _ids(index.query()) == ["cccc", "aaaa"]
+    (root / "not-a-session").mkdir()
+    (root / "broken").mkdir()
+    (root / "broken" / "session.manifest.json").write_text("{not json", encoding="utf-8")
+
+    assert index.rebuild(root) == 3
+    assert _ids(index.query()) == ["cccc", "bbbb", "aaaa"]
+    assert index.get("20260103-090000-cccc").open_port_count == 7
+
+
+def test_rebuild_recreates_a_deleted_index(root):
+    index = SessionIndex.for_root(root)
+    (root / session_index.INDEX_FILENAME).unlink()
+    for suffix in ("-wal", "-shm"):
+        (root / (session_index.INDEX_FILENAME + suffix)).unlink(missing_ok=True)
+    assert index.rebuild(root) == 3
+
+
+def test_schema_is_set_up_once_per_file(root, monkeypatch):
+    SessionIndex.for_root(root).query()
+    monkeypatch.setattr(session_index, "_SCHEMA", "NOT SQL;")
+    # Already set up in this process: later connections skip the schema script.
+    assert len(SessionIndex.for_root(root).query()) == 3
+    _session("20260104-090000-dddd", "10.0.0.2", "fast").save(root)
+    assert len(SessionIndex.for_root(root).query()) == 4
+    with pytest.raises(sqlite3.Error):
+        SessionIndex.for_root(root / "other").upsert(_session("x", "10.0.0.3", "fast"))
@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+import gzip
+import json
+import threading
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+from mcp_kali_assistant.core import session_store
+from mcp_kali_assistant.core.session import Session
+from mcp_kali_assistant.core.session_index import SessionIndex
+from mcp_kali_assistant.parsers.models import Host, NmapSummary, Port
+
+
+def _summary(hosts: int) -> NmapSummary:
+    return NmapSummary(
+        Host(
+            f"10.0.{i // 256}.{i % 256}",
+            "ipv4",
+            "Linux",
+            [Port("22", "tcp", "open", "syn-ack", "ssh", "OpenSSH", "8.9p1"), Port("80", "tcp", "closed", "reset")],
+        )
+        for i in range(hosts)
+    )
+
+
+def _session(hosts: int = 60, session_id: str = "s1") -> Session:
+    session = Session(target="10.0.0.0/24", mode="fast", hint="lab", session_id=session_id)
+    session.reachability = {"icmp_reachable": True}
+    session.nmap_summary = _summary(hosts)
+    session.ai_raw_output = "recommendations: []\n" * 300
+    session.ai_recommendations = [{"name": "whoami", "command": "whoami", "priority": 1}]
+    session.selected_indices = [1]
+    return session
+
+
+def _parts(session_dir: Path):
+    return sorted(p.name for p in (session_dir / session_store.PARTS_DIRNAME).iterdir())
+
+
+def _write_legacy(root: Path, session: Session) -> Path:
+    session_dir = root / session.session_id
+    session_dir.mkdir(parents=True)
+    path = session_dir / session_store.LEGACY_FILENAME
+    path.write_text(json.dumps(session.to_dict(), indent=2), encoding="utf-8")
+    return session_dir
+
+
+def test_round_trip(tmp_path):
+    session = _session()
+    path = session.save(tmp_path)
+    assert path == tmp_path / "s1" / session_store.MANIFEST_FILENAME
+    assert Session.load(tmp_path, "s1").to_dict() == session.to_dict()
+
+
+def test_large_parts_are_files_small_parts_inline(tmp_path):
+    _session().save(tmp_path)
+    manifest = session_store.read_manifest(tmp_path / "s1")
+    assert manifest["version"] == session_store.FORMAT_VERSION
+    parts = manifest["parts"]
+    assert parts["nmap_summary"]["file"].endswith(".json.gz")
+    assert parts["nmap_summary"]["counts"] == {"host_count": 60, "open_port_count": 60}
+    assert parts["ai_raw_output"]["codec"] == "gzip"
+    assert parts["ai_recommendations"]["inline"][0]["command"] == "whoami"
+    assert len(_parts(tmp_path / "s1")) == 2
+    # Bulky fields are not duplicated in the manifest's session section.
+    assert "nmap_summary" not in manifest["session"]
+
+
+def test_parts_are_loaded_on_first_access(tmp_path):
+    _session().save(tmp_path)
+    loaded = Session.load(tmp_path, "s1")
+    assert "nmap_summary" not in loaded.__dict__
+    assert loaded.counts() == {"host_count": 60, "open_port_count": 60, "recommendation_count": 1, "executed_count": 0}
+    assert "nmap_summary" not in loaded.__dict__
+    assert len(loaded.nmap_summary) == 60
+    assert "nmap_summary" in loaded.__dict__
+
+
+def test_unchanged_parts_are_not_rewritten(tmp_path):
+    _session().save(tmp_path)
+    session_dir = tmp_path / "s1"
+    before = {name: (session_dir / "parts" / name).stat().st_mtime_ns for name in _parts(session_dir)}
+
+    loaded = Session.load(tmp_path, "s1")
+    loaded.selected_indices = [1, 2]
+    loaded.save(tmp_path)
+    # Read but unchanged: same content, same file.
+    assert len(loaded.nmap_summary) == 60
+    loaded.save(tmp_path)
+    after = {name: (session_dir / "parts" / name).stat().st_mtime_ns for name in _parts(session_dir)}
+    assert after == before
+    assert Session.load(tmp_path, "s1").selected_indices == [1, 2]
+
+
+def test_replaced_part_prunes_the_old_file(tmp_path):
+    _session().save(tmp_path)
+    loaded = Session.load(tmp_path, "s1")
+    old = _parts(tmp_path / "s1")
+    loaded.nmap_summary = _summary(80)
+    loaded.save(tmp_path)
+    new = _parts(tmp_path / "s1")
+    assert len(new) == 2
+    assert len(set(old) & set(new)) == 1
+    assert len(Session.load(tmp_path, "s1").nmap_summary) == 80
+
+
+def test_checkpoints_do_not_re_encode_unchanged_parts(tmp_path, monkeypatch):
+    written = []
+    write_part = session_store.write_part
+    monkeypatch.setattr(session_store, "write_part", lambda d, name, *a, **k: written.append(name) or write_part(d, name, *a, **k))
+
+    session = _session()
+    session.save(tmp_path)
+    assert sorted(written) == ["ai_raw_output", "ai_recommendations", "nmap_summary"]
+    written.clear()
+    for _ in range(3):
+        session.selected_indices.append(2)
+        session.save(tmp_path)
+    assert written == []
+
+    # Assigning a part (even an equal value) re-encodes just that part.
+    session.ai_recommendations = list(session.ai_recommendations)
+    session.save(tmp_path)
+    assert written == ["ai_recommendations"]
+    # Another codec or another root is a fresh write.
+    written.clear()
+    session.save(tmp_path, codec="none")
+    session.save(tmp_path / "copy")
+    assert sorted(written) == sorted(["ai_raw_output", "ai_recommendations", "nmap_summary"] * 2)
+    assert Session.load(tmp_path, "s1").to_dict() == session.to_dict()
+
+
+def test_concurrent_saves_of_one_session(tmp_path):
+    errors = []
+
+    def save() -> None:
+        try:
+            for _ in range(10):
+                # Fresh objects, so every save writes the parts and the manifest again.
+                _session().save(tmp_path)
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+
+    threads = [threading.Thread(target=save) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert Session.load(tmp_path, "s1").to_dict() == _session().to_dict()
+    assert not [p for p in (tmp_path / "s1").rglob("*") if p.name.endswith(session_store.TMP_SUFFIX)]
+
+
+def test_small_session_has_no_parts_dir(tmp_path):
+    session = Session(target="10.0.0.1", mode="fast", session_id="tiny")
+    session.save(tmp_path)
+    assert not (tmp_path / "tiny" / session_store.PARTS_DIRNAME).exists()
+    loaded = Session.load(tmp_path, "tiny")
+    assert loaded.ai_raw_output is None
+    assert not loaded.nmap_summary
+    assert loaded.ai_recommendations == []
+
+
+def test_save_to_another_root_copies_pending_parts(tmp_path):
+    _session().save(tmp_path / "a")
+    loaded = Session.load(tmp_path / "a", "s1")
+    loaded.save(tmp_path / "b")
+    assert Session.load(tmp_path / "b", "s1").to_dict() == _session().to_dict()
+
+
+@pytest.mark.parametrize("codec", ["gzip", "none"])
+def test_codecs(tmp_path, codec: str):
+    _session().save(tmp_path, codec=codec)
+    entry = session_store.read_manifest(tmp_path / "s1")["parts"]["nmap_summary"]
+    raw = (tmp_path / "s1" / entry["file"]).read_bytes()
+    data = gzip.decompress(raw) if codec == "gzip" else raw
+    assert json.loads(data) == _summary(60).to_dict()
+    assert entry["raw_bytes"] == len(data)
+
+
+def test_zstd_codec(tmp_path):
+    try:
+        session_store.check_codec("zstd")
+    except ValueError as e:
+        assert "zstandard" in str(e)
+        pytest.skip("zstandard is not installed")
+    _session().save(tmp_path, codec="zstd")
+    assert Session.load(tmp_path, "s1").to_dict() == _session().to_dict()
+
+
+def test_unknown_codec():
+    with pytest.raises(ValueError, match="Unknown session codec"):
+        session_store.check_codec("lz4")
+
+
+def test_unreadable_manifests(tmp_path):
+    _session().save(tmp_path)
+    path = tmp_path / "s1" / session_store.MANIFEST_FILENAME
+    manifest = json.loads(path.read_text())
+
+    path.write_text(json.dumps({**manifest, "version": session_store.FORMAT_VERSION + 1}))
+    with pytest.raises(ValueError, match="newer than supported"):
+        Session.load(tmp_path, "s1")
+    path.write_text(json.dumps({**manifest, "format": "something-else"}))
+    with pytest.raises(ValueError, match="Not a session manifest"):
+        Session.load(tmp_path, "s1")
+
+
+def test_missing_session(tmp_path):
+    (tmp_path / "empty").mkdir()
+    assert session_store.session_file(tmp_path / "empty") is None
+    with pytest.raises(FileNotFoundError):
+        Session.load(tmp_path, "empty")
+
+
+def test_legacy_session_json_loads(tmp_path):
+    session = _session(session_id="old")
+    session_dir = _write_legacy(tmp_path, session)
+    assert session_store.is_legacy(session_dir)
+    assert session_store.session_file(session_dir) == session_dir / session_store.LEGACY_FILENAME
+    loaded = Session.load(tmp_path, "old")
+    assert loaded.to_dict() == session.to_dict()
+    assert loaded.counts()["host_count"] == 60
+
+
+def test_saving_a_legacy_session_converts_it(tmp_path):
+    session_dir = _write_legacy(tmp_path, _session(session_id="old"))
+    Session.load(tmp_path, "old").save(tmp_path)
+    assert not session_store.is_legacy(session_dir)
+    assert not (session_dir / session_store.LEGACY_FILENAME).exists()
+    assert Session.load(tmp_path, "old").to_dict() == _session(session_id="old").to_dict()
+
+
+@pytest.fixture
+def cli(tmp_path, monkeypatch):
+    """Run mcp_cli commands against a config rooted at ``tmp_path``."""
+    import mcp_cli
+    from mcp_kali_assistant.core.config import AppConfig
+
+    (tmp_path / "config.yaml").write_text("general:\n  sessions_dir: sessions\n", encoding="utf-8")
+    monkeypatch.setattr(AppConfig, "from_cwd", classmethod(lambda cls: cls(tmp_path)))
+    monkeypatch.setattr(session_store, "_default_codec", session_store.DEFAULT_CODEC)
+    runner = CliRunner()
+    return lambda *args: runner.invoke(mcp_cli.app, list(args))
+
+
+def test_migrate_command(tmp_path, cli):
+    root = tmp_path / "sessions"
+    legacy = [_write_legacy(root, _session(session_id=f"old{i}")) for i in range(2)]
+    _session(session_id="new").save(root, codec="none")
+    (root / "broken").mkdir()
+    (root / "broken" / session_store.LEGACY_FILENAME).write_text("{}", encoding="utf-8")
+
+    result = cli("migrate", "--dry-run")
+    assert result.exit_code == 0, result.output
+    assert "3 session(s) would be converted" in result.output
+    assert all(session_store.is_legacy(d) for d in legacy)
+
+    # A session that cannot be read is reported and fails the run; the others are still converted.
+    result = cli("migrate")
+    assert result.exit_code == 1, result.output
+    assert "Converted 2 session(s)" in result.output
+    assert "broken:" in result.output
+    assert session_store.is_legacy(root / "broken")
+    for session_dir in legacy:
+        assert not session_store.is_legacy(session_dir)
+        assert Session.load(root, session_dir.name).to_dict() == _session(session_id=session_dir.name).to_dict()
+    assert {record.session_id for record in SessionIndex.for_root(root).query()} == {"old0", "old1", "new"}
+
+    # Containers are left alone unless asked to switch codec.
+    (root / "broken" / session_store.LEGACY_FILENAME).unlink()
+    result = cli("migrate")
+    assert result.exit_code == 0, result.output
+    assert "Nothing to migrate" in result.output
+    result = cli("migrate", "--recompress", "--codec", "gzip")
+    assert result.exit_code == 0, result.output
+    assert "Converted 1 session(s)" in result.output
+    entry = session_store.read_manifest(root / "new")["parts"]["nmap_summary"]
+    assert entry["codec"] == "gzip"
+    assert Session.load(root, "new").to_dict() == _session(session_id="new").to_dict()
+
+
+def test_migrate_rejects_unknown_codec(cli):
+    result = cli("migrate", "--codec", "lz4")
+    assert result.exit_code == 2
+    assert "Unknown session codec" in result.output
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+import pytest
+import yaml
+
+from mcp_kali_assistant.ai_engine.streaming import RecommendationStreamParser, normalise_recommendation
+
+DOCUMENT = """\
+```yaml
+summary: |
+  Web and SMB exposed.
+  - not a recommendation
+recommendations:
+  - name: Nikto
+    command: nikto -h http://10.0.0.1/
+    category: web
+    priority: 1
+    rationale: "HTTP on 80: check for common misconfigurations"
+  - name: SMB shares
+    command: >
+      smbclient -L //10.0.0.1 -N
+    category: smb
+    priority: 2
+    notes:
+      - anonymous login first
+      - then guest
+  - name: No command here
+    category: generic
+  - name: Whoami
+    command: whoami
+notes: done
+```
+"""
+
+
+def _stream(text: str, chunk_size: int) -> List[Dict[str, Any]]:
+    parser = RecommendationStreamParser()
+    found: List[Dict[str, Any]] = []
+    for i in range(0, len(text), chunk_size):
+        found.extend(parser.feed(text[i:i + chunk_size]))
+    return found + parser.finish()
+
+
+def _full_parse(text: str) -> List[Dict[str, Any]]:
+    body = "\n".join(line for line in text.splitlines() if not line.startswith("```"))
+    return [r for r in map(normalise_recommendation, yaml.safe_load(body)["recommendations"]) if r is not None]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 17, 64, len(DOCUMENT)])
+def test_stream_matches_full_parse_for_any_chunking(chunk_size: int):
+    expected = _full_parse(DOCUMENT)
+    assert [r["name"] for r in expected] == ["Nikto", "SMB shares", "Whoami"]
+    assert _stream(DOCUMENT, chunk_size) == expected
+
+
+def test_items_are_emitted_as_soon_as_the_next_one_starts():
+    parser = RecommendationStreamParser()
+    assert parser.feed("recommendations:\n- command: one\n  priority: 3\n") == []
+    (first,) = parser.feed("- command: two\n")
+    assert (first["command"], first["priority"], first["category"]) == ("one", 3, "generic")
+    (second,) = parser.feed("other_key: x\n")
+    assert second["command"] == "two"
+    assert parser.finish() == []
+
+
+def test_last_item_is_flushed_by_finish_even_without_newline():
+    parser = RecommendationStreamParser()
+    assert parser.feed("recommendations:\n  - command: nmap -sU 10.0.0.1") == []
+    assert [r["command"] for r in parser.finish()] == ["nmap -sU 10.0.0.1"]
+
+
+def test_malformed_item_does_not_block_later_ones():
+    text = "recommendations:\n  - command: [unclosed\n  - command: ok\n"
+    assert [r["command"] for r in _stream(text, 5)] == ["ok"]
+
+
+def test_lists_outside_recommendations_are_ignored():
+    text = "steps:\n  - command: not me\nrecommendations:\n  - command: me\nafter:\n  - command: nor me\n"
+    assert [r["command"] for r in _stream(text, 4)] == ["me"]
+
+
+def test_truncated_stream_keeps_complete_items():
+    # The model stopped mid-item: earlier items survive, a partial one is kept only if usable.
+    cut = DOCUMENT[: DOCUMENT.index("category: smb")]
+    assert [r["name"] for r in _stream(cut, 10)] == ["Nikto", "SMB shares"]
+
+
+@pytest.mark.parametrize("raw", [None, "text", ["a"], {"name": "x"}, {"command": ""}, {"command": 5}])
+def test_normalise_rejects_unusable_entries(raw: Any):
+    assert normalise_recommendation(raw) is None
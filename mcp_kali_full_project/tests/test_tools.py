@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import pytest
+
+from mcp_kali_assistant.core.tools import ToolPlan, command_tools, package_for
+
+
+@pytest.mark.parametrize(
+    ("command", "tools"),
+    [
+        ("nmap -sV 10.0.0.1", ["nmap"]),
+        ("nikto -h http://t/ | tee out.txt && grep -i vuln out.txt", ["nikto", "tee", "grep"]),
+        ("HTTP_PROXY=http://p:8080 curl -s http://t/", ["curl"]),
+        ("sudo -u kali enum4linux -a t", ["enum4linux"]),
+        ("sudo -k nmap -sU t", ["nmap"]),
+        ("timeout -k 5 60 gobuster dir -u http://t/", ["gobuster"]),
+        ("nice -n 10 stdbuf -o L hydra -l admin t ssh", ["hydra"]),
+        ("env -u HOME LANG=C smbclient -L //t -N", ["smbclient"]),
+        ("time nohup whatweb t", ["whatweb"]),
+        ("cd /tmp; echo start; if true; then dig t; fi", ["dig"]),
+        ("for p in 80 443; do curl t:$p; done", ["curl"]),
+        ("sudo", []),
+        ("echo 'unbalanced", []),
+    ],
+)
+def test_command_tools(command: str, tools):
+    assert command_tools(command) == tools
+
+
+def test_plan_packages_and_blocked_commands():
+    plan = ToolPlan(
+        tools_by_command={1: ["dig", "curl"], 2: ["nslookup"], 3: ["nmap"]},
+        missing=["dig", "nslookup", "curl"],
+    )
+    assert plan.packages() == ["dnsutils", "curl"]
+    assert plan.blocked_commands() == {1: ["dig", "curl"], 2: ["nslookup"]}
+    assert plan.commands_needing("nslookup") == [2]
+    assert package_for("/usr/bin/nc") == "netcat-openbsd"